@@ -0,0 +1,232 @@
+"""
+Utilidades compartidas de consulta a capas ArcGIS (MapServer / FeatureServer).
+
+Descarga por ObjectID: en lugar de paginar con resultOffset (que en capas grandes
+obliga al servidor a re-escanear hasta el offset y que servidores antiguos no
+soportan), se piden primero los ObjectIDs de la capa (returnIdsOnly) y luego los
+features en lotes, ya sea por rango OBJECTID (where) o por lista (objectIds).
+Los lotes se pueden pedir en paralelo y se registran en un checkpoint JSONL para
+poder reanudar una descarga interrumpida.
+
+El tamaño de lote se limita al maxRecordCount de la capa; si aun así una
+respuesta llega truncada (exceededTransferLimit), los IDs que faltan se vuelven
+a pedir.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import http_client
+from http_client import get_host_semaphore
+
+
+def get_layer_metadata(layer_url: str) -> Optional[Dict]:
+    """Obtiene la descripción JSON de una capa (sin /query)."""
+    try:
+        with get_host_semaphore(layer_url):
+            response = http_client.get(f"{layer_url}?f=json", timeout=15)
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            return None
+        return data
+    except Exception as e:
+        print(f"[WARNING] No se pudo obtener metadata de la capa: {e}")
+        return None
+
+
+def supports_pagination(layer_metadata: Optional[Dict]) -> bool:
+    """Indica si la capa declara soporte de resultOffset/resultRecordCount."""
+    if not layer_metadata:
+        return True
+    capabilities = layer_metadata.get("advancedQueryCapabilities") or {}
+    return bool(capabilities.get("supportsPagination", False))
+
+
+def get_object_ids(query_url: str, where: str = "1=1") -> Tuple[Optional[str], List[int]]:
+    """
+    Obtiene todos los ObjectIDs de una capa con returnIdsOnly.
+
+    Returns:
+        Tupla (nombre del campo ObjectID, lista ordenada de IDs)
+    """
+    params = {"where": where, "returnIdsOnly": "true", "f": "json"}
+    with get_host_semaphore(query_url):
+        response = http_client.get(query_url, params=params, timeout=60)
+    response.raise_for_status()
+    data = response.json()
+    if "error" in data:
+        error_msg = data["error"].get("message", str(data["error"]))
+        raise RuntimeError(f"Error en la API: {error_msg}")
+
+    oid_field = data.get("objectIdFieldName") or "OBJECTID"
+    object_ids = sorted(int(oid) for oid in (data.get("objectIds") or []))
+    return oid_field, object_ids
+
+
+def plan_object_id_batches(object_ids: List[int], batch_size: int) -> List[List[int]]:
+    """Parte la lista ordenada de ObjectIDs en lotes consecutivos."""
+    return [object_ids[i:i + batch_size] for i in range(0, len(object_ids), batch_size)]
+
+
+def max_record_count(layer_metadata: Optional[Dict]) -> Optional[int]:
+    """maxRecordCount declarado por la capa (None si no lo declara)."""
+    value = (layer_metadata or {}).get("maxRecordCount")
+    try:
+        return int(value) if value and int(value) > 0 else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _feature_object_id(feature: Dict, oid_field: str) -> Optional[int]:
+    attributes = feature.get("attributes") or {}
+    value = attributes.get(oid_field)
+    if value is None:
+        # Algunos servidores cambian mayúsculas del campo entre returnIdsOnly y query
+        value = next((v for k, v in attributes.items() if k.lower() == oid_field.lower()), None)
+    return int(value) if value is not None else None
+
+
+def fetch_object_id_batch(query_url: str, oid_field: str, batch: List[int], out_sr: str = "4326") -> List[Dict]:
+    """
+    Descarga los features de un lote de ObjectIDs.
+
+    Si los IDs del lote son contiguos se usa un where por rango (consulta corta
+    y cacheable por el servidor); si no, se envía la lista explícita por POST
+    para no exceder el largo máximo de URL.
+
+    Si el servidor trunca la respuesta (exceededTransferLimit, lote mayor que
+    su maxRecordCount), los IDs que no llegaron se piden de nuevo.
+    """
+    first_id, last_id = batch[0], batch[-1]
+    data = {"outFields": "*", "f": "json", "outSR": out_sr}
+    if last_id - first_id + 1 == len(batch):
+        data["where"] = f"{oid_field} >= {first_id} AND {oid_field} <= {last_id}"
+    else:
+        data["objectIds"] = ",".join(str(oid) for oid in batch)
+
+    with get_host_semaphore(query_url):
+        response = http_client.post(query_url, data=data, timeout=60)
+    response.raise_for_status()
+    payload = response.json()
+    if "error" in payload:
+        error_msg = payload["error"].get("message", str(payload["error"]))
+        raise RuntimeError(f"Error en la API: {error_msg}")
+    features = payload.get("features", [])
+
+    if payload.get("exceededTransferLimit"):
+        received = {_feature_object_id(f, oid_field) for f in features}
+        missing = [oid for oid in batch if oid not in received]
+        if missing and len(missing) == len(batch):
+            raise RuntimeError(f"Respuesta truncada sin ningún ID del lote {first_id}-{last_id}")
+        if missing:
+            features = features + fetch_object_id_batch(query_url, oid_field, missing, out_sr)
+    return features
+
+
+def load_checkpoint(checkpoint_file: Optional[str]) -> Dict[Tuple[int, int], List[Dict]]:
+    """Lee los lotes ya descargados de un checkpoint JSONL, indexados por (primer, último) ID."""
+    done = {}
+    if not checkpoint_file or not os.path.exists(checkpoint_file):
+        return done
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Línea truncada por una interrupción: se vuelve a descargar ese lote
+                continue
+            done[(entry["first_id"], entry["last_id"])] = entry["features"]
+    return done
+
+
+def download_by_object_ids(
+    layer_url: str,
+    source_name: str,
+    batch_size: int = 1000,
+    max_workers: int = 4,
+    checkpoint_file: Optional[str] = None,
+    out_sr: str = "4326",
+    layer_metadata: Optional[Dict] = None,
+) -> List[Dict]:
+    """
+    Descarga todos los features de una capa particionando por ObjectID.
+
+    Args:
+        layer_url: URL completa de la capa (sin /query)
+        source_name: Nombre de la fuente para logging
+        batch_size: ObjectIDs por lote; se reduce al maxRecordCount de la capa si es menor
+        max_workers: Lotes descargados en paralelo
+        checkpoint_file: JSONL donde se registran los lotes terminados; si existe,
+            los lotes ya registrados no se vuelven a pedir
+        out_sr: Sistema de referencia de salida
+        layer_metadata: Descripción de la capa ya obtenida (get_layer_metadata);
+            si no se pasa, se pide
+
+    Returns:
+        list: Features ordenados por ObjectID
+    """
+    query_url = f"{layer_url}/query"
+
+    print(f"[INFO] Estrategia ObjectID para {source_name}")
+    if layer_metadata is None:
+        layer_metadata = get_layer_metadata(layer_url)
+    limit = max_record_count(layer_metadata)
+    if limit and limit < batch_size:
+        print(f"[INFO] maxRecordCount de la capa: {limit:,}; lotes de {limit:,} ObjectIDs en vez de {batch_size:,}")
+        batch_size = limit
+    oid_field, object_ids = get_object_ids(query_url)
+    print(f"[INFO] {len(object_ids):,} ObjectIDs ({oid_field}) en la capa")
+    if not object_ids:
+        return []
+
+    batches = plan_object_id_batches(object_ids, batch_size)
+    done = load_checkpoint(checkpoint_file)
+    pending = [b for b in batches if (b[0], b[-1]) not in done]
+    if done:
+        print(f"[INFO] Reanudando: {len(batches) - len(pending)} de {len(batches)} lotes ya descargados")
+
+    checkpoint_lock = threading.Lock()
+    checkpoint = open(checkpoint_file, "a", encoding="utf-8") if checkpoint_file else None
+    failed = []
+
+    def run_batch(batch):
+        features = fetch_object_id_batch(query_url, oid_field, batch, out_sr)
+        if checkpoint:
+            line = json.dumps({"first_id": batch[0], "last_id": batch[-1], "features": features}, ensure_ascii=False)
+            with checkpoint_lock:
+                checkpoint.write(line + "\n")
+                checkpoint.flush()
+        return features
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_batch, batch): batch for batch in pending}
+            for future in futures:
+                batch = futures[future]
+                try:
+                    done[(batch[0], batch[-1])] = future.result()
+                    print(f"  [OK] {source_name}: IDs {batch[0]}-{batch[-1]} -> {len(done[(batch[0], batch[-1])]):,} registros")
+                except Exception as e:
+                    failed.append(batch)
+                    print(f"  [ERROR] {source_name}: IDs {batch[0]}-{batch[-1]} falló: {e}")
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    all_features = []
+    for batch in batches:
+        all_features.extend(done.get((batch[0], batch[-1]), []))
+
+    if failed:
+        print(f"[WARNING] {len(failed)} lote(s) fallaron; vuelve a ejecutar para reanudar desde el checkpoint")
+    elif checkpoint_file and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    return all_features
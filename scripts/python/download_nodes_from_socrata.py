@@ -4,13 +4,21 @@ Extrae ubicaciones geográficas de estudios de tránsito y los consolida con nod
 """
 
 import requests
-import json
 import os
+import sys
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+import http_client
+from geojson_io import GeoJSONWriter, iter_features
+from http_cache import TTL_METADATA, cached_get
+from nodos_merge import MERGE_RADIUS_M, merge_nearby_nodes, source_ids
+from nodos_normalize import COLOMBIA_BBOX, format_rejections, validate_coordinates
+from nodos_publish import refresh_derivatives
+from socrata_query import CSVExport, SoQLError, csv_export_url, iter_pages
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 # Configuración de endpoints Socrata
 # INSTRUCCIONES PARA ENCONTRAR EL ID CORRECTO:
 # 1. Ve a https://www.datos.gov.co
@@ -34,14 +42,18 @@ SOCRATA_SEARCH_URL = "https://www.datos.gov.co/api/views.json"
 
 OUTPUT_FILE = str(PROJECT_ROOT / "src" / "data" / "nodos_unificados.json")
 EXISTING_FILE = OUTPUT_FILE  # Mismo archivo para fusión
+SOCRATA_MAX_ROWS = None  # Tope de registros por dataset (None = todos, paginando con SoQL)
+SOCRATA_SELECT_PUSHDOWN = True  # $select solo con las columnas de ubicación/nombre identificadas
+SOCRATA_BULK_CSV = '--bulk-csv' in sys.argv  # Datasets tabulares: exportación rows.csv en streaming en vez de SoQL
+WRITE_COLUMNAR = True  # También escribir nodos_unificados.bin + raw_data por id (ver nodos_columnar.py)
+WRITE_TILES = True  # También escribir la pirámide de teselas z/x/y (ver nodos_tiles.py)
+MERGE_NEARBY = True  # Fusionar nodos de distintas fuentes a menos de MERGE_RADIUS_M (ver nodos_merge.py)
 
 # Configuración de colores
 COLOR_AFOROS = "#2979FF"  # Azul para aforos/estudios
 
-# Token de aplicación de Socrata (opcional, pero puede ser necesario para algunos datasets)
-# Para obtener un token: https://dev.socrata.com/register
-SOCRATA_APP_TOKEN = None  # Agregar aquí tu token si es necesario
-SOCRATA_APP_SECRET = None  # Agregar aquí tu secret si es necesario
+# El token de aplicación de Socrata (opcional) se toma de las variables de entorno
+# SOCRATA_APP_TOKEN / SOCRATA_APP_SECRET; ver http_client.socrata_headers()
 
 
 def get_dataset_metadata(dataset_id: str) -> Optional[Dict]:
@@ -50,12 +62,7 @@ def get_dataset_metadata(dataset_id: str) -> Optional[Dict]:
     """
     try:
         metadata_url = f"https://www.datos.gov.co/api/views/{dataset_id}.json"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json'
-        }
-        
-        response = requests.get(metadata_url, headers=headers, timeout=15)
+        response = cached_get(metadata_url, headers=http_client.socrata_headers(), ttl=TTL_METADATA, timeout=15)
         if response.ok:
             return response.json()
     except Exception as e:
@@ -92,17 +99,8 @@ def get_federated_data_urls(metadata: Dict) -> List[str]:
 def get_dataset_info(endpoint: str) -> Optional[Dict]:
     """Obtiene información sobre el dataset para identificar campos disponibles."""
     try:
-        # Headers para evitar bloqueos
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json'
-        }
-        
-        # Agregar token de aplicación si está configurado
-        if SOCRATA_APP_TOKEN:
-            headers['X-App-Token'] = SOCRATA_APP_TOKEN
-        if SOCRATA_APP_SECRET:
-            headers['X-App-Secret'] = SOCRATA_APP_SECRET
+        # Token de aplicación si está configurado
+        headers = http_client.socrata_headers()
         
         # Intentar primero sin parámetros (Socrata puede tener límites por defecto)
         print(f"[INFO] Obteniendo muestra del dataset...")
@@ -111,17 +109,17 @@ def get_dataset_info(endpoint: str) -> Optional[Dict]:
         # Si el endpoint es rows.json, puede necesitar parámetros diferentes
         if '/rows.json' in endpoint:
             # rows.json generalmente funciona sin parámetros o con ?$limit
-            response = requests.get(endpoint, headers=headers, timeout=15)
+            response = http_client.get(endpoint, headers=headers, timeout=15)
         else:
             # Para resource API, intentar sin parámetros primero
-            response = requests.get(endpoint, headers=headers, timeout=15)
+            response = http_client.get(endpoint, headers=headers, timeout=15)
         
         # Si falla con 403, puede ser que necesite acceso directo sin autenticación
         # Intentar diferentes estrategias
         if response.status_code == 403:
             print(f"[WARNING] 403 Forbidden recibido.")
             print(f"[INFO] El dataset puede requerir:")
-            print(f"  - Token de aplicación de Socrata (configura SOCRATA_APP_TOKEN)")
+            print(f"  - Token de aplicación de Socrata (variable de entorno SOCRATA_APP_TOKEN)")
             print(f"  - Acceso público habilitado en el portal")
             print(f"[INFO] Intentando acceso alternativo...")
             # Algunos datasets de Socrata requieren el formato completo
@@ -132,7 +130,7 @@ def get_dataset_info(endpoint: str) -> Optional[Dict]:
             ]
             for alt_endpoint in alt_endpoints:
                 try:
-                    alt_response = requests.get(alt_endpoint, headers=headers, timeout=10)
+                    alt_response = http_client.get(alt_endpoint, headers=headers, timeout=10)
                     if alt_response.ok:
                         response = alt_response
                         endpoint = alt_endpoint  # Actualizar para usar este endpoint
@@ -145,7 +143,7 @@ def get_dataset_info(endpoint: str) -> Optional[Dict]:
         if not response.ok:
             # En Socrata, el formato correcto es usar & en lugar de ? para parámetros adicionales
             sample_url = f"{endpoint}?$limit=5"
-            response = requests.get(sample_url, headers=headers, timeout=15)
+            response = http_client.get(sample_url, headers=headers, timeout=15)
         
         response.raise_for_status()
         data = response.json()
@@ -164,11 +162,7 @@ def get_dataset_info(endpoint: str) -> Optional[Dict]:
         print(f"[WARNING] No se pudo obtener info del dataset: {e}")
         # Intentar una última vez sin ningún parámetro
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json'
-            }
-            response = requests.get(endpoint, headers=headers, timeout=15)
+            response = http_client.get(endpoint, headers=http_client.socrata_headers(), timeout=15)
             if response.ok:
                 data = response.json()
                 if data and len(data) > 0:
@@ -234,22 +228,71 @@ def find_location_fields(fields: List[str], sample: Dict) -> Dict[str, str]:
     return field_mapping
 
 
-def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = None) -> List[Dict]:
+def iter_csv_record_pages(url: str, limit: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Descarga un CSV de Socrata en streaming, página por página.
+    
+    Los campos de ubicación se identifican con la fila de encabezado y solo
+    esas columnas se conservan en cada registro.
+    
+    Args:
+        url: URL del CSV (rows.csv o archivo de un dataset federado)
+        limit: Límite máximo de registros (None = todos)
+    
+    Yields:
+        Lista de registros (con mapeo de campos) de cada página
+    """
+    print(f"[INFO] Descargando CSV en streaming: {url}")
+    with CSVExport(url) as export:
+        field_mapping = find_location_fields(export.fieldnames, {})
+        id_field = field_mapping.get('nodo') or field_mapping.get('codigo_nodo') or field_mapping.get('id_nodo')
+        lat_field = field_mapping.get('coordenaday') or field_mapping.get('latitud') or field_mapping.get('lat')
+        lon_field = field_mapping.get('coordenadax') or field_mapping.get('longitud') or field_mapping.get('lon')
+        name_field = (field_mapping.get('interseccion') or 
+                      field_mapping.get('via_principal') or 
+                      field_mapping.get('direccion'))
+        
+        print(f"[INFO] Campos identificados:")
+        print(f"  ID: {id_field}")
+        print(f"  Latitud: {lat_field}")
+        print(f"  Longitud: {lon_field}")
+        print(f"  Nombre: {name_field}")
+        
+        columns = list(dict.fromkeys(f for f in [id_field, lat_field, lon_field, name_field]
+                                     + list(field_mapping.values()) if f))
+        for page in export.iter_pages(columns, max_rows=limit):
+            yield [{
+                'raw': record,
+                'id_field': id_field,
+                'lat_field': lat_field,
+                'lon_field': lon_field,
+                'name_field': name_field
+            } for record in page]
+        print(f"[OK] CSV descargado: {export.rows:,} registros")
+
+
+def iter_socrata_record_pages(endpoint: str, limit: Optional[int] = None,
+                              dataset_id: str = None) -> Iterator[List[Dict]]:
     """
-    Descarga datos desde Socrata usando SoQL.
+    Descarga datos desde Socrata usando SoQL, página por página.
+    
+    Los endpoints /resource/ se paginan con socrata_query (count(*) + páginas
+    $limit/$offset ordenadas por :id, en paralelo); los CSV (datasets federados
+    o exportación rows.csv con SOCRATA_BULK_CSV) se leen en streaming; los
+    demás formatos se entregan en una sola página.
     
     Args:
         endpoint: URL del endpoint de Socrata
-        limit: Límite máximo de registros a descargar
+        limit: Límite máximo de registros a descargar (None = todos)
     
-    Returns:
-        Lista de registros descargados
+    Yields:
+        Lista de registros (con mapeo de campos) de cada página
     """
     print(f"\n{'='*80}")
     print(f"DESCARGANDO DATOS DESDE SOCRATA")
     print(f"{'='*80}")
     print(f"Endpoint: {endpoint}")
-    print(f"Límite: {limit:,} registros")
+    print(f"Límite: {f'{limit:,} registros' if limit else 'sin límite'}")
     print("-" * 80)
     
     # Si tenemos el dataset_id, obtener metadatos primero
@@ -259,6 +302,11 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
             view_type = metadata.get('viewType', 'unknown')
             print(f"[INFO] Tipo de dataset: {view_type}")
             
+            # Dataset tabular en modo masivo: exportación rows.csv en streaming
+            if SOCRATA_BULK_CSV and view_type == 'tabular':
+                yield from iter_csv_record_pages(csv_export_url(endpoint, dataset_id), limit)
+                return
+            
             # Si es un dataset federado (href), buscar URLs de archivos
             if view_type == 'href' or metadata.get('assetType') == 'federated_href':
                 print(f"[INFO] Dataset federado detectado. Buscando archivos de datos...")
@@ -266,60 +314,24 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
                 
                 if data_urls:
                     # Headers para descargar archivos
-                    file_headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                        'Accept': '*/*'
-                    }
+                    file_headers = http_client.socrata_headers(accept='*/*')
                     
                     # Intentar descargar desde las URLs encontradas
                     for data_url in data_urls:
                         print(f"\n[INFO] Intentando descargar desde: {data_url}")
+                        pages_yielded = 0
                         try:
-                            file_response = requests.get(data_url, headers=file_headers, timeout=30)
+                            if data_url.endswith('.csv') or 'csv' in data_url.lower():
+                                # CSV en streaming: páginas de filas a medida que llegan
+                                for page in iter_csv_record_pages(data_url, limit):
+                                    pages_yielded += 1
+                                    yield page
+                                return
+                            
+                            file_response = http_client.get(data_url, headers=file_headers, timeout=30)
                             if file_response.ok:
                                 # Determinar tipo de archivo
-                                if data_url.endswith('.csv') or 'csv' in data_url.lower():
-                                    # Procesar CSV
-                                    import io
-                                    import csv
-                                    csv_data = file_response.text
-                                    csv_reader = csv.DictReader(io.StringIO(csv_data))
-                                    records_list = list(csv_reader)
-                                    
-                                    print(f"[OK] CSV descargado: {len(records_list)} registros")
-                                    
-                                    if records_list:
-                                        # Identificar campos de ubicación desde el CSV
-                                        sample_record = records_list[0]
-                                        fields = list(sample_record.keys())
-                                        field_mapping = find_location_fields(fields, sample_record)
-                                        
-                                        # Mapear campos encontrados
-                                        id_field = field_mapping.get('nodo') or field_mapping.get('codigo_nodo') or field_mapping.get('id_nodo')
-                                        lat_field = field_mapping.get('coordenaday') or field_mapping.get('latitud') or field_mapping.get('lat')
-                                        lon_field = field_mapping.get('coordenadax') or field_mapping.get('longitud') or field_mapping.get('lon')
-                                        name_field = (field_mapping.get('interseccion') or 
-                                                     field_mapping.get('via_principal') or 
-                                                     field_mapping.get('direccion'))
-                                        
-                                        print(f"[INFO] Campos identificados:")
-                                        print(f"  ID: {id_field}")
-                                        print(f"  Latitud: {lat_field}")
-                                        print(f"  Longitud: {lon_field}")
-                                        print(f"  Nombre: {name_field}")
-                                        
-                                        # Convertir a formato compatible
-                                        return [{
-                                            'raw': record,
-                                            'id_field': id_field,
-                                            'lat_field': lat_field,
-                                            'lon_field': lon_field,
-                                            'name_field': name_field
-                                        } for record in records_list]
-                                    
-                                    return []
-                                    
-                                elif data_url.endswith('.json') or 'json' in data_url.lower():
+                                if data_url.endswith('.json') or 'json' in data_url.lower():
                                     # Procesar JSON
                                     json_data = file_response.json()
                                     if isinstance(json_data, list):
@@ -343,7 +355,7 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
                                         lon_field = field_mapping.get('coordenadax') or field_mapping.get('longitud')
                                         name_field = field_mapping.get('interseccion') or field_mapping.get('direccion')
                                         
-                                        return [{
+                                        yield [{
                                             'raw': record,
                                             'id_field': id_field,
                                             'lat_field': lat_field,
@@ -351,13 +363,16 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
                                             'name_field': name_field
                                         } for record in records_list]
                                     
-                                    return []
+                                    return
                         except Exception as e:
+                            if pages_yielded:
+                                # Ya se entregaron registros de este archivo: otra URL los duplicaría
+                                raise
                             print(f"[WARNING] Error descargando {data_url}: {e}")
                             continue
                     
                     print(f"[ERROR] No se pudieron descargar los archivos desde las URLs encontradas")
-                    return []
+                    return
                 else:
                     print(f"[WARNING] No se encontraron URLs de archivos en los metadatos")
     
@@ -366,7 +381,7 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
     
     if not dataset_info or not dataset_info['available']:
         print(f"[ERROR] No se pudo acceder al dataset o está vacío")
-        return []
+        return
     
     fields = dataset_info['fields']
     sample = dataset_info['sample']
@@ -393,7 +408,7 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
     if not lat_field or not lon_field:
         print(f"[ERROR] No se encontraron campos de coordenadas válidos")
         print(f"Campos disponibles: {fields}")
-        return []
+        return
     
     select_fields.extend([lat_field, lon_field])
     
@@ -407,46 +422,60 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
     if name_field:
         select_fields.append(name_field)
     
+    def with_mapping(records: List[Dict]) -> List[Dict]:
+        return [{
+            'raw': record,
+            'id_field': id_field,
+            'lat_field': lat_field,
+            'lon_field': lon_field,
+            'name_field': name_field
+        } for record in records]
+    
+    # Resource API: paginación SoQL completa (sin truncar en $limit)
+    if '/resource/' in endpoint:
+        # $select: columnas de ubicación identificadas (raw_data queda solo con ellas)
+        select = None
+        if SOCRATA_SELECT_PUSHDOWN:
+            select = list(dict.fromkeys(f for f in [id_field, lat_field, lon_field, name_field]
+                                        + list(field_mapping.values()) if f))
+            print(f"\n[INFO] $select: {', '.join(select)}")
+        try:
+            total = 0
+            for page in iter_pages(endpoint, select=select, max_rows=limit):
+                total += len(page)
+                yield with_mapping(page)
+            print(f"[OK] {total:,} registros descargados")
+            return
+        except SoQLError as e:
+            if not select or total:
+                raise
+            # Algún campo de la muestra no es columna SoQL: se reintenta sin $select
+            print(f"[WARNING] {e}; reintentando sin $select")
+            for page in iter_pages(endpoint, max_rows=limit):
+                yield with_mapping(page)
+            return
+    
     # Construir query - Socrata usa formato específico
     select_clause = ','.join(select_fields)
     
     # Intentar diferentes formatos de query según el tipo de endpoint
-    if '/rows.json' in endpoint:
-        # Para rows.json, el formato es diferente
-        query_formats = [
-            endpoint,  # Sin parámetros
-            f"{endpoint}?$limit={limit}",  # Con límite
-        ]
-    else:
-        # Para resource API, usar formato SoQL estándar
-        query_formats = [
-            endpoint,  # Sin parámetros primero
-            f"{endpoint}?$limit={limit}",  # Solo límite
-            f"{endpoint}?$select={select_clause}&$limit={limit}",  # Con select y límite
-        ]
+    query_formats = [endpoint]  # Sin parámetros
+    if limit:
+        query_formats.append(f"{endpoint}?$limit={limit}")  # Con límite
     
     print(f"\n[INFO] Query SoQL:")
     print(f"  SELECT: {select_clause}")
-    print(f"  LIMIT: {limit}")
+    print(f"  LIMIT: {limit or 'sin límite'}")
     print(f"\n[INFO] Descargando datos...")
     
-    # Headers para evitar bloqueos
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/json'
-    }
-    
-    # Agregar token de aplicación si está configurado
-    if SOCRATA_APP_TOKEN:
-        headers['X-App-Token'] = SOCRATA_APP_TOKEN
-    if SOCRATA_APP_SECRET:
-        headers['X-App-Secret'] = SOCRATA_APP_SECRET
+    # Token de aplicación si está configurado
+    headers = http_client.socrata_headers()
     
     data = None
     for query_url in query_formats:
         try:
             print(f"[INFO] Intentando: {query_url[:100]}...")
-            response = requests.get(query_url, headers=headers, timeout=30)
+            response = http_client.get(query_url, headers=headers, timeout=30)
             
             if response.ok:
                 data = response.json()
@@ -463,18 +492,39 @@ def download_socrata_data(endpoint: str, limit: int = 5000, dataset_id: str = No
     
     if not data:
         print(f"[ERROR] No se pudo obtener datos con ningún formato de query")
-        return []
+        return
     
     print(f"[OK] {len(data):,} registros descargados")
     
     # Retornar datos con mapeo de campos
-    return [{
-        'raw': record,
-        'id_field': id_field,
-        'lat_field': lat_field,
-        'lon_field': lon_field,
-        'name_field': name_field
-    } for record in data]
+    yield with_mapping(data)
+
+
+def normalize_socrata_batch(records: List[Dict], start_index: int = 1) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Normaliza una página completa de registros de Socrata a features GeoJSON.
+    
+    Las coordenadas de todo el lote se convierten y validan de una vez
+    (vacíos, no numéricos, NaN, ceros y fuera de COLOMBIA_BBOX; ver nodos_normalize.py).
+    
+    Args:
+        records: Registros con mapeo de campos (una página de iter_socrata_record_pages)
+        start_index: Índice del primer registro (para IDs fallback)
+    
+    Returns:
+        tuple: (features normalizados, descartes por motivo)
+    """
+    lons = [r['raw'].get(r['lon_field']) if r['lon_field'] else None for r in records]
+    lats = [r['raw'].get(r['lat_field']) if r['lat_field'] else None for r in records]
+    # Bogotá está aproximadamente entre 4.0-5.0 lat y -75.0 a -74.0 lon; Medellín
+    # alrededor de 6.2 lat y -75.6 lon, así que se usa el rango amplio de Colombia
+    valid, valid_lons, valid_lats, rejected = validate_coordinates(lons, lats, COLOMBIA_BBOX)
+    
+    features = [
+        _build_socrata_feature(records[i], start_index + i, lon, lat)
+        for i, lon, lat in zip(valid, valid_lons, valid_lats)
+    ]
+    return features, rejected
 
 
 def normalize_socrata_feature(record_data: Dict, index: int) -> Optional[Dict]:
@@ -488,43 +538,16 @@ def normalize_socrata_feature(record_data: Dict, index: int) -> Optional[Dict]:
     Returns:
         Feature GeoJSON normalizado o None si no es válido
     """
+    features, _ = normalize_socrata_batch([record_data], start_index=index)
+    return features[0] if features else None
+
+
+def _build_socrata_feature(record_data: Dict, index: int, lon: float, lat: float) -> Dict:
+    """Construye el feature de un registro con coordenadas ya validadas."""
     raw = record_data['raw']
     id_field = record_data['id_field']
-    lat_field = record_data['lat_field']
-    lon_field = record_data['lon_field']
     name_field = record_data['name_field']
     
-    # Extraer coordenadas
-    try:
-        lat_str = raw.get(lat_field) if lat_field else None
-        lon_str = raw.get(lon_field) if lon_field else None
-        
-        if not lat_str or not lon_str:
-            return None
-        
-        # Convertir a float (manejar strings vacíos y valores None)
-        try:
-            lat = float(lat_str) if lat_str else None
-            lon = float(lon_str) if lon_str else None
-        except (ValueError, TypeError):
-            return None
-        
-        if lat is None or lon is None:
-            return None
-        
-        # Validar coordenadas (Bogotá está aproximadamente entre 4.0-5.0 lat y -75.0 a -74.0 lon)
-        # Medellín está alrededor de 6.2 lat y -75.6 lon, así que ampliamos el rango
-        if lat == 0 or lon == 0:
-            return None
-        
-        # Validar rango aproximado (Colombia: lat 4-12, lon -79 a -66)
-        # Pero nos enfocamos en Bogotá y Medellín principalmente
-        if not (3.0 <= lat <= 7.0) or not (-80.0 <= lon <= -73.0):
-            return None
-            
-    except (ValueError, TypeError, AttributeError):
-        return None
-    
     # Extraer ID
     if id_field and raw.get(id_field):
         feature_id = str(raw[id_field])
@@ -588,65 +611,25 @@ def load_existing_nodes(file_path: str) -> Dict[str, Dict]:
         return {}
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Crear diccionario indexado por ID para evitar duplicados; los features
+        # se leen de a uno sin cargar el documento completo
+        nodes_dict = {}
+        for feature in iter_features(file_path):
+            feature_id = feature.get('properties', {}).get('id')
+            if feature_id:
+                nodes_dict[str(feature_id)] = feature
         
-        if data.get('type') == 'FeatureCollection' and 'features' in data:
-            features = data['features']
-            # Crear diccionario indexado por ID para evitar duplicados
-            nodes_dict = {}
-            for feature in features:
-                feature_id = feature.get('properties', {}).get('id')
-                if feature_id:
-                    nodes_dict[str(feature_id)] = feature
-            
-            print(f"[OK] Archivo existente cargado: {len(nodes_dict):,} nodos únicos")
-            return nodes_dict
-        else:
-            print(f"[WARNING] Formato de archivo no reconocido")
-            return {}
+        print(f"[OK] Archivo existente cargado: {len(nodes_dict):,} nodos únicos")
+        return nodes_dict
             
+    except ValueError as e:
+        print(f"[WARNING] Formato de archivo no reconocido: {e}")
+        return {}
     except Exception as e:
         print(f"[ERROR] Error cargando archivo existente: {e}")
         return {}
 
 
-def save_unified_geojson(all_features: List[Dict], output_file: str, metadata: Optional[Dict] = None):
-    """
-    Guarda todos los features unificados en formato GeoJSON.
-    """
-    # Crear directorio si no existe
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"[OK] Directorio creado: {output_dir}")
-    
-    # Convertir a formato GeoJSON
-    geojson_data = {
-        "type": "FeatureCollection",
-        "features": all_features,
-        "metadata": metadata or {
-            "total_features": len(all_features),
-            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-    }
-    
-    # Guardar archivo JSON
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson_data, f, ensure_ascii=False, indent=2)
-        
-        file_size = os.path.getsize(output_file)
-        file_size_mb = file_size / (1024 * 1024)
-        print(f"\n[OK] Archivo guardado exitosamente: {output_file}")
-        print(f"Tamaño del archivo: {file_size_mb:.2f} MB")
-        return True
-        
-    except Exception as e:
-        print(f"[ERROR] Error al guardar el archivo: {e}")
-        return False
-
-
 def try_common_socrata_endpoints() -> List[str]:
     """
     Prueba endpoints comunes de volúmenes vehiculares en datos.gov.co
@@ -692,42 +675,38 @@ def search_socrata_datasets(keywords: List[str], limit: int = 10) -> List[str]:
     return []
 
 
-def main():
-    """Función principal que ejecuta el proceso completo."""
+def print_endpoint_instructions():
+    """Explica cómo configurar SOCRATA_ENDPOINTS cuando está vacío."""
     print("\n" + "=" * 80)
-    print("DESCARGADOR DE NODOS DESDE SOCRATA (DATOS ABIERTOS COLOMBIA)")
-    print("=" * 80 + "\n")
-    
-    # Cargar nodos existentes si el archivo existe
-    existing_nodes = load_existing_nodes(EXISTING_FILE)
-    print(f"Nodos existentes antes de agregar Socrata: {len(existing_nodes):,}\n")
-    
-    # Descargar datos de Socrata
-    all_socrata_features = []
-    
-    # Intentar endpoints configurados
-    endpoints_to_try = SOCRATA_ENDPOINTS.copy()
+    print("NO HAY ENDPOINTS CONFIGURADOS")
+    print("=" * 80)
+    print("\nPara usar este script, necesitas el ID del dataset de Socrata.")
+    print("\nPASOS PARA ENCONTRAR EL ID:")
+    print("1. Ve a https://www.datos.gov.co")
+    print("2. Busca 'volúmenes vehiculares' o 'aforos' o 'estudios de tránsito'")
+    print("3. Abre el dataset que contenga coordenadas (latitud/longitud)")
+    print("4. En la URL verás algo como: datos.gov.co/Transporte/Volumenes/xxxx-xxxx")
+    print("5. Copia el ID (xxxx-xxxx, formato: letras-números)")
+    print("6. Edita este script y agrega el endpoint en SOCRATA_ENDPOINTS:")
+    print("   SOCRATA_ENDPOINTS = [")
+    print("       \"https://www.datos.gov.co/resource/[TU-ID-AQUI].json\",")
+    print("   ]")
+    print("\n" + "=" * 80 + "\n")
+
+
+def iter_socrata_feature_pages() -> Iterator[List[Dict]]:
+    """
+    Descarga y normaliza, página por página, los registros del primer endpoint
+    de SOCRATA_ENDPOINTS que responda.
     
-    # Si los endpoints configurados fallan, mostrar instrucciones
-    if not endpoints_to_try:
-        print("\n" + "=" * 80)
-        print("NO HAY ENDPOINTS CONFIGURADOS")
-        print("=" * 80)
-        print("\nPara usar este script, necesitas el ID del dataset de Socrata.")
-        print("\nPASOS PARA ENCONTRAR EL ID:")
-        print("1. Ve a https://www.datos.gov.co")
-        print("2. Busca 'volúmenes vehiculares' o 'aforos' o 'estudios de tránsito'")
-        print("3. Abre el dataset que contenga coordenadas (latitud/longitud)")
-        print("4. En la URL verás algo como: datos.gov.co/Transporte/Volumenes/xxxx-xxxx")
-        print("5. Copia el ID (xxxx-xxxx, formato: letras-números)")
-        print("6. Edita este script y agrega el endpoint en SOCRATA_ENDPOINTS:")
-        print("   SOCRATA_ENDPOINTS = [")
-        print("       \"https://www.datos.gov.co/resource/[TU-ID-AQUI].json\",")
-        print("   ]")
-        print("\n" + "=" * 80 + "\n")
-        return False
+    Yields:
+        Features normalizados de cada página (sin endpoints configurados no entrega nada)
+    """
+    if not SOCRATA_ENDPOINTS:
+        print_endpoint_instructions()
+        return
     
-    for endpoint in endpoints_to_try:
+    for endpoint in SOCRATA_ENDPOINTS:
         # Extraer dataset_id del endpoint si es posible
         dataset_id = None
         if 'b9s9-jw7c' in endpoint:
@@ -737,80 +716,140 @@ def main():
         elif '/api/views/' in endpoint:
             dataset_id = endpoint.split('/api/views/')[-1].split('/')[0]
         
-        records = download_socrata_data(endpoint, limit=5000, dataset_id=dataset_id)
+        # Normalizar features página por página, a medida que se descargan
+        record_count = 0
+        normalized_count = 0
+        rejected = {}
+        for records in iter_socrata_record_pages(endpoint, limit=SOCRATA_MAX_ROWS, dataset_id=dataset_id):
+            normalized, page_rejected = normalize_socrata_batch(records, start_index=record_count + 1)
+            record_count += len(records)
+            normalized_count += len(normalized)
+            for reason, count in page_rejected.items():
+                rejected[reason] = rejected.get(reason, 0) + count
+            if normalized:
+                yield normalized
         
-        if not records:
+        if not record_count:
             print(f"[WARNING] No se obtuvieron datos del endpoint: {endpoint}")
             continue
         
-        # Normalizar features
-        print(f"\n[PROCESANDO] Normalizando {len(records):,} registros...")
-        normalized_count = 0
-        skipped_count = 0
-        
-        for idx, record_data in enumerate(records, start=1):
-            normalized = normalize_socrata_feature(record_data, idx)
-            if normalized:
-                all_socrata_features.append(normalized)
-                normalized_count += 1
-            else:
-                skipped_count += 1
-        
-        print(f"[OK] {normalized_count:,} features normalizados exitosamente")
+        skipped_count = sum(rejected.values())
+        print(f"\n[OK] {normalized_count:,} de {record_count:,} registros normalizados exitosamente")
         if skipped_count > 0:
-            print(f"[INFO] {skipped_count:,} registros omitidos (coordenadas inválidas)")
+            print(f"[INFO] {skipped_count:,} registros omitidos (coordenadas inválidas: {format_rejections(rejected)})")
         
         # Si encontramos datos, no necesitamos probar otros endpoints
         if normalized_count > 0:
             break
+
+
+def new_nodes(features: Iterable[Dict], known_ids: set, counts: Dict[str, int]) -> List[Dict]:
+    """
+    Features cuyo id no está en known_ids (ids de nodos existentes, incluidos
+    los fusionados dentro de otro nodo en sources).
     
-    if not all_socrata_features:
-        print("\n[ERROR] No se pudieron obtener features válidos de Socrata")
+    Agrega los ids nuevos a known_ids y suma a counts['new'] y counts['duplicates'].
+    """
+    added = []
+    for feature in features:
+        feature_id = feature.get('properties', {}).get('id')
+        if not feature_id:
+            continue
+        feature_id_str = str(feature_id)
+        if feature_id_str in known_ids:
+            counts['duplicates'] += 1
+            continue
+        known_ids.add(feature_id_str)
+        counts['new'] += 1
+        added.append(feature)
+    return added
+
+
+def main():
+    """Función principal que ejecuta el proceso completo."""
+    print("\n" + "=" * 80)
+    print("DESCARGADOR DE NODOS DESDE SOCRATA (DATOS ABIERTOS COLOMBIA)")
+    print("=" * 80 + "\n")
+    
+    # Cargar nodos existentes si el archivo existe
+    existing_nodes = load_existing_nodes(EXISTING_FILE)
+    print(f"Nodos existentes antes de agregar Socrata: {len(existing_nodes):,}\n")
+    
+    if not SOCRATA_ENDPOINTS:
+        print_endpoint_instructions()
         return False
     
-    print(f"\n[OK] Total de features de Socrata: {len(all_socrata_features):,}")
+    known_ids = {source_id for feature in existing_nodes.values() for source_id in source_ids(feature)}
+    counts = {'socrata': 0, 'new': 0, 'duplicates': 0}
+    origin_counts = {}
+    type_counts = {}
     
-    # Fusionar con nodos existentes (evitar duplicados por ID)
-    print(f"\n[FUSIONANDO] Combinando con nodos existentes...")
+    def socrata_pages():
+        # Solo los nodos nuevos (evitar duplicados por ID), página por página
+        for page in iter_socrata_feature_pages():
+            counts['socrata'] += len(page)
+            yield new_nodes(page, known_ids, counts)
+    
+    def counted(features):
+        for feature in features:
+            props = feature.get('properties', {})
+            origen = props.get('origen', 'UNKNOWN')
+            tipo = props.get('tipo', 'UNKNOWN')
+            origin_counts[origen] = origin_counts.get(origen, 0) + 1
+            type_counts[tipo] = type_counts.get(tipo, 0) + 1
+            yield feature
     
-    merged_nodes = existing_nodes.copy()
-    new_nodes_count = 0
-    duplicate_count = 0
+    metadata = {
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "merge_radius_m": MERGE_RADIUS_M if MERGE_NEARBY else None
+    }
     
-    for feature in all_socrata_features:
-        feature_id = feature.get('properties', {}).get('id')
-        if feature_id:
-            feature_id_str = str(feature_id)
-            if feature_id_str not in merged_nodes:
-                merged_nodes[feature_id_str] = feature
-                new_nodes_count += 1
+    # El archivo anterior se reemplaza solo al cerrar el escritor con datos de Socrata
+    try:
+        with GeoJSONWriter(OUTPUT_FILE, metadata=metadata) as writer:
+            if MERGE_NEARBY:
+                # La fusión espacial necesita todos los nodos a la vez
+                print(f"\n[FUSIONANDO] Agrupando nodos de distintas fuentes a menos de {MERGE_RADIUS_M:g} m...")
+                all_features = list(existing_nodes.values())
+                for page in socrata_pages():
+                    all_features.extend(page)
+                existing_nodes.clear()
+                all_features, merge_stats = merge_nearby_nodes(all_features, radius_m=MERGE_RADIUS_M)
+                print(f"[OK] {merge_stats['fused']:,} nodos fusionados en {merge_stats['groups']:,} grupos "
+                      f"({merge_stats['input']:,} -> {merge_stats['output']:,} nodos)")
+                writer.write_all(counted(all_features))
+                del all_features
             else:
-                duplicate_count += 1
+                writer.write_all(counted(existing_nodes.values()))
+                for page in socrata_pages():
+                    writer.write_all(counted(page))
+            
+            if not counts['socrata']:
+                writer.abort()
+            else:
+                writer.metadata.update(sources=list(origin_counts), socrata_nodes_added=counts['new'])
+            total = writer.count
+    except Exception as e:
+        print(f"[ERROR] Error al guardar el archivo: {e}")
+        print("\n" + "=" * 80)
+        print("EL PROCESO TERMINÓ CON ERRORES")
+        print("=" * 80 + "\n")
+        return False
     
-    print(f"[OK] Nuevos nodos agregados: {new_nodes_count:,}")
-    if duplicate_count > 0:
-        print(f"[INFO] Nodos duplicados omitidos: {duplicate_count:,}")
+    if not counts['socrata']:
+        print("\n[ERROR] No se pudieron obtener features válidos de Socrata")
+        return False
     
-    # Convertir diccionario a lista
-    all_features = list(merged_nodes.values())
+    print(f"\n[OK] Total de features de Socrata: {counts['socrata']:,}")
+    print(f"[OK] Nuevos nodos agregados: {counts['new']:,}")
+    if counts['duplicates'] > 0:
+        print(f"[INFO] Nodos duplicados omitidos: {counts['duplicates']:,}")
     
     # Estadísticas por origen
     print("\n" + "=" * 80)
     print("ESTADÍSTICAS FINALES")
     print("=" * 80)
-    
-    origin_counts = {}
-    type_counts = {}
-    
-    for feature in all_features:
-        props = feature.get('properties', {})
-        origen = props.get('origen', 'UNKNOWN')
-        tipo = props.get('tipo', 'UNKNOWN')
-        
-        origin_counts[origen] = origin_counts.get(origen, 0) + 1
-        type_counts[tipo] = type_counts.get(tipo, 0) + 1
-    
-    print(f"\nTotal de nodos unificados: {len(all_features):,}")
+    print(f"\nTotal de nodos unificados: {total:,}")
     print("\nDesglose por origen:")
     for origen, count in sorted(origin_counts.items()):
         print(f"  {origen}: {count:,} nodos")
@@ -821,30 +860,19 @@ def main():
     
     print("=" * 80)
     
-    # Guardar archivo unificado
-    metadata = {
-        "total_features": len(all_features),
-        "sources": list(origin_counts.keys()),
-        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "socrata_nodes_added": new_nodes_count
-    }
-    
-    success = save_unified_geojson(all_features, OUTPUT_FILE, metadata)
-    
-    if success:
-        print("\n" + "=" * 80)
-        print("PROCESO COMPLETADO EXITOSAMENTE")
-        print("=" * 80)
-        print(f"Archivo guardado: {OUTPUT_FILE}")
-        print(f"Total de nodos unificados: {len(all_features):,}")
-        print(f"Nodos nuevos de Socrata: {new_nodes_count:,}")
-        print("=" * 80 + "\n")
-        return True
+    file_size_mb = os.path.getsize(OUTPUT_FILE) / (1024 * 1024)
+    print(f"\n[OK] Archivo guardado exitosamente: {OUTPUT_FILE} ({total:,} features)")
+    print(f"Tamaño del archivo: {file_size_mb:.2f} MB")
+    refresh_derivatives(OUTPUT_FILE, columnar=WRITE_COLUMNAR, tiles=WRITE_TILES)
     
     print("\n" + "=" * 80)
-    print("EL PROCESO TERMINÓ CON ERRORES")
+    print("PROCESO COMPLETADO EXITOSAMENTE")
+    print("=" * 80)
+    print(f"Archivo guardado: {OUTPUT_FILE}")
+    print(f"Total de nodos unificados: {total:,}")
+    print(f"Nodos nuevos de Socrata: {counts['new']:,}")
     print("=" * 80 + "\n")
-    return False
+    return True
 
 
 if __name__ == "__main__":
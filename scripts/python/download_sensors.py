@@ -8,10 +8,17 @@ import requests
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import http_client
+from http_cache import TTL_METADATA, TTL_SERVICE, cached_get
+from arcgis_query import download_by_object_ids, get_layer_metadata, supports_pagination
+from geojson_io import GeoJSONWriter
+from http_client import get_host_semaphore
+
 # Ruta a la raíz del proyecto (scripts/python -> scripts -> raíz)
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 
 # URLs de configuración - Servidores IDECA
 PRIMARY_SERVICES = [
@@ -23,6 +30,12 @@ PRIMARY_SERVICES = [
 
 OUTPUT_FILE = str(PROJECT_ROOT / "src" / "data" / "nodos_ideca.json")
 BATCH_SIZE = 2000  # Tamaño de lote optimizado para MapServer de IDECA
+MAX_WORKERS = 4  # Lotes descargados en paralelo con la estrategia por ObjectID
+# "offset": paginar con resultOffset | "objectid": lotes por ObjectID | "auto": objectid si la capa no soporta paginación
+DOWNLOAD_STRATEGY = "auto"
+# "batched": metadata de todas las capas con un solo /layers y conteos en paralelo solo de las que coinciden
+# "per_layer": una petición de info + una de conteo por cada ID de capa (servidores sin /layers)
+SCAN_MODE = "batched"
 MIN_RECORDS_THRESHOLD = 50  # Mínimo de registros para considerar una capa válida (ajustado para encontrar más capas)
 
 # Palabras clave para identificar capas relevantes
@@ -60,8 +73,7 @@ def matches_keywords(text, keywords):
 def get_map_server_info(base_url):
     """Obtiene información del MapServer."""
     try:
-        info_url = f"{base_url}?f=json"
-        response = requests.get(info_url, timeout=20)
+        response = cached_get(base_url, params={'f': 'json'}, ttl=TTL_SERVICE, timeout=20)
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -72,8 +84,7 @@ def get_map_server_info(base_url):
 def get_layer_info(base_url, layer_id):
     """Obtiene información detallada de una capa específica."""
     try:
-        layer_url = f"{base_url}/{layer_id}?f=json"
-        response = requests.get(layer_url, timeout=15)
+        response = cached_get(f"{base_url}/{layer_id}", params={'f': 'json'}, ttl=TTL_SERVICE, timeout=15)
         response.raise_for_status()
         data = response.json()
         if 'error' in data:
@@ -90,11 +101,12 @@ def get_layer_info(base_url, layer_id):
 
 
 def get_layer_count(base_url, layer_id):
-    """Obtiene el conteo de registros de una capa."""
+    """Obtiene el conteo de registros de una capa (en caché por TTL_METADATA)."""
     try:
         query_url = f"{base_url}/{layer_id}/query"
         params = {'where': '1=1', 'returnCountOnly': 'true', 'f': 'json'}
-        response = requests.get(query_url, params=params, timeout=15)
+        with get_host_semaphore(query_url):
+            response = cached_get(query_url, params=params, ttl=TTL_METADATA, timeout=15)
         response.raise_for_status()
         data = response.json()
         if 'error' in data:
@@ -104,12 +116,100 @@ def get_layer_count(base_url, layer_id):
         return 0
 
 
-def scan_service(base_url, max_layers=40):
-    """Escanea un servicio MapServer completo buscando capas relevantes."""
+def get_service_layers(base_url):
+    """
+    Obtiene la metadata de todas las capas del servicio con una sola petición a /layers.
+    
+    Returns:
+        list: Capas (id, name, type, geometryType, ...) o None si el servidor no expone /layers
+    """
+    try:
+        response = cached_get(f"{base_url}/layers", params={'f': 'json'}, ttl=TTL_SERVICE, timeout=20)
+        response.raise_for_status()
+        data = response.json()
+        if 'error' in data:
+            return None
+        return data.get('layers')
+    except Exception:
+        return None
+
+
+def print_candidates(candidates):
+    """Imprime el resumen de capas candidatas de un servicio."""
+    if candidates:
+        print(f"[OK] Se encontraron {len(candidates)} capa(s) candidata(s):")
+        for cand in candidates:
+            print(f"  - Capa {cand['layer_id']}: {cand['name']} ({cand['count']:,} registros)")
+    else:
+        print("[INFO] No se encontraron capas candidatas en este servicio")
+
+
+def scan_service_batched(base_url):
+    """
+    Escanea un servicio MapServer con la metadata de /layers y conteos en paralelo.
+    
+    El conteo solo sirve para ordenar candidatas, así que se pide únicamente para
+    las capas cuyo nombre coincide con KEYWORDS. Si el servidor no expone /layers
+    se recurre al escaneo capa por capa.
+    """
     print("=" * 80)
     print(f"ESCANEANDO SERVICIO: {base_url}")
     print("=" * 80)
     
+    layers = get_service_layers(base_url)
+    if layers is None:
+        print("[INFO] El servidor no expone /layers; escaneando capa por capa")
+        return scan_service(base_url, print_header=False)
+    
+    print(f"Capas disponibles según el servidor: {len(layers)}")
+    print("-" * 80)
+    
+    # Las capas de grupo no tienen registros propios
+    matching = [
+        layer for layer in layers
+        if layer.get('type') != 'Group Layer' and matches_keywords(layer.get('name', ''), KEYWORDS)
+    ]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        counts = dict(zip(
+            (layer['id'] for layer in matching),
+            executor.map(lambda layer: get_layer_count(base_url, layer['id']), matching)
+        ))
+    
+    candidates = []
+    for layer in layers:
+        layer_id = layer.get('id', 0)
+        layer_name = layer.get('name', 'Sin nombre')
+        if layer_id not in counts:
+            print(f"Capa {layer_id:2d} - {layer_name[:50]:<50} | {'-':>8} registros")
+            continue
+        
+        count = counts[layer_id]
+        status = "[CANDIDATA]" if count >= MIN_RECORDS_THRESHOLD else ""
+        print(f"Capa {layer_id:2d} - {layer_name[:50]:<50} | {count:>8,} registros [MATCH] {status}")
+        
+        # Igual que en el escaneo capa por capa, una coincidencia con pocos registros también es opción
+        if count > 0:
+            candidates.append({
+                'layer_id': layer_id,
+                'name': layer_name,
+                'count': count,
+                'type': layer.get('type', 'Unknown'),
+                'geometryType': layer.get('geometryType', 'Unknown'),
+                'base_url': base_url
+            })
+    
+    print("-" * 80)
+    print_candidates(candidates)
+    return candidates
+
+
+def scan_service(base_url, max_layers=40, print_header=True):
+    """Escanea un servicio MapServer completo buscando capas relevantes (una petición por capa)."""
+    if print_header:
+        print("=" * 80)
+        print(f"ESCANEANDO SERVICIO: {base_url}")
+        print("=" * 80)
+    
     server_info = get_map_server_info(base_url)
     if not server_info:
         print("[ERROR] No se pudo obtener información del servidor")
@@ -168,28 +268,21 @@ def scan_service(base_url, max_layers=40):
         time.sleep(0.3)
     
     print("-" * 80)
-    
-    if candidates:
-        print(f"[OK] Se encontraron {len(candidates)} capa(s) candidata(s):")
-        for cand in candidates:
-            print(f"  - Capa {cand['layer_id']}: {cand['name']} ({cand['count']:,} registros)")
-    else:
-        print("[INFO] No se encontraron capas candidatas en este servicio")
-    
+    print_candidates(candidates)
     return candidates
 
 
-def download_all_features(layer_url):
+def iter_feature_pages(layer_url):
     """
-    Descarga todos los features de una capa específica usando paginación.
+    Descarga todos los features de una capa específica usando paginación,
+    entregando cada página apenas llega.
     
     Args:
         layer_url: URL completa de la capa con /query al final
     
-    Returns:
-        list: Lista de todos los features descargados
+    Yields:
+        list: Features de cada página
     """
-    all_features = []
     result_offset = 0
     total_downloaded = 0
     
@@ -200,6 +293,29 @@ def download_all_features(layer_url):
     print(f"Tamaño de lote: {BATCH_SIZE} registros")
     print("-" * 70)
     
+    base_layer_url = layer_url[:-len("/query")] if layer_url.endswith("/query") else layer_url
+    strategy = DOWNLOAD_STRATEGY
+    layer_metadata = get_layer_metadata(base_layer_url) if strategy in ("auto", "objectid") else None
+    if strategy == "auto":
+        strategy = "offset" if supports_pagination(layer_metadata) else "objectid"
+    if strategy == "objectid":
+        # El checkpoint reanudable necesita la capa completa: llega como una sola página
+        checkpoint_file = OUTPUT_FILE.replace('.json', '_oid_checkpoint.jsonl')
+        try:
+            features = download_by_object_ids(
+                base_layer_url, "IDECA", batch_size=BATCH_SIZE,
+                max_workers=MAX_WORKERS, checkpoint_file=checkpoint_file,
+                layer_metadata=layer_metadata
+            )
+        except Exception as e:
+            print(f"\n[ERROR] Descarga por ObjectID falló: {e}")
+            features = []
+        print("-" * 70)
+        print(f"Total de features descargados: {len(features):,}")
+        if features:
+            yield features
+        return
+    
     while True:
         params = {
             'where': '1=1',
@@ -211,7 +327,7 @@ def download_all_features(layer_url):
         }
         
         try:
-            response = requests.get(layer_url, params=params, timeout=60)
+            response = http_client.get(layer_url, params=params, timeout=60)
             response.raise_for_status()
             
             data = response.json()
@@ -229,8 +345,7 @@ def download_all_features(layer_url):
                 print(f"\n[OK] Descarga completada. No hay más registros.")
                 break
             
-            # Acumular features
-            all_features.extend(features)
+            yield features
             total_downloaded += len(features)
             
             # Mostrar progreso
@@ -264,45 +379,41 @@ def download_all_features(layer_url):
             break
     
     print("-" * 70)
-    print(f"Total de features descargados: {len(all_features):,}")
-    
-    return all_features
+    print(f"Total de features descargados: {total_downloaded:,}")
 
 
-def save_geojson(features, output_file):
+def save_geojson(layer_url, output_file, pretty=False):
     """
-    Guarda los features en formato GeoJSON.
+    Descarga la capa y escribe cada página en el GeoJSON apenas llega.
+    
+    El archivo anterior se reemplaza solo si se descargó al menos un feature.
     
     Args:
-        features: Lista de features a guardar
+        layer_url: URL completa de la capa con /query al final
         output_file: Ruta del archivo de salida
-    """
-    # Crear directorio si no existe
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"[OK] Directorio creado: {output_dir}")
+        pretty: True para JSON indentado; por defecto compacto (~mitad de tamaño)
     
-    # Convertir a formato GeoJSON
-    geojson_data = {
-        "type": "FeatureCollection",
-        "features": features
-    }
-    
-    # Guardar archivo JSON
+    Returns:
+        int: Número de features guardados (0 si no hubo datos o falló la escritura)
+    """
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson_data, f, ensure_ascii=False, indent=2)
+        with GeoJSONWriter(output_file, metadata=None, pretty=pretty) as writer:
+            for page in iter_feature_pages(layer_url):
+                writer.write_all(page)
+            count = writer.count
+            if not count:
+                writer.abort()
+                return 0
         
         file_size = os.path.getsize(output_file)
         file_size_mb = file_size / (1024 * 1024)
-        print(f"[OK] Archivo guardado exitosamente: {output_file}")
+        print(f"[OK] Archivo guardado exitosamente: {output_file} ({count:,} features)")
         print(f"Tamaño del archivo: {file_size_mb:.2f} MB")
-        return True
+        return count
         
     except Exception as e:
         print(f"[ERROR] Error al guardar el archivo: {e}")
-        return False
+        return 0
 
 
 def main():
@@ -316,7 +427,10 @@ def main():
     
     for service_url in PRIMARY_SERVICES:
         print(f"\n")
-        candidates = scan_service(service_url, max_layers=40)
+        if SCAN_MODE == "batched":
+            candidates = scan_service_batched(service_url)
+        else:
+            candidates = scan_service(service_url, max_layers=40)
         all_candidates.extend(candidates)
         print()
     
@@ -340,18 +454,16 @@ def main():
     print("=" * 80)
     
     layer_url = f"{best_candidate['base_url']}/{best_candidate['layer_id']}/query"
-    features = download_all_features(layer_url)
+    count = save_geojson(layer_url, OUTPUT_FILE)
     
-    if features:
-        success = save_geojson(features, OUTPUT_FILE)
-        if success:
-            print("\n" + "=" * 80)
-            print("PROCESO COMPLETADO EXITOSAMENTE")
-            print("=" * 80)
-            print(f"Archivo guardado: {OUTPUT_FILE}")
-            print(f"Total de nodos/sensores descargados: {len(features):,}")
-            print("=" * 80 + "\n")
-            return True
+    if count:
+        print("\n" + "=" * 80)
+        print("PROCESO COMPLETADO EXITOSAMENTE")
+        print("=" * 80)
+        print(f"Archivo guardado: {OUTPUT_FILE}")
+        print(f"Total de nodos/sensores descargados: {count:,}")
+        print("=" * 80 + "\n")
+        return True
     
     print("\n" + "=" * 80)
     print("EL PROCESO TERMINO CON ERRORES")
@@ -7,9 +7,17 @@ import requests
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+import http_client
+from arcgis_query import download_by_object_ids, get_layer_metadata, supports_pagination
+from geojson_io import GeoJSONWriter
+from http_client import get_host_semaphore
+from nodos_normalize import COLOMBIA_BBOX, esri_geometry_to_geojson, format_rejections, validate_coordinates
+from nodos_publish import refresh_derivatives
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 # Configuración de fuentes de datos VERIFICADAS
 SOURCES = [
     {
@@ -32,6 +40,12 @@ SOURCES = [
 
 OUTPUT_FILE = str(PROJECT_ROOT / "src" / "data" / "nodos_unificados.json")
 BATCH_SIZE = 1000
+WRITE_COLUMNAR = True  # También escribir nodos_unificados.bin + raw_data por id (ver nodos_columnar.py)
+WRITE_TILES = True  # También escribir la pirámide de teselas z/x/y (ver nodos_tiles.py)
+CONCURRENT_DOWNLOAD = True  # Planificar todos los offsets con el conteo y descargarlos en paralelo
+MAX_WORKERS = 4  # Ancho del pool de descarga
+# "offset": paginar con resultOffset | "objectid": lotes por ObjectID | "auto": objectid si la capa no soporta paginación
+DOWNLOAD_STRATEGY = "auto"
 
 
 def get_layer_count(layer_url):
@@ -39,7 +53,7 @@ def get_layer_count(layer_url):
     try:
         query_url = f"{layer_url}/query"
         params = {"where": "1=1", "returnCountOnly": "true", "f": "json"}
-        response = requests.get(query_url, params=params, timeout=15)
+        response = http_client.get(query_url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         if "error" in data:
@@ -50,9 +64,125 @@ def get_layer_count(layer_url):
         return 0
 
 
-def download_all_features(layer_url, source_name, id_field=None, label_field=None):
+def fetch_offset_window(query_url, offset, window_size):
+    """
+    Descarga la ventana [offset, offset + window_size) de una capa.
+    
+    Si el servidor tiene un maxRecordCount menor que window_size, la respuesta
+    llega recortada con exceededTransferLimit; en ese caso se piden los
+    registros faltantes de la misma ventana hasta completarla.
+    
+    Returns:
+        list: Features de la ventana, en orden de offset
+    """
+    features = []
+    current_offset = offset
+    remaining = window_size
+    
+    while remaining > 0:
+        params = {
+            "where": "1=1",
+            "outFields": "*",
+            "f": "json",
+            "resultOffset": current_offset,
+            "resultRecordCount": remaining,
+            "outSR": "4326"
+        }
+        with get_host_semaphore(query_url):
+            response = http_client.get(query_url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        
+        if "error" in data:
+            error_msg = data["error"].get("message", str(data["error"]))
+            raise RuntimeError(f"Error en la API: {error_msg}")
+        
+        page = data.get("features", [])
+        if not page:
+            break
+        
+        features.extend(page)
+        current_offset += len(page)
+        remaining -= len(page)
+        
+        if not data.get("exceededTransferLimit", False):
+            break
+    
+    return features
+
+
+def iter_feature_pages_concurrent(layer_url, source_name, total_count):
+    """
+    Descarga una capa planificando todas las ventanas de offset a partir del
+    conteo total y pidiéndolas en un pool de hilos acotado.
+    
+    Las páginas se entregan en orden de offset para que la salida sea
+    determinista sin importar el orden en que terminen las peticiones; cada
+    una se suelta al entregarla.
+    
+    Args:
+        layer_url: URL completa de la capa (sin /query)
+        source_name: Nombre de la fuente para logging
+        total_count: Número total de registros reportado por la capa
+    
+    Yields:
+        list: Features Esri de cada ventana
+    """
+    query_url = f"{layer_url}/query"
+    offsets = list(range(0, total_count, BATCH_SIZE))
+    failed_offsets = []
+    total_downloaded = 0
+    last_page_size = 0
+    
+    print(f"[INFO] Modo concurrente: {len(offsets)} lotes planificados con {MAX_WORKERS} workers")
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(fetch_offset_window, query_url, offset, BATCH_SIZE): offset
+            for offset in offsets
+        }
+        while futures:
+            # En orden de envío; la página deja de estar referenciada al entregarla
+            future = next(iter(futures))
+            offset = futures.pop(future)
+            try:
+                page = future.result()
+            except Exception as e:
+                failed_offsets.append(offset)
+                print(f"  [ERROR] {source_name}: offset {offset:,} falló: {e}")
+                continue
+            print(f"  [OK] {source_name}: offset {offset:,} -> {len(page):,} registros")
+            total_downloaded += len(page)
+            last_page_size = len(page)
+            yield page
+    
+    # Registros agregados a la capa después del conteo
+    if not failed_offsets and offsets and last_page_size == BATCH_SIZE:
+        try:
+            next_offset = offsets[-1] + BATCH_SIZE
+            while True:
+                extra = fetch_offset_window(query_url, next_offset, BATCH_SIZE)
+                total_downloaded += len(extra)
+                if extra:
+                    yield extra
+                if len(extra) < BATCH_SIZE:
+                    break
+                next_offset += BATCH_SIZE
+        except Exception as e:
+            print(f"[WARNING] No se pudieron verificar registros adicionales: {e}")
+    
+    if failed_offsets:
+        print(f"[WARNING] {len(failed_offsets)} lote(s) fallaron (offsets: {', '.join(f'{o:,}' for o in failed_offsets)})")
+        print(f"[WARNING] Se entregaron {total_downloaded:,} features descargados")
+    
+    print("-" * 80)
+    print(f"[OK] Total descargado: {total_downloaded:,} features")
+
+
+def iter_feature_pages(layer_url, source_name, id_field=None, label_field=None):
     """
-    Descarga todos los features de una capa usando paginación eficiente.
+    Descarga todos los features de una capa usando paginación eficiente,
+    entregando cada página apenas llega.
     
     Args:
         layer_url: URL completa de la capa (sin /query)
@@ -60,10 +190,9 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
         id_field: Campo que contiene el ID único
         label_field: Campo que contiene el nombre/etiqueta
     
-    Returns:
-        list: Lista de todos los features descargados
+    Yields:
+        list: Features Esri de cada página
     """
-    all_features = []
     result_offset = 0
     total_downloaded = 0
     batch_number = 1
@@ -75,6 +204,28 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
     print(f"Tamaño de lote: {BATCH_SIZE} registros")
     print("-" * 80)
     
+    strategy = DOWNLOAD_STRATEGY
+    layer_metadata = get_layer_metadata(layer_url) if strategy in ("auto", "objectid") else None
+    if strategy == "auto":
+        strategy = "offset" if supports_pagination(layer_metadata) else "objectid"
+    if strategy == "objectid":
+        checkpoint_file = OUTPUT_FILE.replace(".json", f"_{source_name}_oid_checkpoint.jsonl")
+        # El checkpoint reanudable necesita la capa completa: llega como una sola página
+        try:
+            features = download_by_object_ids(
+                layer_url, source_name, batch_size=BATCH_SIZE,
+                max_workers=MAX_WORKERS, checkpoint_file=checkpoint_file,
+                layer_metadata=layer_metadata
+            )
+        except Exception as e:
+            print(f"\n[ERROR] Descarga por ObjectID falló: {e}")
+            return
+        print("-" * 80)
+        print(f"[OK] Total descargado: {len(features):,} features")
+        if features:
+            yield features
+        return
+    
     # Obtener conteo total primero
     total_count = get_layer_count(layer_url)
     if total_count > 0:
@@ -83,6 +234,11 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
         print("[INFO] No se pudo obtener el conteo total, continuando...")
     print("-" * 80)
     
+    # Con el conteo conocido se pueden planificar todas las ventanas de antemano
+    if CONCURRENT_DOWNLOAD and total_count > BATCH_SIZE:
+        yield from iter_feature_pages_concurrent(layer_url, source_name, total_count)
+        return
+    
     query_url = f"{layer_url}/query"
     
     while True:
@@ -98,7 +254,7 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
         try:
             print(f"[BATCH {batch_number}] Descargando {source_name}: offset {result_offset:,}...")
             
-            response = requests.get(query_url, params=params, timeout=30)
+            response = http_client.get(query_url, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -117,8 +273,7 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
                 print(f"\n[OK] Descarga completada. No hay más registros.")
                 break
             
-            # Acumular features
-            all_features.extend(features)
+            yield features
             total_downloaded += len(features)
             
             # Mostrar progreso
@@ -147,13 +302,13 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
                 
         except requests.exceptions.Timeout:
             print(f"\n[ERROR] Timeout en la petición (offset: {result_offset})")
-            if all_features:
-                print(f"[WARNING] Retornando {len(all_features):,} features descargados hasta ahora")
+            if total_downloaded:
+                print(f"[WARNING] Se entregaron {total_downloaded:,} features descargados hasta ahora")
             break
         except requests.exceptions.RequestException as e:
             print(f"\n[ERROR] Error en la petición HTTP: {e}")
-            if all_features:
-                print(f"[WARNING] Retornando {len(all_features):,} features descargados hasta ahora")
+            if total_downloaded:
+                print(f"[WARNING] Se entregaron {total_downloaded:,} features descargados hasta ahora")
             break
         except json.JSONDecodeError as e:
             print(f"\n[ERROR] Error al parsear JSON: {e}")
@@ -163,9 +318,7 @@ def download_all_features(layer_url, source_name, id_field=None, label_field=Non
             break
     
     print("-" * 80)
-    print(f"[OK] Total descargado: {len(all_features):,} features")
-    
-    return all_features
+    print(f"[OK] Total descargado: {total_downloaded:,} features")
 
 
 def normalize_feature(feature, source_config, index):
@@ -182,34 +335,7 @@ def normalize_feature(feature, source_config, index):
     nombre = attributes.get(source_config.get("label_field")) or attributes.get("NOMBRE") or attributes.get("NAME") or attributes.get("DIRECCION") or f"Nodo {feature_id}"
     
     # Convertir geometría Esri a GeoJSON
-    geojson_geometry = None
-    if geometry:
-        if "x" in geometry and "y" in geometry:
-            # Punto
-            geojson_geometry = {
-                "type": "Point",
-                "coordinates": [geometry.get("x"), geometry.get("y")]
-            }
-        elif "paths" in geometry:
-            # Línea (MultiLineString)
-            paths = geometry.get("paths", [])
-            if len(paths) == 1:
-                geojson_geometry = {
-                    "type": "LineString",
-                    "coordinates": [[coord[0], coord[1]] for coord in paths[0]]
-                }
-            else:
-                geojson_geometry = {
-                    "type": "MultiLineString",
-                    "coordinates": [[[coord[0], coord[1]] for coord in path] for path in paths]
-                }
-        elif "rings" in geometry:
-            # Polígono
-            rings = geometry.get("rings", [])
-            geojson_geometry = {
-                "type": "Polygon",
-                "coordinates": [[[coord[0], coord[1]] for coord in ring] for ring in rings]
-            }
+    geojson_geometry = esri_geometry_to_geojson(geometry)
     
     # Crear feature normalizado con estructura estándar
     normalized = {
@@ -229,9 +355,48 @@ def normalize_feature(feature, source_config, index):
     return normalized
 
 
-def download_source(source_config):
+def normalize_features_batch(features, source_config, start_index=1):
+    """
+    Normaliza una página completa de features Esri.
+    
+    Las coordenadas de los puntos se validan en lote (vacías, NaN, ceros y
+    fuera de COLOMBIA_BBOX; ver nodos_normalize.py) y los puntos inválidos se
+    descartan; líneas y polígonos pasan sin validar.
+    
+    Returns:
+        tuple: (features normalizados, descartes por motivo)
+    """
+    geometries = [feature.get("geometry") or {} for feature in features]
+    point_positions = [i for i, g in enumerate(geometries) if "paths" not in g and "rings" not in g]
+    valid, lons, lats, rejected = validate_coordinates(
+        [geometries[i].get("x") for i in point_positions],
+        [geometries[i].get("y") for i in point_positions],
+        COLOMBIA_BBOX
+    )
+    valid_points = {point_positions[k]: (lon, lat) for k, lon, lat in zip(valid, lons, lats)}
+    
+    normalized_features = []
+    for position, feature in enumerate(features):
+        if position in valid_points:
+            normalized = normalize_feature(feature, source_config, start_index + position)
+            normalized["geometry"] = {"type": "Point", "coordinates": list(valid_points[position])}
+        elif "paths" in geometries[position] or "rings" in geometries[position]:
+            normalized = normalize_feature(feature, source_config, start_index + position)
+        else:
+            continue
+        normalized_features.append(normalized)
+    return normalized_features, rejected
+
+
+def iter_source_pages(source_config):
     """
-    Descarga y normaliza datos de una fuente específica.
+    Descarga y normaliza datos de una fuente específica, página por página.
+    
+    Si el servicio no existe o la descarga falla, imprime el error y termina
+    sin entregar más páginas.
+    
+    Yields:
+        list: Features GeoJSON normalizados de cada página
     """
     source_name = source_config["name"]
     url = source_config["url"]
@@ -246,83 +411,49 @@ def download_source(source_config):
         info_url = f"{base_url}?f=json"
         
         try:
-            info_response = requests.get(info_url, timeout=10)
+            info_response = http_client.get(info_url, timeout=10)
             info_response.raise_for_status()
             info_data = info_response.json()
             
             if "error" in info_data:
                 print(f"[ERROR] Servicio no encontrado: {info_data['error']}")
-                return []
+                return
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 print(f"[ERROR] URL no encontrada (404): {url}")
-                return []
+                return
             raise
         
-        # Descargar features
-        features = download_all_features(
-            url, 
+        # Descargar y normalizar cada página a medida que llega
+        downloaded = 0
+        normalized_count = 0
+        rejected = {}
+        for page in iter_feature_pages(
+            url,
             source_name,
             id_field=source_config.get("id_field"),
             label_field=source_config.get("label_field")
-        )
+        ):
+            normalized_features, page_rejected = normalize_features_batch(page, source_config, start_index=downloaded + 1)
+            downloaded += len(page)
+            normalized_count += len(normalized_features)
+            for reason, count in page_rejected.items():
+                rejected[reason] = rejected.get(reason, 0) + count
+            if normalized_features:
+                yield normalized_features
         
-        if not features:
+        if not downloaded:
             print(f"[WARNING] No se encontraron features en {source_name}")
-            return []
-        
-        # Normalizar features
-        print(f"\n[PROCESANDO] Normalizando {len(features):,} features...")
-        normalized_features = []
-        for idx, feature in enumerate(features, start=1):
-            normalized = normalize_feature(feature, source_config, idx)
-            normalized_features.append(normalized)
+            return
         
-        print(f"[OK] {len(normalized_features):,} features normalizados exitosamente")
-        return normalized_features
+        print(f"[OK] {normalized_count:,} features normalizados exitosamente")
+        if sum(rejected.values()):
+            print(f"[INFO] {sum(rejected.values()):,} features omitidos (coordenadas inválidas: {format_rejections(rejected)})")
         
     except Exception as e:
         print(f"\n[ERROR] Error procesando fuente {source_name}: {e}")
         import traceback
         traceback.print_exc()
-        return []
-
-
-def save_unified_geojson(all_features, output_file):
-    """
-    Guarda todos los features unificados en formato GeoJSON.
-    """
-    # Crear directorio si no existe
-    output_dir = os.path.dirname(output_file)
-    if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"[OK] Directorio creado: {output_dir}")
-    
-    # Convertir a formato GeoJSON
-    geojson_data = {
-        "type": "FeatureCollection",
-        "features": all_features,
-        "metadata": {
-            "total_features": len(all_features),
-            "sources": [s["name"] for s in SOURCES],
-            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-    }
-    
-    # Guardar archivo JSON
-    try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(geojson_data, f, ensure_ascii=False, indent=2)
-        
-        file_size = os.path.getsize(output_file)
-        file_size_mb = file_size / (1024 * 1024)
-        print(f"\n[OK] Archivo guardado exitosamente: {output_file}")
-        print(f"Tamaño del archivo: {file_size_mb:.2f} MB")
-        return True
-        
-    except Exception as e:
-        print(f"[ERROR] Error al guardar el archivo: {e}")
-        return False
 
 
 def main():
@@ -332,21 +463,38 @@ def main():
     print("Fuentes: Red Semafórica SIMUR + Sensores de Conteo")
     print("=" * 80 + "\n")
     
-    all_features = []
     stats = {}
+    type_counts = {}
+    metadata = {
+        "sources": [s["name"] for s in SOURCES],
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
     
-    # Procesar cada fuente
-    for source_config in SOURCES:
-        source_name = source_config["name"]
-        features = download_source(source_config)
-        
-        if features:
-            all_features.extend(features)
-            stats[source_name] = len(features)
-            print(f"\n[OK] {source_name}: {len(features):,} features agregados")
-        else:
-            stats[source_name] = 0
-            print(f"\n[WARNING] {source_name}: No se encontraron features")
+    # Cada página normalizada se escribe apenas llega; el archivo anterior se
+    # reemplaza solo al cerrar el escritor con al menos un feature
+    try:
+        with GeoJSONWriter(OUTPUT_FILE, metadata=metadata) as writer:
+            for source_config in SOURCES:
+                source_name = source_config["name"]
+                count = 0
+                for page in iter_source_pages(source_config):
+                    writer.write_all(page)
+                    count += len(page)
+                    for feature in page:
+                        source_type = feature.get("properties", {}).get("tipo", "UNKNOWN")
+                        type_counts[source_type] = type_counts.get(source_type, 0) + 1
+                
+                stats[source_name] = count
+                if count:
+                    print(f"\n[OK] {source_name}: {count:,} features agregados")
+                else:
+                    print(f"\n[WARNING] {source_name}: No se encontraron features")
+            total = writer.count
+            if not total:
+                writer.abort()
+    except Exception as e:
+        print(f"[ERROR] Error al guardar el archivo: {e}")
+        total = 0
     
     # Mostrar estadísticas
     print("\n" + "=" * 80)
@@ -355,31 +503,28 @@ def main():
     for source_name, count in stats.items():
         print(f"  {source_name}: {count:,} features")
     print("-" * 80)
-    print(f"TOTAL: {len(all_features):,} features unificados")
+    print(f"TOTAL: {total:,} features unificados")
     print("=" * 80)
     
-    # Guardar archivo unificado
-    if all_features:
-        success = save_unified_geojson(all_features, OUTPUT_FILE)
-        if success:
-            print("\n" + "=" * 80)
-            print("PROCESO COMPLETADO EXITOSAMENTE")
-            print("=" * 80)
-            print(f"Archivo guardado: {OUTPUT_FILE}")
-            print(f"Total de nodos unificados: {len(all_features):,}")
-            
-            # Estadísticas por tipo
-            print("\nDesglose por tipo:")
-            type_counts = {}
-            for feature in all_features:
-                source_type = feature.get("properties", {}).get("tipo", "UNKNOWN")
-                type_counts[source_type] = type_counts.get(source_type, 0) + 1
-            
-            for source_type, count in type_counts.items():
-                print(f"  {source_type}: {count:,} features")
-            
-            print("=" * 80 + "\n")
-            return True
+    if total:
+        file_size_mb = os.path.getsize(OUTPUT_FILE) / (1024 * 1024)
+        print(f"\n[OK] Archivo guardado exitosamente: {OUTPUT_FILE} ({total:,} features)")
+        print(f"Tamaño del archivo: {file_size_mb:.2f} MB")
+        refresh_derivatives(OUTPUT_FILE, columnar=WRITE_COLUMNAR, tiles=WRITE_TILES)
+        
+        print("\n" + "=" * 80)
+        print("PROCESO COMPLETADO EXITOSAMENTE")
+        print("=" * 80)
+        print(f"Archivo guardado: {OUTPUT_FILE}")
+        print(f"Total de nodos unificados: {total:,}")
+        
+        # Estadísticas por tipo
+        print("\nDesglose por tipo:")
+        for source_type, count in type_counts.items():
+            print(f"  {source_type}: {count:,} features")
+        
+        print("=" * 80 + "\n")
+        return True
     
     print("\n" + "=" * 80)
     print("EL PROCESO TERMINÓ CON ERRORES O SIN DATOS")
@@ -1,15 +1,85 @@
 """
 Script para filtrar solo nodos de Bogotá
-Elimina los datos de Medellín (Socrata) y conserva solo Red Semafórica SIMUR y Sensores de Velocidad
+Conserva los nodos que caen dentro de alguna localidad de Bogotá (punto en
+polígono contra data/zonas/localidades_bogota.geojson o, si falta, la copia
+versionada server/data/zonas/localidades_bogota_simplificado.geojson) y les
+agrega localidad_codigo, localidad, upz_codigo y upz para cruzar con
+localidades/upz de la BD. Sin ningún archivo de localidades filtra por origen:
+conserva solo Red Semafórica SIMUR y Sensores de Velocidad (elimina
+Socrata/Medellín).
 """
 
-import json
 import os
+import time
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+from geojson_io import GeoJSONWriter, iter_features
+from nodos_publish import publish_nodes, refresh_derivatives
+from zonas_bogota import BUNDLED_LOCALIDADES_FILE, LOCALIDADES_FILE, ZonasBogota, find_localidades_file, load_zonas
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 INPUT_FILE = str(PROJECT_ROOT / "src" / "data" / "nodos_unificados.json")
 OUTPUT_FILE = str(PROJECT_ROOT / "src" / "data" / "nodos_unificados.json")
+BOGOTA_ORIGINS = ('Red_Semaforica_SIMUR', 'Sensores_Velocidad')  # Respaldo si no hay polígonos
+
+
+def load_bogota_boundary() -> Optional[ZonasBogota]:
+    """Carga los polígonos de localidades/UPZ informando qué filtro se usará."""
+    localidades_file = find_localidades_file()
+    zonas = load_zonas(localidades_file) if localidades_file else None
+    if zonas:
+        print(f"[OK] Límite de Bogotá: {len(zonas.localidades.polygons):,} polígonos de localidades"
+              + (f", {len(zonas.upz.polygons):,} de UPZ" if zonas.upz else " (sin archivo de UPZ)"))
+        print(f"[INFO] Localidades desde: {localidades_file}")
+    else:
+        print(f"[WARNING] No se encontró {LOCALIDADES_FILE} ni {BUNDLED_LOCALIDADES_FILE}; "
+              f"se filtra por origen ({', '.join(BOGOTA_ORIGINS)})")
+        print("          Coloca data/zonas/localidades_bogota.geojson (ver server/scripts/etl_zonas_ideca.js)")
+        print("          y versiona la copia simplificada con: python scripts/python/zonas_bogota.py --bundle")
+    return zonas
+
+
+def new_filter_stats() -> Dict:
+    """Contadores que llena filter_bogota_features."""
+    return {'before': {}, 'after': {}, 'localidades': {}, 'removed': 0}
+
+
+def filter_bogota_features(features: Iterable[Dict], zonas: Optional[ZonasBogota], stats: Dict) -> Iterator[Dict]:
+    """
+    Deja pasar solo los features de Bogotá, de a uno.
+    
+    Con zonas: punto en polígono de localidades, etiquetando localidad y UPZ.
+    Sin zonas: por origen (BOGOTA_ORIGINS).
+    
+    Args:
+        features: Iterable de features
+        zonas: Índice de localidades/UPZ (load_zonas) o None
+        stats: Dict de new_filter_stats(); se actualiza a medida que se consume
+    """
+    for feature in features:
+        properties = feature.get('properties', {})
+        origen = properties.get('origen', '')
+        stats['before'][origen or 'UNKNOWN'] = stats['before'].get(origen or 'UNKNOWN', 0) + 1
+        
+        if zonas:
+            geometry = feature.get('geometry') or {}
+            point = geometry.get('coordinates') if geometry.get('type') == 'Point' else None
+            zona = zonas.locate(float(point[0]), float(point[1])) if point and len(point) >= 2 else None
+            keep = zona is not None
+            if keep:
+                properties.update(zona)
+                localidad = zona['localidad'] or 'SIN NOMBRE'
+                stats['localidades'][localidad] = stats['localidades'].get(localidad, 0) + 1
+        else:
+            keep = origen in BOGOTA_ORIGINS
+        
+        if keep:
+            stats['after'][origen] = stats['after'].get(origen, 0) + 1
+            yield feature
+        else:
+            stats['removed'] += 1
+
 
 def main():
     print("\n" + "=" * 80)
@@ -21,80 +91,59 @@ def main():
         print(f"[ERROR] Archivo no encontrado: {INPUT_FILE}")
         return False
     
-    print(f"[INFO] Cargando archivo: {INPUT_FILE}")
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Límite de Bogotá: polígonos de localidades (y UPZ para etiquetar)
+    zonas = load_bogota_boundary()
     
-    if data.get('type') != 'FeatureCollection' or 'features' not in data:
-        print(f"[ERROR] Formato de archivo inválido")
-        return False
+    # Se lee y escribe de a un feature: la memoria no depende del tamaño del archivo.
+    # El archivo de salida puede ser el mismo de entrada porque se reemplaza al final.
+    print(f"[INFO] Filtrando archivo: {INPUT_FILE}")
+    stats = new_filter_stats()
     
-    all_features = data['features']
-    print(f"[OK] Archivo cargado: {len(all_features):,} features totales\n")
+    try:
+        with GeoJSONWriter(OUTPUT_FILE, metadata={}) as writer:
+            writer.write_all(filter_bogota_features(iter_features(INPUT_FILE), zonas, stats))
+            origin_counts_before = stats['before']
+            origin_counts_after = stats['after']
+            localidad_counts = stats['localidades']
+            removed_count = stats['removed']
+            
+            # Actualizar metadata (total_features lo completa el writer)
+            writer.metadata = {
+                "sources": list(origin_counts_after.keys()),
+                "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "filtered": True,
+                "filter": "localidades" if zonas else "origen",
+                "note": ("Solo nodos dentro de localidades de Bogotá" if zonas
+                         else "Solo datos de Bogotá (excluye Medellín/Socrata)")
+            }
+    except ValueError as e:
+        print(f"[ERROR] Formato de archivo inválido: {e}")
+        return False
     
-    # Contar por origen antes de filtrar
-    origin_counts_before = {}
-    for feature in all_features:
-        origen = feature.get('properties', {}).get('origen', 'UNKNOWN')
-        origin_counts_before[origen] = origin_counts_before.get(origen, 0) + 1
+    kept_count = writer.count
+    print(f"[OK] Archivo procesado: {kept_count + removed_count:,} features totales\n")
     
     print("Estadísticas ANTES del filtrado:")
     for origen, count in sorted(origin_counts_before.items()):
         print(f"  {origen}: {count:,} nodos")
     print()
     
-    # Filtrar: mantener solo Red_Semaforica_SIMUR y Sensores_Velocidad
-    # Eliminar Socrata_Estudios (que son de Medellín)
-    filtered_features = []
-    removed_count = 0
-    
-    for feature in all_features:
-        origen = feature.get('properties', {}).get('origen', '')
-        
-        # Mantener solo datos de Bogotá
-        if origen in ['Red_Semaforica_SIMUR', 'Sensores_Velocidad']:
-            filtered_features.append(feature)
-        else:
-            removed_count += 1
-    
     print("=" * 80)
     print("RESULTADO DEL FILTRADO")
     print("=" * 80)
-    print(f"Nodos eliminados (Medellín/Socrata): {removed_count:,}")
-    print(f"Nodos conservados (Bogotá): {len(filtered_features):,}\n")
-    
-    # Contar por origen después de filtrar
-    origin_counts_after = {}
-    for feature in filtered_features:
-        origen = feature.get('properties', {}).get('origen', 'UNKNOWN')
-        origin_counts_after[origen] = origin_counts_after.get(origen, 0) + 1
+    print(f"Nodos eliminados ({'fuera de Bogotá' if zonas else 'Medellín/Socrata'}): {removed_count:,}")
+    print(f"Nodos conservados (Bogotá): {kept_count:,}\n")
     
     print("Estadísticas DESPUÉS del filtrado:")
     for origen, count in sorted(origin_counts_after.items()):
         print(f"  {origen}: {count:,} nodos")
     print()
     
-    # Actualizar metadata
-    import time
-    metadata = {
-        "total_features": len(filtered_features),
-        "sources": list(origin_counts_after.keys()),
-        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "filtered": True,
-        "note": "Solo datos de Bogotá (excluye Medellín/Socrata)"
-    }
-    
-    # Crear nuevo GeoJSON
-    geojson_data = {
-        "type": "FeatureCollection",
-        "features": filtered_features,
-        "metadata": metadata
-    }
-    
-    # Guardar archivo actualizado
-    print("[INFO] Guardando archivo actualizado...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(geojson_data, f, ensure_ascii=False, indent=2)
+    if localidad_counts:
+        print("Nodos por localidad:")
+        for localidad, count in sorted(localidad_counts.items()):
+            print(f"  {localidad}: {count:,} nodos")
+        print()
     
     file_size = os.path.getsize(OUTPUT_FILE)
     file_size_mb = file_size / (1024 * 1024)
@@ -102,17 +151,14 @@ def main():
     print(f"[OK] Archivo guardado: {OUTPUT_FILE}")
     print(f"Tamaño del archivo: {file_size_mb:.2f} MB")
     
-    # Copiar a public/data también
-    public_file = PROJECT_ROOT / "public" / "data" / "nodos_unificados.json"
-    public_file.parent.mkdir(parents=True, exist_ok=True)
-    import shutil
-    shutil.copy2(OUTPUT_FILE, str(public_file))
-    print(f"[OK] Archivo copiado a: {public_file}")
+    # Derivados del archivo filtrado y publicación en public/data
+    refresh_derivatives(OUTPUT_FILE)
+    publish_nodes(OUTPUT_FILE)
     
     print("\n" + "=" * 80)
     print("FILTRADO COMPLETADO EXITOSAMENTE")
     print("=" * 80)
-    print(f"Total de nodos de Bogotá: {len(filtered_features):,}")
+    print(f"Total de nodos de Bogotá: {kept_count:,}")
     print("=" * 80 + "\n")
     
     return True
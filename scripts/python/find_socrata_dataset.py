@@ -1,7 +1,8 @@
 """Script para buscar el dataset de volúmenes vehiculares en datos.gov.co"""
-import requests
 import json
 
+import http_client
+
 print("Buscando datasets de volúmenes vehiculares en datos.gov.co...\n")
 
 # Buscar datasets
@@ -16,7 +17,7 @@ for query in search_queries:
     print(f"Buscando: '{query}'")
     try:
         url = f"https://www.datos.gov.co/api/views.json?q={query.replace(' ', '+')}&$limit=5"
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url, timeout=10)
         if response.ok:
             data = response.json()
             if data:
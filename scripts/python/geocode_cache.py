@@ -0,0 +1,121 @@
+"""
+Caché persistente de geocodificación en SQLite.
+
+geocode_missing_nodes.py consultaba ArcGIS y Nominatim por cada nodo en cada
+corrida; el registro de progreso solo recuerda ids procesados, no resultados.
+Esta caché guarda cada consulta en data/geocode_cache.sqlite (local, no
+versionado; ver docs/DATA_POLICY.md) indexada por la dirección normalizada
+(normalize_address_for_geocoding), así que nodos de la misma intersección
+comparten la entrada.
+
+- Resultado positivo: proveedor, score, coordenadas y dirección; TTL_FOUND.
+- Sin resultado: se guarda como negativo con un TTL más corto (TTL_NOT_FOUND)
+  para volver a intentarlo más adelante.
+- Errores de red no se guardan.
+
+Uso:
+    from geocode_cache import GeocodeCache
+
+    with GeocodeCache() as cache:
+        hit, result = cache.get(key)
+        if not hit:
+            result = ...
+            cache.put(key, result, provider='arcgis')
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CACHE_FILE = os.environ.get('GEOCODE_CACHE_FILE') or str(PROJECT_ROOT / 'data' / 'geocode_cache.sqlite')
+
+TTL_FOUND = 180 * 24 * 3600  # Las intersecciones no se mueven: medio año
+TTL_NOT_FOUND = 7 * 24 * 3600  # Negativos: reintentar en una semana
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    address_key TEXT PRIMARY KEY,
+    found       INTEGER NOT NULL,
+    provider    TEXT,
+    lat         REAL,
+    lng         REAL,
+    score       REAL,
+    address     TEXT,
+    fetched_at  REAL NOT NULL
+)
+"""
+
+
+class GeocodeCache:
+    """
+    Caché SQLite de resultados de geocodificación, segura entre hilos.
+
+    Args:
+        path: Archivo SQLite (CACHE_FILE por defecto)
+        ttl_found: Vigencia de resultados positivos (segundos)
+        ttl_not_found: Vigencia de resultados negativos (segundos)
+    """
+
+    def __init__(self, path: str = CACHE_FILE, ttl_found: float = TTL_FOUND, ttl_not_found: float = TTL_NOT_FOUND):
+        self.path = path
+        self.ttl_found = ttl_found
+        self.ttl_not_found = ttl_not_found
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, key: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Busca una dirección normalizada.
+
+        Returns:
+            tuple: (hay entrada vigente, resultado o None si la entrada es negativa)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT found, provider, lat, lng, score, address, fetched_at FROM geocode WHERE address_key = ?",
+                (key,)
+            ).fetchone()
+            fresh = row is not None and time.time() - row[6] < (self.ttl_found if row[0] else self.ttl_not_found)
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if not fresh:
+            return False, None
+        found, provider, lat, lng, score, address, _ = row
+        if not found:
+            return True, None
+        return True, {'lat': lat, 'lng': lng, 'score': score, 'address': address, 'provider': provider}
+
+    def put(self, key: str, result: Optional[Dict], provider: Optional[str] = None) -> None:
+        """Guarda un resultado (o un negativo si result es None)."""
+        if result:
+            values = (key, 1, provider or result.get('provider'), result.get('lat'), result.get('lng'),
+                      result.get('score'), result.get('address'), time.time())
+        else:
+            values = (key, 0, None, None, None, None, None, time.time())
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "GeocodeCache":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
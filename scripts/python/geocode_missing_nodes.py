@@ -5,11 +5,33 @@ y agregarlos al mapa
 import json
 import os
 import time
-import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+import http_client
+from http_client import TokenBucket
+from geocode_cache import GeocodeCache
+from geojson_io import GeoJSONWriter, iter_features, link_or_copy
+from intersecciones import IntersectionIndex
+from nodos_merge import source_ids
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Presupuesto por proveedor: (peticiones por segundo, ráfaga máxima)
+PROVIDER_RATES = {
+    'arcgis': (5.0, 5),
+    'nominatim': (1.0, 1),  # Política de uso de Nominatim: máximo 1 petición por segundo
+}
+GEOCODE_WORKERS = 8  # Consultas a ArcGIS en vuelo a la vez (Nominatim tiene una cola de un solo hilo)
+ARCGIS_FIND_URL = "https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/findAddressCandidates"
+ARCGIS_BATCH_URL = "https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/geocodeAddresses"
+ARCGIS_TOKEN = os.environ.get('GEOCODING_ARCGIS_TOKEN')  # geocodeAddresses exige token; sin él no hay lote
+ARCGIS_BATCH_SIZE = 150  # Direcciones por petición geocodeAddresses (SuggestedBatchSize del servicio World)
+ARCGIS_MIN_SCORE = 70  # Score mínimo aceptado de ArcGIS
+OVERLAY_FILE = str(PROJECT_ROOT / 'src' / 'data' / 'nodos_geocodificados.json')  # Nodos agregados por este script
+PUBLIC_OVERLAY_FILE = str(PROJECT_ROOT / 'public' / 'data' / 'nodos_geocodificados.json')
+PROGRESS_FILE = str(PROJECT_ROOT / 'geocode_progress.log')  # Un node_id procesado por línea
 
 def normalize_address_for_geocoding(address: str) -> str:
     """Normaliza una dirección para geocodificación"""
@@ -46,10 +68,17 @@ def normalize_address_for_geocoding(address: str) -> str:
     
     return normalized
 
-def geocode_with_arcgis(address: str) -> Optional[Dict]:
-    """Geocodifica una dirección usando ArcGIS"""
+def geocode_with_arcgis(address: str, raise_errors: bool = False,
+                        limiter: Optional[TokenBucket] = None) -> Optional[Dict]:
+    """
+    Geocodifica una dirección usando ArcGIS.
+    
+    Con raise_errors=True los errores de red/HTTP se propagan en lugar de
+    devolver None, para no confundirlos con "sin resultado". Con limiter, cada
+    intento (reintentos incluidos) toma una ficha del token bucket.
+    """
     try:
-        geocode_url = "https://geocode.arcgis.com/arcgis/rest/services/World/GeocodeServer/findAddressCandidates"
+        geocode_url = ARCGIS_FIND_URL
         
         params = {
             "f": "json",
@@ -59,9 +88,11 @@ def geocode_with_arcgis(address: str) -> Optional[Dict]:
             "outSR": "4326"
         }
         
-        response = requests.get(geocode_url, params=params, timeout=10)
+        response = http_client.get(geocode_url, params=params, timeout=10, limiter=limiter)
         
         if not response.ok:
+            if raise_errors:
+                response.raise_for_status()
             return None
         
         data = response.json()
@@ -70,8 +101,8 @@ def geocode_with_arcgis(address: str) -> Optional[Dict]:
             candidate = data["candidates"][0]
             location = candidate.get("location", {})
             
-            # Solo aceptar si el score es razonable (> 70)
-            if candidate.get("score", 0) >= 70:
+            # Solo aceptar si el score es razonable (>= ARCGIS_MIN_SCORE)
+            if candidate.get("score", 0) >= ARCGIS_MIN_SCORE:
                 return {
                     "lat": location.get("y"),
                     "lng": location.get("x"),
@@ -81,11 +112,14 @@ def geocode_with_arcgis(address: str) -> Optional[Dict]:
         
         return None
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"  [ERROR] Error geocodificando '{address}': {e}")
         return None
 
-def geocode_with_nominatim(address: str) -> Optional[Dict]:
-    """Geocodifica usando Nominatim (OpenStreetMap) como respaldo"""
+def geocode_with_nominatim(address: str, raise_errors: bool = False,
+                           limiter: Optional[TokenBucket] = None) -> Optional[Dict]:
+    """Geocodifica usando Nominatim (OpenStreetMap) como respaldo (raise_errors y limiter: ver geocode_with_arcgis)"""
     try:
         url = "https://nominatim.openstreetmap.org/search"
         params = {
@@ -100,9 +134,11 @@ def geocode_with_nominatim(address: str) -> Optional[Dict]:
             "User-Agent": "PanoramaIngenieria/1.0"
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10, limiter=limiter)
         
         if not response.ok:
+            if raise_errors:
+                response.raise_for_status()
             return None
         
         data = response.json()
@@ -118,53 +154,161 @@ def geocode_with_nominatim(address: str) -> Optional[Dict]:
         
         return None
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"  [ERROR] Error con Nominatim para '{address}': {e}")
         return None
 
-def geocode_address(address: str, use_backup: bool = True) -> Optional[Dict]:
-    """Geocodifica una dirección usando múltiples servicios"""
-    normalized = normalize_address_for_geocoding(address)
+def geocode_batch_with_arcgis(addresses: List[str], limiter: Optional[TokenBucket] = None) -> Dict[int, Dict]:
+    """
+    Geocodifica varias direcciones en una sola petición geocodeAddresses de ArcGIS.
     
-    # Intentar con ArcGIS primero
-    result = geocode_with_arcgis(normalized)
+    Los errores de red/HTTP se propagan (para reintentar dirección por dirección).
+    Con limiter, cada intento toma una ficha del token bucket.
     
-    if result:
-        return result
+    Returns:
+        dict: índice en addresses -> resultado, solo para las que superan ARCGIS_MIN_SCORE
+    """
+    records = [{"attributes": {"OBJECTID": i, "SingleLine": address}} for i, address in enumerate(addresses)]
+    data = {
+        "f": "json",
+        "addresses": json.dumps({"records": records}),
+        "sourceCountry": "CO",
+        "outSR": "4326",
+        "token": ARCGIS_TOKEN,
+    }
+    response = http_client.post(ARCGIS_BATCH_URL, data=data, timeout=120, limiter=limiter)
+    response.raise_for_status()
+    payload = response.json()
+    if 'error' in payload:
+        raise RuntimeError(f"geocodeAddresses: {payload['error'].get('message')}")
     
-    # Si falla y se permite respaldo, usar Nominatim
-    if use_backup:
-        result = geocode_with_nominatim(normalized)
-        if result:
-            return result
+    results = {}
+    for location in payload.get('locations') or []:
+        attributes = location.get('attributes') or {}
+        index = attributes.get('ResultID')
+        point = location.get('location') or {}
+        score = location.get('score') or attributes.get('Score') or 0
+        if index is None or point.get('x') is None or score < ARCGIS_MIN_SCORE:
+            continue
+        results[int(index)] = {
+            "lat": point.get('y'),
+            "lng": point.get('x'),
+            "score": score,
+            "address": location.get('address') or addresses[int(index)],
+            "provider": 'arcgis',
+        }
+    return results
+
+def geocode_nodes_in_batches(nodes: List[Dict], cache: GeocodeCache,
+                             limiters: Dict[str, TokenBucket]) -> Tuple[List[Tuple[Dict, Optional[Dict]]], List[Dict]]:
+    """
+    Resuelve nodos por lotes de ARCGIS_BATCH_SIZE direcciones (normalizadas y sin repetir).
     
-    return None
+    Returns:
+        tuple: ([(nodo, resultado o None)] resueltos por caché o lote,
+                nodos pendientes para la consulta individual, con 'skip_arcgis'
+                si ArcGIS ya respondió sin coincidencia)
+    """
+    resolved = []
+    by_address: Dict[str, List[Dict]] = {}
+    for node_info in nodes:
+        normalized = normalize_address_for_geocoding(node_info['address'])
+        hit, result = cache.get(normalized)
+        if hit:
+            resolved.append((node_info, result))
+        else:
+            by_address.setdefault(normalized, []).append(node_info)
+    
+    pending = []
+    addresses = list(by_address)
+    total_batches = (len(addresses) + ARCGIS_BATCH_SIZE - 1) // ARCGIS_BATCH_SIZE
+    for batch_idx in range(0, len(addresses), ARCGIS_BATCH_SIZE):
+        batch = addresses[batch_idx:batch_idx + ARCGIS_BATCH_SIZE]
+        try:
+            results = geocode_batch_with_arcgis(batch, limiter=limiters['arcgis'])
+        except Exception as e:
+            # El lote falló: sus direcciones se reintentan una por una
+            print(f"   [WARNING] Lote ArcGIS {batch_idx // ARCGIS_BATCH_SIZE + 1}/{total_batches} falló: {e}")
+            pending.extend(node_info for address in batch for node_info in by_address[address])
+            continue
+        for i, address in enumerate(batch):
+            result = results.get(i)
+            if result:
+                cache.put(address, result, 'arcgis')
+                resolved.extend((node_info, result) for node_info in by_address[address])
+            else:
+                pending.extend({**node_info, 'skip_arcgis': True} for node_info in by_address[address])
+        print(f"   [OK] Lote ArcGIS {batch_idx // ARCGIS_BATCH_SIZE + 1}/{total_batches}: "
+              f"{len(results)}/{len(batch)} direcciones ubicadas")
+    return resolved, pending
 
-def main():
-    print("=" * 80)
-    print("GEOCODIFICACION DE NODOS FALTANTES DEL DICCIONARIO DE ESTUDIOS")
-    print("=" * 80)
+def new_rate_limiters() -> Dict[str, TokenBucket]:
+    """Un token bucket por proveedor según PROVIDER_RATES."""
+    return {provider: TokenBucket(rate, burst) for provider, (rate, burst) in PROVIDER_RATES.items()}
+
+def geocode_with_provider(provider: str, normalized: str,
+                          limiters: Optional[Dict[str, TokenBucket]] = None) -> Tuple[Optional[Dict], bool]:
+    """
+    Consulta un proveedor ('arcgis' o 'nominatim') con su token bucket.
     
-    # Cargar diccionario de estudios
-    studies_path = PROJECT_ROOT / 'src' / 'data' / 'studies_dictionary.json'
-    print("\n[1/5] Cargando diccionario de estudios...")
-    with open(studies_path, 'r', encoding='utf-8') as f:
-        studies_dict = json.load(f)
+    Returns:
+        tuple: (resultado con 'provider' o None, True si falló por red/HTTP)
+    """
+    geocode = geocode_with_arcgis if provider == 'arcgis' else geocode_with_nominatim
+    try:
+        result = geocode(normalized, raise_errors=True, limiter=(limiters or {}).get(provider))
+    except Exception as e:
+        print(f"  [ERROR] Error con {provider} para '{normalized}': {e}")
+        return None, True
+    if result:
+        result['provider'] = provider
+    return result, False
+
+def geocode_address(address: str, use_backup: bool = True,
+                    cache: Optional[GeocodeCache] = None,
+                    limiters: Optional[Dict[str, TokenBucket]] = None,
+                    skip_arcgis: bool = False, cache_checked: bool = False) -> Optional[Dict]:
+    """
+    Geocodifica una dirección usando múltiples servicios, uno tras otro.
     
-    studies_nodes = studies_dict['nodes']
-    print(f"   [OK] {len(studies_nodes)} nodos en diccionario")
+    Con cache, la dirección normalizada se busca primero en la caché SQLite y
+    el resultado (o la ausencia de resultado) se guarda; si algún servicio
+    falló por red no se guarda el negativo. Con limiters, cada intento a un
+    proveedor (reintentos incluidos) espera una ficha de su token bucket.
+    skip_arcgis pasa directo al respaldo (ArcGIS ya respondió sin coincidencia
+    en un lote). cache_checked indica que quien llama ya buscó la dirección en
+    la caché sin éxito: no se vuelve a buscar (ni a contar como fallo de caché).
     
-    # Cargar nodos del mapa
-    nodos_path = PROJECT_ROOT / 'src' / 'data' / 'nodos_unificados.json'
-    print("\n[2/5] Cargando nodos del mapa...")
-    with open(nodos_path, 'r', encoding='utf-8') as f:
-        map_data = json.load(f)
+    geocode_nodes no la usa para no bloquear ArcGIS con la espera de Nominatim
+    (ver geocode_nodes).
+    """
+    normalized = normalize_address_for_geocoding(address)
+    if cache is not None and not cache_checked:
+        hit, result = cache.get(normalized)
+        if hit:
+            return result
     
-    map_features = map_data['features']
-    map_node_ids = {f['properties']['id'] for f in map_features}
-    print(f"   [OK] {len(map_features)} nodos en el mapa")
+    # ArcGIS primero; si falla y se permite respaldo, Nominatim
+    providers = [] if skip_arcgis else ['arcgis']
+    if use_backup:
+        providers.append('nominatim')
     
-    # Identificar nodos faltantes
-    print("\n[3/5] Identificando nodos faltantes...")
+    had_errors = False
+    for provider in providers:
+        result, failed = geocode_with_provider(provider, normalized, limiters)
+        had_errors = had_errors or failed
+        if result:
+            if cache is not None:
+                cache.put(normalized, result, provider)
+            return result
+    
+    if cache is not None and not had_errors:
+        cache.put(normalized, None)
+    return None
+
+def find_missing_nodes(studies_nodes: Dict, map_node_ids: Set[str]) -> List[Dict]:
+    """Nodos del diccionario con dirección que no están en el mapa."""
     missing_nodes = []
     
     for node_id, node_data in studies_nodes.items():
@@ -181,128 +325,267 @@ def main():
                 'node_data': node_data
             })
     
-    print(f"   [OK] {len(missing_nodes)} nodos faltantes identificados")
+    return missing_nodes
+
+def geocode_nodes(missing_nodes: List[Dict], progress_file: str,
+                  local_index: Optional[IntersectionIndex] = None) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    Geocodifica los nodos faltantes en paralelo, retomando el progreso guardado.
     
-    if len(missing_nodes) == 0:
-        print("\n[INFO] No hay nodos faltantes. Todos los nodos ya están en el mapa.")
-        return
+    El progreso es un registro de solo agregar (progress_file, un node_id por
+    línea, escrito al procesar cada nodo): guardarlo cuesta O(1) por nodo.
     
-    # Geocodificar nodos faltantes (procesar en lotes para no saturar)
-    print(f"\n[4/5] Geocodificando nodos faltantes...")
-    print(f"   [INFO] Procesando {len(missing_nodes)} nodos (esto puede tomar varios minutos)...")
-    print(f"   [INFO] Procesando en lotes de 5 con delay de 1 segundo entre requests...")
+    Con local_index, las intersecciones que coinciden con un nodo ya
+    georreferenciado (ver intersecciones.py) se resuelven primero, sin red;
+    solo el resto pasa a los servicios remotos. Con GEOCODING_ARCGIS_TOKEN,
+    ArcGIS se consulta por lotes (geocodeAddresses) y la consulta individual
+    queda para reintentos y para el respaldo de Nominatim.
     
+    GEOCODE_WORKERS hilos consultan ArcGIS; las direcciones sin coincidencia
+    pasan a una cola de Nominatim atendida por un solo hilo, así que ningún
+    hilo de ArcGIS queda esperando el turno de Nominatim (1/s). Cada proveedor
+    tiene su propio presupuesto (PROVIDER_RATES) y cada intento, reintentos
+    incluidos, toma una ficha de él. Las direcciones ya consultadas salen de la
+    caché persistente (data/geocode_cache.sqlite, ver geocode_cache.py) sin
+    red ni espera.
+    
+    Returns:
+        tuple: (geocodificados, fallidos, pendientes que se procesaron o
+                recuperaron en esta corrida)
+    """
     geocoded_nodes = []
     failed_nodes = []
     
-    batch_size = 5
-    total_batches = (len(missing_nodes) + batch_size - 1) // batch_size
-    
     # Verificar si hay un archivo de progreso guardado (en raíz del proyecto)
-    progress_file = str(PROJECT_ROOT / 'geocode_progress.json')
     processed_ids = set()
     
     if os.path.exists(progress_file):
-        try:
-            with open(progress_file, 'r', encoding='utf-8') as f:
-                progress_data = json.load(f)
-                processed_ids = set(progress_data.get('processed_ids', []))
-            print(f"   [INFO] Continuando desde progreso guardado: {len(processed_ids)} nodos ya procesados")
-        except:
-            print(f"   [INFO] No se pudo cargar progreso, comenzando desde cero")
+        with open(progress_file, 'r', encoding='utf-8') as f:
+            processed_ids = {line.strip() for line in f if line.strip()}
+        print(f"   [INFO] Continuando desde progreso guardado: {len(processed_ids)} nodos ya procesados")
     
     # Filtrar nodos ya procesados
+    resumed_nodes = [n for n in missing_nodes if n['node_id'] in processed_ids]
     missing_nodes = [n for n in missing_nodes if n['node_id'] not in processed_ids]
     print(f"   [INFO] Nodos pendientes de procesar: {len(missing_nodes)}")
     
-    for batch_idx in range(0, len(missing_nodes), batch_size):
-        batch = missing_nodes[batch_idx:batch_idx + batch_size]
-        current_batch = (batch_idx // batch_size) + 1
-        total_batches_actual = (len(missing_nodes) + batch_size - 1) // batch_size
+    remote_nodes = missing_nodes
+    if local_index is not None:
+        remote_nodes = []
+        for node_info in missing_nodes:
+            result = local_index.lookup(node_info['address'])
+            if result:
+                geocoded_nodes.append({**node_info, 'coordinates': result})
+            else:
+                remote_nodes.append(node_info)
+        print(f"   [OK] {len(geocoded_nodes)} nodos ubicados localmente por intersección "
+              f"({len(local_index)} intersecciones indexadas); {len(remote_nodes)} van a los servicios remotos")
+    
+    cache = GeocodeCache()
+    limiters = new_rate_limiters()
+    start = time.perf_counter()
+    progress_log = open(progress_file, 'a', encoding='utf-8')
+    
+    def mark_processed(node_id: str) -> None:
+        processed_ids.add(node_id)
+        progress_log.write(f"{node_id}\n")
+        progress_log.flush()
+    
+    for node_info in geocoded_nodes:
+        mark_processed(node_info['node_id'])  # Resueltos localmente
+    
+    # Los ya procesados en una corrida interrumpida se recuperan sin red (índice
+    # local o caché) para no perder sus coordenadas; los fallidos no se reintentan
+    recovered_nodes = []
+    for node_info in resumed_nodes:
+        result = local_index.lookup(node_info['address']) if local_index is not None else None
+        if not result:
+            _, result = cache.get(normalize_address_for_geocoding(node_info['address']))
+        if result:
+            recovered_nodes.append({**node_info, 'coordinates': result})
+    if resumed_nodes:
+        print(f"   [INFO] {len(recovered_nodes)} de {len(resumed_nodes)} nodos ya procesados recuperados de la caché")
+    geocoded_nodes.extend(recovered_nodes)
+    
+    # Los nodos que pasan por el lote ya se buscaron en la caché
+    cache_checked = False
+    try:
+        if ARCGIS_TOKEN and remote_nodes:
+            print(f"   [INFO] ArcGIS por lotes de {ARCGIS_BATCH_SIZE} direcciones (geocodeAddresses)")
+            resolved, remote_nodes = geocode_nodes_in_batches(remote_nodes, cache, limiters)
+            cache_checked = True
+            for node_info, result in resolved:
+                if result:
+                    geocoded_nodes.append({**node_info, 'coordinates': result})
+                else:
+                    failed_nodes.append(node_info)
+                mark_processed(node_info['node_id'])
+            print(f"   [INFO] {len(resolved)} nodos resueltos por caché o lote; {len(remote_nodes)} a consulta individual")
         
-        print(f"\n   Lote {current_batch}/{total_batches_actual} ({batch_idx + 1}-{min(batch_idx + batch_size, len(missing_nodes))} de {len(missing_nodes)})...")
+        def try_arcgis(node_info: Dict) -> Tuple[Optional[Dict], Optional[bool]]:
+            # (resultado, None) si quedó resuelto; (None, hubo error) si pasa a Nominatim
+            normalized = normalize_address_for_geocoding(node_info['address'])
+            if not cache_checked:
+                hit, result = cache.get(normalized)
+                if hit:
+                    return result, None
+            if node_info.pop('skip_arcgis', False):
+                return None, False
+            result, had_errors = geocode_with_provider('arcgis', normalized, limiters)
+            if result:
+                cache.put(normalized, result, 'arcgis')
+                return result, None
+            return None, had_errors
         
-        for node_info in batch:
-            node_id = node_info['node_id']
-            address = node_info['address']
-            
-            print(f"      [{len(geocoded_nodes) + len(failed_nodes) + 1}/{len(missing_nodes)}] Nodo {node_id}...", end=" ", flush=True)
-            
-            result = geocode_address(address)
-            
+        def try_nominatim(node_info: Dict, arcgis_errors: bool) -> Tuple[Optional[Dict], Optional[bool]]:
+            normalized = normalize_address_for_geocoding(node_info['address'])
+            result, had_errors = geocode_with_provider('nominatim', normalized, limiters)
             if result:
-                geocoded_nodes.append({
-                    **node_info,
-                    'coordinates': result
-                })
-                processed_ids.add(node_id)
-                print(f"[OK]")
-            else:
-                failed_nodes.append(node_info)
-                processed_ids.add(node_id)  # Marcar como procesado aunque haya fallado
-                print("[FAILED]")
-            
-            # Guardar progreso cada 10 nodos
-            if (len(geocoded_nodes) + len(failed_nodes)) % 10 == 0:
-                with open(progress_file, 'w', encoding='utf-8') as f:
-                    json.dump({'processed_ids': list(processed_ids)}, f, indent=2)
-            
-            # Delay para no saturar los servicios
-            time.sleep(1.0)
+                cache.put(normalized, result, 'nominatim')
+            elif not (arcgis_errors or had_errors):
+                cache.put(normalized, None)
+            return result, None
+        
+        rates = ', '.join(f"{provider} {rate:g}/s" for provider, (rate, _) in PROVIDER_RATES.items())
+        print(f"   [INFO] {GEOCODE_WORKERS} consultas a ArcGIS en paralelo y una cola de Nominatim ({rates})")
+        done = len(geocoded_nodes) + len(failed_nodes) - len(recovered_nodes)
+        with ThreadPoolExecutor(max_workers=GEOCODE_WORKERS) as arcgis_pool, \
+                ThreadPoolExecutor(max_workers=1) as nominatim_queue:
+            futures = {arcgis_pool.submit(try_arcgis, node_info): node_info for node_info in remote_nodes}
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node_info = futures.pop(future)
+                    result, arcgis_errors = future.result()
+                    if arcgis_errors is not None:
+                        futures[nominatim_queue.submit(try_nominatim, node_info, arcgis_errors)] = node_info
+                        continue
+                    node_id = node_info['node_id']
+                    done += 1
+                    
+                    if result:
+                        geocoded_nodes.append({
+                            **node_info,
+                            'coordinates': result
+                        })
+                        print(f"      [{done}/{len(missing_nodes)}] Nodo {node_id}... [OK]")
+                    else:
+                        failed_nodes.append(node_info)
+                        print(f"      [{done}/{len(missing_nodes)}] Nodo {node_id}... [FAILED]")
+                    mark_processed(node_id)  # Marcar como procesado aunque haya fallado
+    finally:
+        cache.close()
+        progress_log.close()
+    
+    elapsed = time.perf_counter() - start
+    done = len(geocoded_nodes) + len(failed_nodes)
+    print(f"\n   [INFO] {done} nodos en {elapsed:.1f} s ({done / elapsed if elapsed else 0:.1f} nodos/s); "
+          f"caché: {cache.hits} aciertos, {cache.misses} consultas a los servicios")
+    return geocoded_nodes, failed_nodes, missing_nodes + recovered_nodes
+
+def build_geocoded_feature(node_info: Dict) -> Dict:
+    """Feature GeoJSON de un nodo geocodificado."""
+    node_id = node_info['node_id']
+    coords = node_info['coordinates']
+    node_data = node_info['node_data']
+    
+    return {
+        "type": "Feature",
+        "geometry": {
+            "type": "Point",
+            "coordinates": [coords['lng'], coords['lat']]
+        },
+        "properties": {
+            "id": node_id,
+            "nombre": node_data.get('address', ''),
+            "origen": "DIM_Estudios_Geocodificado",
+            "tipo": "AFORO_MANUAL",
+            "color": "#2979FF",
+            "has_studies": True,
+            "studies_count": node_info['studies_count'],
+            "geocoded": True,
+            "geocoding_score": coords.get('score', 0),
+            "geocoded_address": coords.get('address', '')
+        }
+    }
+
+def main():
+    print("=" * 80)
+    print("GEOCODIFICACION DE NODOS FALTANTES DEL DICCIONARIO DE ESTUDIOS")
+    print("=" * 80)
+    
+    # Cargar diccionario de estudios
+    studies_path = PROJECT_ROOT / 'src' / 'data' / 'studies_dictionary.json'
+    print("\n[1/5] Cargando diccionario de estudios...")
+    with open(studies_path, 'r', encoding='utf-8') as f:
+        studies_dict = json.load(f)
+    
+    studies_nodes = studies_dict['nodes']
+    print(f"   [OK] {len(studies_nodes)} nodos en diccionario")
+    
+    # Cargar nodos del mapa
+    nodos_path = PROJECT_ROOT / 'src' / 'data' / 'nodos_unificados.json'
+    print("\n[2/5] Cargando nodos del mapa...")
+    # Lectura en streaming proyectando solo lo necesario: IDs (todos los de las fuentes de
+    # un nodo fusionado, ver nodos_merge.source_ids) e índice local de intersecciones
+    map_node_ids = set()
+    map_total = 0
+    local_index = IntersectionIndex()
+    for f in iter_features(str(nodos_path), properties=('id', 'sources', 'nombre', 'origen', 'raw_data')):
+        map_node_ids.update(source_ids(f))
+        local_index.add_feature(f)
+        map_total += 1
+    # Nodos ya agregados por corridas anteriores (capa aparte, ver OVERLAY_FILE)
+    overlay_features = list(iter_features(OVERLAY_FILE)) if os.path.exists(OVERLAY_FILE) else []
+    for f in overlay_features:
+        map_node_ids.update(source_ids(f))
+    map_total += len(overlay_features)
+    print(f"   [OK] {map_total} nodos en el mapa ({len(overlay_features)} en {os.path.basename(OVERLAY_FILE)})")
+    
+    # Identificar nodos faltantes
+    print("\n[3/5] Identificando nodos faltantes...")
+    missing_nodes = find_missing_nodes(studies_nodes, map_node_ids)
+    
+    print(f"   [OK] {len(missing_nodes)} nodos faltantes identificados")
+    
+    if len(missing_nodes) == 0:
+        print("\n[INFO] No hay nodos faltantes. Todos los nodos ya están en el mapa.")
+        return
+    
+    # Geocodificar nodos faltantes (procesar en lotes para no saturar)
+    print(f"\n[4/5] Geocodificando nodos faltantes...")
+    print(f"   [INFO] Procesando {len(missing_nodes)} nodos (esto puede tomar varios minutos)...")
+    
+    progress_file = PROGRESS_FILE
+    geocoded_nodes, failed_nodes, missing_nodes = geocode_nodes(missing_nodes, progress_file, local_index)
     
     print(f"\n   [OK] {len(geocoded_nodes)} nodos geocodificados exitosamente")
     print(f"   [WARNING] {len(failed_nodes)} nodos no pudieron ser geocodificados")
     
     # Crear features GeoJSON para los nodos geocodificados
     print(f"\n[5/5] Creando features GeoJSON...")
-    new_features = []
-    
-    for node_info in geocoded_nodes:
-        node_id = node_info['node_id']
-        coords = node_info['coordinates']
-        node_data = node_info['node_data']
-        
-        feature = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [coords['lng'], coords['lat']]
-            },
-            "properties": {
-                "id": node_id,
-                "nombre": node_data.get('address', ''),
-                "origen": "DIM_Estudios_Geocodificado",
-                "tipo": "AFORO_MANUAL",
-                "color": "#2979FF",
-                "has_studies": True,
-                "studies_count": node_info['studies_count'],
-                "geocoded": True,
-                "geocoding_score": coords.get('score', 0),
-                "geocoded_address": coords.get('address', '')
-            }
-        }
-        
-        new_features.append(feature)
+    new_features = [build_geocoded_feature(node_info) for node_info in geocoded_nodes]
     
     # Agregar nuevos features al mapa
     if new_features:
-        map_data['features'].extend(new_features)
         print(f"   [OK] {len(new_features)} nuevos features creados")
         
-        # Guardar archivo actualizado
-        output_file = str(PROJECT_ROOT / 'src' / 'data' / 'nodos_unificados.json')
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(map_data, f, ensure_ascii=False, indent=2)
+        # nodos_unificados.json no se reescribe: los nuevos nodos van a una capa
+        # aparte (nodos_geocodificados.json) que el front y los jobs/ETL del
+        # servidor (server/utils/nodosUnificados.js) suman al cargar; la
+        # escritura es O(nodos geocodificados), no O(mapa completo).
+        # run_nodes_pipeline.py la incorpora al archivo principal en publish.
+        with GeoJSONWriter(OVERLAY_FILE, metadata={"generated_at": time.strftime("%Y-%m-%d %H:%M:%S")}) as writer:
+            writer.write_all(overlay_features)
+            writer.write_all(new_features)
+        map_total += len(new_features)
         
-        print(f"\n[OK] Archivo actualizado: {output_file}")
-        print(f"   Total de nodos ahora: {len(map_data['features'])}")
+        print(f"\n[OK] Capa de nodos geocodificados actualizada: {OVERLAY_FILE} ({writer.count} nodos)")
+        print(f"   Total de nodos ahora: {map_total}")
         
-        # Copiar a public/data
-        public_file = PROJECT_ROOT / 'public' / 'data' / 'nodos_unificados.json'
-        public_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(public_file, 'w', encoding='utf-8') as f:
-            json.dump(map_data, f, ensure_ascii=False, indent=2)
-        print(f"   [OK] Copiado a: {public_file}")
+        # Publicar en public/data sin reescribir (enlace duro; copia si no se puede)
+        mode = link_or_copy(OVERLAY_FILE, PUBLIC_OVERLAY_FILE)
+        print(f"   [OK] Publicado en: {PUBLIC_OVERLAY_FILE} ({'enlace duro' if mode == 'link' else 'copia'})")
         
         # Limpiar archivo de progreso si se completó todo
         if len(missing_nodes) == len(geocoded_nodes) + len(failed_nodes):
@@ -320,7 +603,7 @@ def main():
     print(f"Nodos ya en el mapa: {len([n for n in studies_nodes.keys() if n in map_node_ids])}")
     print(f"Nodos geocodificados: {len(geocoded_nodes)}")
     print(f"Nodos que fallaron: {len(failed_nodes)}")
-    print(f"Total de nodos en el mapa ahora: {len(map_data['features'])}")
+    print(f"Total de nodos en el mapa ahora: {map_total}")
     print("=" * 80)
     
     if failed_nodes:
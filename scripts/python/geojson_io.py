@@ -0,0 +1,309 @@
+"""
+Lectura y escritura de FeatureCollection GeoJSON sin cargar el documento completo.
+
+Lectura: iter_features recorre el arreglo "features" de a un feature, leyendo
+el archivo por bloques, con proyección opcional de propiedades; la memoria no
+depende del tamaño del archivo.
+
+Escritura: GeoJSONWriter emite los features uno a uno a medida que llegan (por
+ejemplo, página por página desde un descargador) y escribe a un archivo
+temporal que se renombra sobre el destino solo al cerrar sin errores, de modo
+que un fallo a mitad nunca deja un nodos_unificados.json truncado.
+
+Uso:
+    from geojson_io import GeoJSONWriter, write_feature_collection
+
+    with GeoJSONWriter(output_file, metadata={"sources": [...]}) as writer:
+        for page in pages:
+            writer.write_all(page)
+
+    write_feature_collection(features, output_file, pretty=True)
+
+    link_or_copy(output_file, public_file)  # Copia en public/data sin reescribir
+    link_or_copy_tree(tiles_dir, public_tiles_dir)  # Carpetas completas, con reemplazo atómico
+
+    node_ids = {f['properties']['id'] for f in iter_features(path, properties=('id',), include_geometry=False)}
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+READ_CHUNK_SIZE = 1024 * 1024  # Bytes leídos por bloque
+
+_decoder = json.JSONDecoder()
+
+
+class GeoJSONWriter:
+    """
+    Escritor incremental de un FeatureCollection con reemplazo atómico.
+
+    Args:
+        output_file: Ruta final del GeoJSON
+        metadata: Miembro "metadata" opcional; se escribe al final, con
+            total_features igual al número de features escritos
+        pretty: True = indentado (legible, ~2x tamaño); False = compacto
+    """
+
+    def __init__(self, output_file: str, metadata: Optional[Dict] = None, pretty: bool = False):
+        self.output_file = output_file
+        self.metadata = metadata
+        self.pretty = pretty
+        self.count = 0
+        self._tmp_file = f"{output_file}.{os.getpid()}.tmp"
+        self._file = None
+
+    def __enter__(self) -> "GeoJSONWriter":
+        output_dir = os.path.dirname(self.output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._file = open(self._tmp_file, 'w', encoding='utf-8')
+        self._file.write('{\n  "type": "FeatureCollection",\n  "features": [' if self.pretty
+                         else '{"type":"FeatureCollection","features":[')
+        return self
+
+    def write(self, feature: Dict) -> None:
+        """Agrega un feature al final del arreglo."""
+        if self.pretty:
+            encoded = json.dumps(feature, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+            self._file.write(('\n    ' if self.count == 0 else ',\n    ') + encoded)
+        else:
+            encoded = json.dumps(feature, ensure_ascii=False, separators=(',', ':'))
+            self._file.write(encoded if self.count == 0 else ',' + encoded)
+        self.count += 1
+
+    def write_all(self, features: Iterable[Dict]) -> None:
+        """Agrega todos los features de un iterable."""
+        for feature in features:
+            self.write(feature)
+
+    def abort(self) -> None:
+        """Descarta lo escrito; el archivo destino queda como estaba."""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._tmp_file):
+            os.remove(self._tmp_file)
+
+    def close(self) -> None:
+        """Cierra el arreglo, escribe metadata y reemplaza el destino atómicamente."""
+        if self.pretty:
+            self._file.write('\n  ]' if self.count else ']')
+        else:
+            self._file.write(']')
+        if self.metadata is not None:
+            metadata = dict(self.metadata, total_features=self.count)
+            if self.pretty:
+                encoded = json.dumps(metadata, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+                self._file.write(',\n  "metadata": ' + encoded)
+            else:
+                self._file.write(',"metadata":' + json.dumps(metadata, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n}\n' if self.pretty else '}')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_file, self.output_file)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._file is None:
+            return
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_feature_collection(features: Iterable[Dict], output_file: str,
+                             metadata: Optional[Dict] = None, pretty: bool = False) -> int:
+    """
+    Escribe un FeatureCollection completo desde un iterable de features.
+
+    Returns:
+        int: Número de features escritos
+    """
+    with GeoJSONWriter(output_file, metadata=metadata, pretty=pretty) as writer:
+        writer.write_all(features)
+    return writer.count
+
+
+def link_or_copy(src: str, dst: str) -> str:
+    """
+    Publica src en dst como enlace duro (sin copiar bytes); si el sistema de
+    archivos no lo permite, como copia. El reemplazo de dst es atómico.
+
+    Como GeoJSONWriter siempre renombra un archivo nuevo sobre el destino, el
+    enlace no ve escrituras posteriores de src: hay que volver a publicar.
+
+    Returns:
+        str: 'link' o 'copy'
+    """
+    dst_dir = os.path.dirname(dst)
+    if dst_dir:
+        os.makedirs(dst_dir, exist_ok=True)
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        # Ya publicado (mismo inodo); rename() entre enlaces del mismo archivo no hace nada
+        return 'link'
+    tmp_file = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp_file)
+        mode = 'link'
+    except OSError:
+        shutil.copy2(src, tmp_file)
+        mode = 'copy'
+    os.replace(tmp_file, dst)
+    return mode
+
+
+def link_or_copy_tree(src_dir: str, dst_dir: str) -> str:
+    """
+    Publica la carpeta src_dir en dst_dir archivo por archivo con link_or_copy.
+
+    La copia se arma en una carpeta temporal que reemplaza a dst_dir al final,
+    de modo que quien lee dst_dir nunca ve una mezcla de archivos viejos y nuevos.
+
+    Returns:
+        str: 'link' si todos los archivos quedaron enlazados, si no 'copy'
+    """
+    tmp_dir = f"{dst_dir}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+    modes = set()
+    for root, _, files in os.walk(src_dir):
+        relative = os.path.relpath(root, src_dir)
+        for name in files:
+            modes.add(link_or_copy(os.path.join(root, name), os.path.normpath(os.path.join(tmp_dir, relative, name))))
+
+    old_dir = f"{dst_dir}.{os.getpid()}.old"
+    if os.path.exists(dst_dir):
+        os.replace(dst_dir, old_dir)
+    os.replace(tmp_dir, dst_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    return 'copy' if 'copy' in modes else 'link'
+
+
+class _JSONStream:
+    """Buffer de texto sobre un archivo que decodifica valores JSON de a uno."""
+
+    def __init__(self, f, chunk_size: int = READ_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Agrega un bloque al buffer descartando lo ya consumido; False si no hay más."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Siguiente carácter que no sea espacio ('' al final del archivo)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"GeoJSON inválido: se esperaba '{char}' y se encontró '{found or 'EOF'}'")
+        self._pos += 1
+
+    def value(self):
+        """Decodifica el siguiente valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Valor cortado por el borde del bloque: leer más y reintentar
+                if not self._fill():
+                    raise
+                continue
+            # Un número (o true/false/null) cortado por el borde del bloque se
+            # decodifica como un prefijo válido: solo es definitivo si le sigue un delimitador
+            if (not isinstance(value, (dict, list, str))
+                    and (end == len(self._buffer) or self._buffer[end] not in ' \t\r\n,]}')
+                    and self._fill()):
+                continue
+            self._pos = end
+            return value
+
+
+def _project(feature: Dict, properties: Optional[Sequence[str]], include_geometry: bool) -> Dict:
+    if properties is None and include_geometry:
+        return feature
+    projected = {key: value for key, value in feature.items() if key not in ('properties', 'geometry')}
+    source = feature.get('properties') or {}
+    projected['properties'] = dict(source) if properties is None else {
+        key: source[key] for key in properties if key in source
+    }
+    if include_geometry:
+        projected['geometry'] = feature.get('geometry')
+    return projected
+
+
+def iter_features(path: str, properties: Optional[Sequence[str]] = None, include_geometry: bool = True,
+                  members: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Itera los features de un FeatureCollection sin cargar el documento completo.
+
+    Args:
+        path: Ruta del GeoJSON
+        properties: Si se indica, cada feature conserva solo estas propiedades
+        include_geometry: False para omitir la geometría
+        members: Dict opcional que se llena con los demás miembros de primer
+            nivel (type, metadata, ...); los que van después de "features"
+            solo están disponibles al agotar el iterador
+
+    Raises:
+        ValueError: Si el archivo no es un objeto JSON con un arreglo "features"
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JSONStream(f, READ_CHUNK_SIZE)
+        stream.expect('{')
+        found_features = False
+        if stream.peek() == '}':
+            stream.expect('}')
+        else:
+            while True:
+                key = stream.value()
+                stream.expect(':')
+                if key == 'features':
+                    found_features = True
+                    stream.expect('[')
+                    if stream.peek() == ']':
+                        stream.expect(']')
+                    else:
+                        while True:
+                            yield _project(stream.value(), properties, include_geometry)
+                            if stream.peek() == ',':
+                                stream.expect(',')
+                                continue
+                            stream.expect(']')
+                            break
+                else:
+                    value = stream.value()
+                    if members is not None:
+                        members[key] = value
+                if stream.peek() == ',':
+                    stream.expect(',')
+                    continue
+                stream.expect('}')
+                break
+        if not found_features:
+            raise ValueError(f"{path} no contiene un arreglo 'features'")
@@ -1,17 +1,16 @@
 """Script para obtener metadatos del dataset de Socrata"""
-import requests
 import json
 from pathlib import Path
 
+import http_client
+from http_cache import TTL_METADATA, cached_get
+
 # Raíz del repo (scripts/python -> scripts -> raíz)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 dataset_id = "b9s9-jw7c"
 metadata_url = f"https://www.datos.gov.co/api/views/{dataset_id}.json"
 
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Accept': 'application/json'
-}
+headers = http_client.socrata_headers()
 
 print("="*80)
 print("OBTENIENDO METADATOS DEL DATASET")
@@ -19,7 +18,7 @@ print("="*80)
 print(f"URL: {metadata_url}\n")
 
 try:
-    response = requests.get(metadata_url, headers=headers, timeout=15)
+    response = cached_get(metadata_url, headers=headers, ttl=TTL_METADATA, timeout=15)
     print(f"Status: {response.status_code}")
     
     if response.ok:
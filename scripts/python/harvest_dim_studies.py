@@ -4,225 +4,866 @@ Crea un índice maestro que conecta nodos geográficos con sus estudios asociado
 """
 
 import requests
+import asyncio
+import hashlib
 import json
 import os
+import random
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
+import http_client
+from geojson_io import link_or_copy
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 # Configuración
 URL_BASE = "https://dim.movilidadbogota.gov.co/visualizacion_monitoreo/estudiosnodo"
 OUTPUT_FILE = str(PROJECT_ROOT / "src" / "data" / "studies_dictionary.json")
+PUBLIC_DIR = PROJECT_ROOT / "public" / "data"  # De aquí leen el front y etl_nodos_estudios_from_json.js
 START_ID = 1
 END_ID = 2000  # Cambiar a un rango menor para pruebas rápidas, ej: 500
 DELAY_BETWEEN_REQUESTS = 0.05  # Segundos entre peticiones (reducido para mayor velocidad)
 PROGRESS_INTERVAL = 50  # Mostrar progreso cada N requests
-SAVE_INTERVAL = 200  # Guardar progreso parcial cada N requests
+# Modo asíncrono (--async): concurrencia adaptativa AIMD en lugar de peticiones en serie
+ASYNC_HARVEST = '--async' in sys.argv
+ASYNC_INITIAL_IN_FLIGHT = 4  # Peticiones simultáneas al arrancar
+ASYNC_MAX_IN_FLIGHT = 32  # Techo de peticiones simultáneas
+ASYNC_LATENCY_TOLERANCE = 1.5  # Solo se sube la concurrencia si la latencia no supera N veces la base
+ASYNC_MAX_ATTEMPTS = http_client.MAX_RETRIES + 1  # Intentos por ID ante congestión (igual que el modo en serie)
+ASYNC_RETRY_BACKOFF = http_client.BACKOFF_FACTOR  # Espera base antes de reencolar: N * 2^(intento-1) + jitter
+# Modo descubrimiento (--discover): muestreo grueso + densificación alrededor de los hits
+DISCOVERY_MODE = '--discover' in sys.argv
+DISCOVERY_STRIDE = 10  # Se consulta 1 de cada N IDs en el muestreo grueso
+DISCOVERY_RADIUS = 10  # Vecindad consultada alrededor de cada hit
+DISCOVERY_MAX_MISS_RUN = 200  # Fallos consecutivos tras el último hit para dar por terminado el espacio de IDs
+# Modo incremental (--incremental): huella por nodo y archivo delta para el ETL
+INCREMENTAL_MODE = '--incremental' in sys.argv
+FINGERPRINTS_FILE = OUTPUT_FILE.replace('.json', '_fingerprints.json')
+DELTA_FILE = OUTPUT_FILE.replace('.json', '_delta.json')
+PUBLIC_OUTPUT_FILE = str(PUBLIC_DIR / os.path.basename(OUTPUT_FILE))
+PUBLIC_DELTA_FILE = str(PUBLIC_DIR / os.path.basename(DELTA_FILE))  # DEFAULT_DELTA_PATH del ETL (--delta)
+# Journal de checkpoint: una línea JSON por ID consultado (hit, 404 o error)
+JOURNAL_FILE = OUTPUT_FILE.replace('.json', '_journal.jsonl')
+
+STATUS_HIT = 'hit'
+STATUS_MISS = 'miss'
+STATUS_ERROR = 'error'
 
-# Headers para las peticiones
+# Headers adicionales a los de http_client (User-Agent, Accept, gzip)
 HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Accept': 'application/json',
     'Accept-Language': 'es-ES,es;q=0.9',
 }
 
 
-def fetch_node_studies(internal_id: int) -> Optional[Dict]:
+def parse_node_studies(internal_id: int, data: Any) -> Optional[Dict]:
     """
-    Obtiene los estudios asociados a un nodo por su ID interno.
+    Convierte la respuesta JSON de estudiosnodo en la entrada del índice maestro.
     
     Args:
-        internal_id: ID interno del nodo
+        internal_id: ID interno consultado
+        data: JSON devuelto por el endpoint
     
     Returns:
-        Diccionario con la información del nodo y estudios, o None si no existe
+        Diccionario con nombre_nodo y node_info, o None si la respuesta no describe un nodo
     """
-    url = f"{URL_BASE}/{internal_id}"
+    # El endpoint devuelve una lista de estudios para ese nodo
+    if not data or not isinstance(data, list):
+        return None
+    
+    # Agrupar estudios por nombre_nodo (puede haber múltiples estudios para el mismo nodo)
+    # Tomar la información del primer estudio para los datos del nodo
+    first_study = data[0]
+    nombre_nodo = first_study.get('nombre_nodo')
+    id_nodo_interno = first_study.get('id_nodo', internal_id)
+    direccion = first_study.get('direccion', '')
+    
+    if not nombre_nodo:
+        print(f"  [WARNING] ID {internal_id}: No tiene 'nombre_nodo'")
+        return None
+    
+    # Procesar todos los estudios de la lista
+    estudios = []
+    for estudio in data:
+        file_id = estudio.get('id')
+        fecha_inicio = estudio.get('fecha_inicio_estudio')
+        fecha_fin = estudio.get('fecha_fin_estudio')
+        tipo = estudio.get('nombre_tipo_estudio') or 'Volumen vehicular'
+        contratistas = estudio.get('contratistas', [])
+        
+        if file_id:
+            estudio_info = {
+                "file_id": int(file_id),
+                "date": fecha_inicio,  # Fecha de inicio del estudio
+                "date_end": fecha_fin,  # Fecha de fin del estudio
+                "type": tipo,
+                "download_url": f"https://dim.movilidadbogota.gov.co/visualizacion_monitoreo/consultararchivoscargados/{file_id}"
+            }
+            
+            if contratistas and len(contratistas) > 0:
+                estudio_info["contractors"] = contratistas
+            
+            # Información adicional del estudio
+            if estudio.get('total_informacion_de_volumen'):
+                estudio_info["total_records"] = estudio.get('total_informacion_de_volumen')
+            if estudio.get('fechas'):
+                estudio_info["dates"] = estudio.get('fechas')
+            if estudio.get('tipos_vehiculo'):
+                estudio_info["vehicle_types"] = estudio.get('tipos_vehiculo')
+            
+            estudios.append(estudio_info)
+    
+    # Construir objeto del nodo
+    node_info = {
+        "internal_id": int(id_nodo_interno),
+        "address": direccion if direccion else nombre_nodo,
+        "studies": estudios
+    }
+    
+    # Agregar información adicional del nodo desde el primer estudio
+    if first_study.get('via_principal'):
+        node_info["via_principal"] = first_study.get('via_principal')
+    if first_study.get('via_secundaria'):
+        node_info["via_secundaria"] = first_study.get('via_secundaria')
+    
+    return {
+        "nombre_nodo": nombre_nodo,
+        "node_info": node_info
+    }
+
+
+def probe_node_studies_detailed(internal_id: int, retries: Optional[int] = None,
+                                base_url: str = URL_BASE) -> Tuple[str, Optional[Dict], bool]:
+    """
+    Igual que probe_node_studies, indicando además si el fallo es señal de congestión.
+    
+    Returns:
+        Tupla (estado, resultado, congestión). Congestión es True solo para
+        timeouts, errores de conexión y HTTP 429/5xx (http_client.RETRY_STATUSES);
+        un JSON inválido o una respuesta que no se puede interpretar es un error
+        sin congestión.
+    """
+    url = f"{base_url}/{internal_id}"
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = http_client.get(url, headers=HEADERS, timeout=10, retries=retries)
         
         # Si es 404, el nodo no existe
         if response.status_code == 404:
-            return None
+            return STATUS_MISS, None, False
         
         # Si hay otro error HTTP, registrar y continuar
         if not response.ok:
             print(f"  [WARNING] ID {internal_id}: HTTP {response.status_code}")
-            return None
+            return STATUS_ERROR, None, response.status_code in http_client.RETRY_STATUSES
         
         # Intentar parsear JSON
         try:
             data = response.json()
         except json.JSONDecodeError:
             print(f"  [WARNING] ID {internal_id}: Respuesta no es JSON válido")
-            return None
-        
-        # Verificar que no esté vacío
-        if not data or (isinstance(data, list) and len(data) == 0):
-            return None
-        
-        # El endpoint devuelve una lista de estudios para ese nodo
-        if not isinstance(data, list) or len(data) == 0:
-            return None
-        
-        # Agrupar estudios por nombre_nodo (puede haber múltiples estudios para el mismo nodo)
-        # Tomar la información del primer estudio para los datos del nodo
-        first_study = data[0]
-        nombre_nodo = first_study.get('nombre_nodo')
-        id_nodo_interno = first_study.get('id_nodo', internal_id)
-        direccion = first_study.get('direccion', '')
+            return STATUS_ERROR, None, False
         
-        if not nombre_nodo:
-            print(f"  [WARNING] ID {internal_id}: No tiene 'nombre_nodo'")
-            return None
-        
-        # Procesar todos los estudios de la lista
-        estudios = []
-        for estudio in data:
-            file_id = estudio.get('id')
-            fecha_inicio = estudio.get('fecha_inicio_estudio')
-            fecha_fin = estudio.get('fecha_fin_estudio')
-            tipo = estudio.get('nombre_tipo_estudio') or 'Volumen vehicular'
-            contratistas = estudio.get('contratistas', [])
-            
-            if file_id:
-                estudio_info = {
-                    "file_id": int(file_id),
-                    "date": fecha_inicio,  # Fecha de inicio del estudio
-                    "date_end": fecha_fin,  # Fecha de fin del estudio
-                    "type": tipo,
-                    "download_url": f"https://dim.movilidadbogota.gov.co/visualizacion_monitoreo/consultararchivoscargados/{file_id}"
-                }
-                
-                if contratistas and len(contratistas) > 0:
-                    estudio_info["contractors"] = contratistas
-                
-                # Información adicional del estudio
-                if estudio.get('total_informacion_de_volumen'):
-                    estudio_info["total_records"] = estudio.get('total_informacion_de_volumen')
-                if estudio.get('fechas'):
-                    estudio_info["dates"] = estudio.get('fechas')
-                if estudio.get('tipos_vehiculo'):
-                    estudio_info["vehicle_types"] = estudio.get('tipos_vehiculo')
-                
-                estudios.append(estudio_info)
-        
-        # Construir objeto del nodo
-        node_info = {
-            "internal_id": int(id_nodo_interno),
-            "address": direccion if direccion else nombre_nodo,
-            "studies": estudios
-        }
-        
-        # Agregar información adicional del nodo desde el primer estudio
-        if first_study.get('via_principal'):
-            node_info["via_principal"] = first_study.get('via_principal')
-        if first_study.get('via_secundaria'):
-            node_info["via_secundaria"] = first_study.get('via_secundaria')
-        
-        return {
-            "nombre_nodo": nombre_nodo,
-            "node_info": node_info
-        }
+        result = parse_node_studies(internal_id, data)
+        return (STATUS_HIT, result, False) if result else (STATUS_MISS, None, False)
         
     except requests.exceptions.Timeout:
         print(f"  [ERROR] ID {internal_id}: Timeout")
-        return None
+        return STATUS_ERROR, None, True
     except requests.exceptions.RequestException as e:
         print(f"  [ERROR] ID {internal_id}: {e}")
-        return None
+        return STATUS_ERROR, None, True
     except Exception as e:
         print(f"  [ERROR] ID {internal_id}: Error inesperado: {e}")
-        return None
+        return STATUS_ERROR, None, False
+
+
+def probe_node_studies(internal_id: int, retries: Optional[int] = None,
+                       base_url: str = URL_BASE) -> Tuple[str, Optional[Dict]]:
+    """
+    Consulta un ID y clasifica el resultado para el journal de cosecha.
+    
+    Args:
+        internal_id: ID interno del nodo
+        retries: Reintentos del cliente HTTP (None = http_client.MAX_RETRIES)
+        base_url: URL de estudiosnodo (URL_BASE; otra para un servidor de prueba)
+    
+    Returns:
+        Tupla (estado, resultado). El estado es 'hit' (nodo válido), 'miss'
+        (404 o respuesta sin nodo; no se reintenta) o 'error' (fallo transitorio;
+        se reintenta en la siguiente ejecución).
+    """
+    status, result, _ = probe_node_studies_detailed(internal_id, retries, base_url)
+    return status, result
+
+
+def fetch_node_studies(internal_id: int) -> Optional[Dict]:
+    """
+    Obtiene los estudios asociados a un nodo por su ID interno.
+    
+    Args:
+        internal_id: ID interno del nodo
+    
+    Returns:
+        Diccionario con la información del nodo y estudios, o None si no existe
+    """
+    _, result = probe_node_studies(internal_id)
+    return result
+
+
+def load_journal(journal_file: str) -> Dict[int, Dict]:
+    """
+    Lee el journal de cosecha (una línea JSON por ID consultado).
+    
+    Si un ID aparece varias veces (p. ej. un error reintentado), gana la última línea.
+    Una línea final truncada por una interrupción se ignora.
+    
+    Returns:
+        Diccionario ID -> entrada del journal
+    """
+    entries = {}
+    if not os.path.exists(journal_file):
+        return entries
+    
+    with open(journal_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[int(entry['id'])] = entry
+    return entries
+
+
+def build_master_index(entries: Dict[int, Dict]) -> Dict[str, Dict]:
+    """
+    Construye el índice maestro desde las entradas del journal en una sola pasada.
+    
+    Los IDs se recorren en orden ascendente para que, si dos IDs comparten
+    nombre_nodo, el resultado sea el mismo que el de un barrido secuencial.
+    """
+    master_index = {}
+    for internal_id in sorted(entries):
+        entry = entries[internal_id]
+        if entry.get('status') == STATUS_HIT:
+            master_index[entry['nombre_nodo']] = entry['node_info']
+    return master_index
+
+
+def get_pending_ids(entries: Dict[int, Dict], start_id: int, end_id: int) -> List[int]:
+    """IDs del rango que el journal no tiene resueltos (sin consultar o con error)."""
+    resolved = {
+        internal_id for internal_id, entry in entries.items()
+        if entry.get('status') in (STATUS_HIT, STATUS_MISS)
+    }
+    return [i for i in range(start_id, end_id) if i not in resolved]
+
+
+def open_journal(journal_file: str):
+    """Abre el journal en modo append, empezando en línea nueva si la anterior quedó truncada."""
+    journal_dir = os.path.dirname(journal_file)
+    if journal_dir and not os.path.exists(journal_dir):
+        os.makedirs(journal_dir)
+    
+    journal = open(journal_file, 'a', encoding='utf-8')
+    if journal.tell() > 0:
+        with open(journal_file, 'rb') as existing:
+            existing.seek(-1, os.SEEK_END)
+            if existing.read(1) != b"\n":
+                journal.write("\n")
+    return journal
+
+
+def finish_harvest(entries: Dict[int, Dict], start_id: int, end_id: int, total_requests: int, errors: int) -> Dict[str, Dict]:
+    """Construye el índice maestro del rango desde el journal e imprime el resumen."""
+    master_index = build_master_index({
+        internal_id: entry for internal_id, entry in entries.items()
+        if start_id <= internal_id < end_id
+    })
+    nodes_with_studies = sum(1 for node in master_index.values() if node['studies'])
+    indexed_studies = sum(len(node['studies']) for node in master_index.values())
+    misses = sum(
+        1 for internal_id, entry in entries.items()
+        if start_id <= internal_id < end_id and entry.get('status') == STATUS_MISS
+    )
+    
+    print("\n" + "=" * 80)
+    print("RESUMEN DE LA COSECHA")
+    print("=" * 80)
+    print(f"Total de IDs procesados en esta ejecución: {total_requests:,}")
+    print(f"Nodos válidos encontrados: {len(master_index):,}")
+    print(f"Nodos con estudios: {nodes_with_studies:,}")
+    print(f"Total de estudios indexados: {indexed_studies:,}")
+    print(f"No encontrados: {misses:,}")
+    print(f"Errores (se reintentarán): {errors:,}")
+    print("=" * 80 + "\n")
+    
+    return master_index
 
 
-def harvest_studies(start_id: int, end_id: int) -> Dict[str, Dict]:
+def harvest_studies(start_id: int, end_id: int, journal_file: str = JOURNAL_FILE,
+                    base_url: str = URL_BASE) -> Dict[str, Dict]:
     """
     Cosecha estudios de todos los nodos en el rango especificado.
     
+    Cada ID consultado se agrega como una línea al journal, así que una ejecución
+    interrumpida se reanuda saltando los IDs ya resueltos (hit o 404) y
+    reintentando solo los que terminaron en error.
+    
     Args:
         start_id: ID inicial del rango
         end_id: ID final del rango (exclusivo)
+        journal_file: Ruta del journal JSONL de checkpoint
+        base_url: URL de estudiosnodo (URL_BASE por defecto)
     
     Returns:
         Diccionario maestro indexado por nombre_nodo
     """
-    master_index = {}
+    entries = load_journal(journal_file)
+    pending_ids = get_pending_ids(entries, start_id, end_id)
+    
     valid_nodes = 0
-    nodes_with_studies = 0
     total_studies = 0
     errors = 0
     
     print("\n" + "=" * 80)
     print("COSECHANDO ESTUDIOS DE TRÁFICO DESDE DIM MOVILIDAD BOGOTÁ")
     print("=" * 80)
-    print(f"URL Base: {URL_BASE}")
+    print(f"URL Base: {base_url}")
     print(f"Rango de IDs: {start_id} a {end_id - 1}")
     print(f"Delay entre peticiones: {DELAY_BETWEEN_REQUESTS}s")
+    print(f"Journal: {journal_file}")
+    if len(pending_ids) < end_id - start_id:
+        print(f"[INFO] Reanudando: {end_id - start_id - len(pending_ids):,} IDs ya resueltos, {len(pending_ids):,} pendientes")
     print("-" * 80 + "\n")
     
-    total_requests = end_id - start_id
-    
-    for internal_id in range(start_id, end_id):
-        # Mostrar progreso cada N requests
-        if (internal_id - start_id) % PROGRESS_INTERVAL == 0:
-            progress = ((internal_id - start_id) / total_requests) * 100
-            elapsed_time = time.time() - start_time if 'start_time' in locals() else 0
-            if elapsed_time > 0:
-                rate = (internal_id - start_id) / elapsed_time
-                remaining = (total_requests - (internal_id - start_id)) / rate if rate > 0 else 0
-                print(f"[PROGRESO] {progress:.1f}% - ID {internal_id}/{end_id-1} | Válidos: {valid_nodes} | Estudios: {total_studies} | Tiempo restante: ~{remaining:.0f}s")
+    total_requests = len(pending_ids)
+    start_time = time.time()
+    
+    with open_journal(journal_file) as journal:
+        for done, internal_id in enumerate(pending_ids):
+            # Mostrar progreso cada N requests
+            if done % PROGRESS_INTERVAL == 0:
+                progress = (done / total_requests) * 100
+                elapsed_time = time.time() - start_time
+                if done > 0 and elapsed_time > 0:
+                    rate = done / elapsed_time
+                    remaining = (total_requests - done) / rate
+                    print(f"[PROGRESO] {progress:.1f}% - ID {internal_id}/{end_id-1} | Válidos: {valid_nodes} | Estudios: {total_studies} | Tiempo restante: ~{remaining:.0f}s")
+                else:
+                    print(f"[PROGRESO] {progress:.1f}% - ID {internal_id}/{end_id-1} | Válidos: {valid_nodes} | Estudios: {total_studies}")
+            
+            # Obtener estudios del nodo
+            status, result = probe_node_studies(internal_id, base_url=base_url)
+            
+            entry = {"id": internal_id, "status": status}
+            if result:
+                entry.update(result)
+                estudios_count = len(result['node_info']['studies'])
+                valid_nodes += 1
+                total_studies += estudios_count
+                
+                if estudios_count > 0:
+                    print(f"  [OK] ID {internal_id} -> Nodo '{result['nombre_nodo']}': {estudios_count} estudios")
+                else:
+                    print(f"  [OK] ID {internal_id} -> Nodo '{result['nombre_nodo']}': Sin estudios")
+            elif status == STATUS_ERROR:
+                errors += 1
+            
+            # Checkpoint O(1): una línea por ID, sin reescribir lo acumulado
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            journal.flush()
+            entries[internal_id] = entry
+            
+            # Delay para no saturar el servidor
+            time.sleep(DELAY_BETWEEN_REQUESTS)
+    
+    return finish_harvest(entries, start_id, end_id, total_requests, errors)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Límite de peticiones en vuelo con control AIMD (aumento aditivo, disminución multiplicativa).
+    
+    Cada vez que se completa una ventana de `limit` respuestas sanas con latencia
+    estable, el límite sube en 1. Un timeout, 429 o 5xx lo reduce a la mitad; las
+    respuestas a peticiones lanzadas antes de esa reducción no vuelven a reducirlo,
+    para que una ráfaga de errores cuente como una sola señal de congestión.
+    """
+    
+    def __init__(self, initial: int, maximum: int, minimum: int = 1,
+                 latency_tolerance: float = ASYNC_LATENCY_TOLERANCE):
+        self.limit = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.baseline_latency = None
+        self._healthy_in_window = 0
+        self._epoch = 0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self) -> int:
+        """Espera un cupo libre y retorna la época del límite vigente al lanzar la petición."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            return self._epoch
+    
+    async def release(self, epoch: int, congested: bool, latency: float):
+        """Libera el cupo y ajusta el límite según el resultado de la petición."""
+        async with self._condition:
+            self.in_flight -= 1
+            if congested:
+                if epoch == self._epoch:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self._epoch += 1
+                    self._healthy_in_window = 0
             else:
-                print(f"[PROGRESO] {progress:.1f}% - ID {internal_id}/{end_id-1} | Válidos: {valid_nodes} | Estudios: {total_studies}")
-        
-        # Iniciar timer en la primera iteración
-        if internal_id == start_id:
-            start_time = time.time()
+                # Media móvil de la latencia de respuestas sanas
+                if self.baseline_latency is None:
+                    self.baseline_latency = latency
+                else:
+                    self.baseline_latency = 0.9 * self.baseline_latency + 0.1 * latency
+                if latency <= self.baseline_latency * self.latency_tolerance:
+                    self._healthy_in_window += 1
+                if self._healthy_in_window >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._healthy_in_window = 0
+            self._condition.notify_all()
+
+
+async def _harvest_studies_async(start_id: int, end_id: int, journal_file: str,
+                                 initial_in_flight: int, max_in_flight: int, base_url: str) -> Dict[str, Dict]:
+    entries = load_journal(journal_file)
+    pending_ids = get_pending_ids(entries, start_id, end_id)
+    limiter = AdaptiveConcurrencyLimiter(initial_in_flight, max_in_flight)
+    loop = asyncio.get_running_loop()
+    counters = {"done": 0, "errors": 0, "valid": 0, "studies": 0, "retried": 0}
+    
+    print("\n" + "=" * 80)
+    print("COSECHANDO ESTUDIOS DE TRÁFICO DESDE DIM MOVILIDAD BOGOTÁ (ASÍNCRONO)")
+    print("=" * 80)
+    print(f"URL Base: {base_url}")
+    print(f"Rango de IDs: {start_id} a {end_id - 1}")
+    print(f"Peticiones en vuelo: {limiter.limit} iniciales, máximo {max_in_flight}")
+    print(f"Intentos por ID ante congestión: {ASYNC_MAX_ATTEMPTS}")
+    print(f"Journal: {journal_file}")
+    if len(pending_ids) < end_id - start_id:
+        print(f"[INFO] Reanudando: {end_id - start_id - len(pending_ids):,} IDs ya resueltos, {len(pending_ids):,} pendientes")
+    print("-" * 80 + "\n")
+    
+    start_time = time.time()
+    
+    # Las peticiones siguen siendo requests bloqueantes; el event loop solo decide
+    # cuántas hay en vuelo y escribe el journal desde un único hilo.
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor, open_journal(journal_file) as journal:
+        # Cola de (ID, intento); None le indica a un worker que termine
+        queue = asyncio.Queue()
+        for internal_id in pending_ids:
+            queue.put_nowait((internal_id, 1))
+        unresolved = {"count": len(pending_ids)}
         
-        # Obtener estudios del nodo
-        result = fetch_node_studies(internal_id)
+        def stop_workers():
+            for _ in range(max_in_flight):
+                queue.put_nowait(None)
         
-        if result:
-            nombre_nodo = result['nombre_nodo']
-            node_info = result['node_info']
-            estudios_count = len(node_info['studies'])
+        async def probe(internal_id: int, attempt: int):
+            epoch = await limiter.acquire()
+            started = time.monotonic()
+            status, result, congested = STATUS_ERROR, None, True
+            try:
+                # Sin reintentos internos: un 429/503 debe llegar al limitador como congestión
+                status, result, congested = await loop.run_in_executor(
+                    executor, probe_node_studies_detailed, internal_id, 0, base_url
+                )
+            finally:
+                await limiter.release(epoch, congested, time.monotonic() - started)
             
-            # Guardar en el índice maestro (usando nombre_nodo como key)
-            master_index[nombre_nodo] = node_info
+            # Los mismos fallos que http_client reintenta en el modo en serie se
+            # reencolan con backoff, sin ocupar un cupo mientras esperan
+            if congested and attempt < ASYNC_MAX_ATTEMPTS:
+                counters["retried"] += 1
+                delay = ASYNC_RETRY_BACKOFF * (2 ** (attempt - 1)) + random.uniform(0, http_client.BACKOFF_JITTER)
+                loop.call_later(delay, queue.put_nowait, (internal_id, attempt + 1))
+                return
             
-            valid_nodes += 1
-            total_studies += estudios_count
+            entry = {"id": internal_id, "status": status}
+            if result:
+                entry.update(result)
+                counters["valid"] += 1
+                counters["studies"] += len(result['node_info']['studies'])
+            elif status == STATUS_ERROR:
+                counters["errors"] += 1
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            journal.flush()
+            entries[internal_id] = entry
             
-            if estudios_count > 0:
-                nodes_with_studies += 1
-                print(f"  [OK] ID {internal_id} -> Nodo '{nombre_nodo}': {estudios_count} estudios")
-            else:
-                print(f"  [OK] ID {internal_id} -> Nodo '{nombre_nodo}': Sin estudios")
-        else:
-            errors += 1
+            counters["done"] += 1
+            if counters["done"] % PROGRESS_INTERVAL == 0:
+                elapsed = time.time() - start_time
+                rate = counters["done"] / elapsed if elapsed > 0 else 0
+                print(f"[PROGRESO] {counters['done']:,}/{len(pending_ids):,} | En vuelo: {limiter.limit} | "
+                      f"{rate:.1f} req/s | Válidos: {counters['valid']} | Estudios: {counters['studies']} | "
+                      f"Reintentos: {counters['retried']} | Errores: {counters['errors']}")
+            unresolved["count"] -= 1
+            if unresolved["count"] == 0:
+                stop_workers()
         
-        # Guardar progreso parcial periódicamente
-        if (internal_id - start_id) % SAVE_INTERVAL == 0 and master_index:
-            partial_file = OUTPUT_FILE.replace('.json', f'_partial_{internal_id}.json')
-            save_studies_dictionary(master_index, partial_file)
-            print(f"  [GUARDADO PARCIAL] Progreso guardado en: {partial_file}")
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                await probe(*item)
         
-        # Delay para no saturar el servidor
-        time.sleep(DELAY_BETWEEN_REQUESTS)
+        if not pending_ids:
+            stop_workers()
+        # Un worker por cupo máximo: el limitador decide cuántos están activos a la vez
+        await asyncio.gather(*(worker() for _ in range(max_in_flight)))
+        if counters["retried"]:
+            print(f"[INFO] {counters['retried']:,} consultas reencoladas por congestión")
+    
+    return finish_harvest(entries, start_id, end_id, len(pending_ids), counters["errors"])
+
+
+def harvest_studies_async(start_id: int, end_id: int, journal_file: str = JOURNAL_FILE,
+                          initial_in_flight: int = ASYNC_INITIAL_IN_FLIGHT,
+                          max_in_flight: int = ASYNC_MAX_IN_FLIGHT, base_url: str = URL_BASE) -> Dict[str, Dict]:
+    """
+    Variante asíncrona de harvest_studies con concurrencia adaptativa.
+    
+    Usa el mismo journal y la misma construcción del índice, por lo que produce
+    exactamente el mismo master_index que el barrido secuencial. Los IDs que
+    fallan por congestión (timeout, conexión, 429/5xx) se reencolan con backoff
+    hasta ASYNC_MAX_ATTEMPTS intentos, los mismos que http_client hace en serie;
+    solo esos fallos reducen la concurrencia.
+    
+    Args:
+        start_id: ID inicial del rango
+        end_id: ID final del rango (exclusivo)
+        journal_file: Ruta del journal JSONL de checkpoint
+        initial_in_flight: Peticiones simultáneas al arrancar
+        max_in_flight: Techo de peticiones simultáneas
+        base_url: URL de estudiosnodo (URL_BASE por defecto)
+    
+    Returns:
+        Diccionario maestro indexado por nombre_nodo
+    """
+    return asyncio.run(_harvest_studies_async(start_id, end_id, journal_file, initial_in_flight,
+                                              max_in_flight, base_url))
+
+
+def hit_probe_nodes(entries: Dict[int, Dict]) -> Dict[int, str]:
+    """ID consultado -> nombre_nodo de los IDs que dieron un nodo, según el journal."""
+    return {
+        internal_id: entry['nombre_nodo'] for internal_id, entry in entries.items()
+        if entry.get('status') == STATUS_HIT
+    }
+
+
+def load_probe_nodes(fingerprints_file: str) -> Optional[Dict[int, str]]:
+    """
+    ID consultado -> nombre_nodo de la cosecha anterior (probe_nodes del archivo de huellas).
+    
+    Returns:
+        El mapa, o None si no hay archivo de huellas o es anterior a probe_nodes
+    """
+    if not os.path.exists(fingerprints_file):
+        return None
+    try:
+        with open(fingerprints_file, 'r', encoding='utf-8') as f:
+            probe_nodes = json.load(f).get('probe_nodes')
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] No se pudo leer el archivo de huellas: {e}")
+        return None
+    if probe_nodes is None:
+        return None
+    return {int(probe_id): nombre_nodo for probe_id, nombre_nodo in probe_nodes.items()}
+
+
+def unresolved_node_names(unresolved_ids: set, previous_probe_nodes: Optional[Dict[int, str]],
+                          previous_nodes: Dict[str, Dict]) -> set:
+    """
+    Nombres de los nodos previos cuyo ID consultado terminó en error en esta ejecución.
+    
+    El ID de la URL puede no coincidir con el internal_id (id_nodo de la
+    respuesta), así que se traduce con probe_nodes de la cosecha anterior. Con
+    un archivo de huellas anterior a probe_nodes se compara con internal_id.
+    """
+    if previous_probe_nodes is not None:
+        return {previous_probe_nodes[i] for i in unresolved_ids if i in previous_probe_nodes}
+    return {
+        nombre_nodo for nombre_nodo, node_info in previous_nodes.items()
+        if node_info.get('internal_id') in unresolved_ids
+    }
+
+
+def load_seed_ids(dictionary_file: str, fingerprints_file: Optional[str] = None) -> List[int]:
+    """
+    IDs que dieron nodo en la cosecha anterior, para consultarlos primero.
+    
+    Son los IDs consultados guardados en probe_ids del archivo de huellas. El
+    internal_id del diccionario sale de id_nodo en la respuesta y puede no
+    coincidir con el ID de la URL, así que solo se usa con un archivo de
+    huellas anterior a probe_ids.
+    """
+    fingerprints_file = fingerprints_file or dictionary_file.replace('.json', '_fingerprints.json')
+    if os.path.exists(fingerprints_file):
+        try:
+            with open(fingerprints_file, 'r', encoding='utf-8') as f:
+                probe_ids = json.load(f).get('probe_ids')
+            if probe_ids is not None:
+                return sorted({int(i) for i in probe_ids})
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[WARNING] No se pudo leer el archivo de huellas: {e}")
+    if not os.path.exists(dictionary_file):
+        return []
+    try:
+        with open(dictionary_file, 'r', encoding='utf-8') as f:
+            nodes = json.load(f).get('nodes', {})
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] No se pudo leer el diccionario previo: {e}")
+        return []
+    return sorted({int(node['internal_id']) for node in nodes.values() if node.get('internal_id') is not None})
+
+
+def discover_studies(start_id: int, end_id: int, journal_file: str = JOURNAL_FILE,
+                     seed_file: str = OUTPUT_FILE, stride: int = DISCOVERY_STRIDE,
+                     radius: int = DISCOVERY_RADIUS, max_miss_run: int = DISCOVERY_MAX_MISS_RUN,
+                     base_url: str = URL_BASE) -> Dict[str, Dict]:
+    """
+    Cosecha descubriendo el espacio de IDs en lugar de recorrerlo completo.
+    
+    Fases:
+        1. IDs que dieron nodo en la cosecha previa (probe_ids junto a seed_file)
+           y los hits del journal actual
+        2. Muestreo grueso de start_id..end_id cada `stride` IDs
+        3. Densificación: se consultan los `radius` vecinos de cada hit, y de los
+           hits nuevos que aparezcan, hasta agotar la vecindad
+        4. Cola: desde el último hit se sigue subiendo (incluso más allá de end_id)
+           hasta encontrar `max_miss_run` IDs seguidos sin nodo
+    
+    Todas las consultas pasan por el journal, así que el modo es reanudable y el
+    índice final se construye igual que en harvest_studies.
+    
+    Returns:
+        Diccionario maestro indexado por nombre_nodo
+    """
+    entries = load_journal(journal_file)
+    hits = {i for i, entry in entries.items() if entry.get('status') == STATUS_HIT}
+    counters = {"probed": 0, "errors": 0}
     
     print("\n" + "=" * 80)
-    print("RESUMEN DE LA COSECHA")
+    print("DESCUBRIENDO ESTUDIOS DE TRÁFICO EN DIM MOVILIDAD BOGOTÁ")
     print("=" * 80)
-    print(f"Total de IDs procesados: {total_requests:,}")
-    print(f"Nodos válidos encontrados: {valid_nodes:,}")
-    print(f"Nodos con estudios: {nodes_with_studies:,}")
-    print(f"Total de estudios indexados: {total_studies:,}")
-    print(f"Errores/No encontrados: {errors:,}")
-    print("=" * 80 + "\n")
+    print(f"URL Base: {base_url}")
+    print(f"Rango de muestreo: {start_id} a {end_id - 1} (cada {stride} IDs, radio {radius})")
+    print(f"Corte: {max_miss_run} fallos seguidos después del último hit")
+    print(f"Journal: {journal_file}")
+    print("-" * 80 + "\n")
     
-    return master_index
+    with open_journal(journal_file) as journal:
+        def probe(internal_id: int) -> bool:
+            entry = entries.get(internal_id)
+            if entry and entry.get('status') in (STATUS_HIT, STATUS_MISS):
+                return entry['status'] == STATUS_HIT
+            
+            status, result = probe_node_studies(internal_id, base_url=base_url)
+            entry = {"id": internal_id, "status": status}
+            if result:
+                entry.update(result)
+                print(f"  [OK] ID {internal_id} -> Nodo '{result['nombre_nodo']}': {len(result['node_info']['studies'])} estudios")
+            elif status == STATUS_ERROR:
+                counters["errors"] += 1
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            journal.flush()
+            entries[internal_id] = entry
+            counters["probed"] += 1
+            time.sleep(DELAY_BETWEEN_REQUESTS)
+            return status == STATUS_HIT
+        
+        seeds = sorted(set(load_seed_ids(seed_file)) | hits)
+        print(f"[FASE 1] {len(seeds):,} IDs conocidos de la cosecha previa")
+        for internal_id in seeds:
+            if probe(internal_id):
+                hits.add(internal_id)
+        
+        print(f"[FASE 2] Muestreo grueso | Hits hasta ahora: {len(hits):,}")
+        for internal_id in range(start_id, end_id, stride):
+            if probe(internal_id):
+                hits.add(internal_id)
+        
+        print(f"[FASE 3] Densificando alrededor de {len(hits):,} hits")
+        frontier = sorted(hits)
+        expanded = set()
+        while frontier:
+            center = frontier.pop()
+            if center in expanded:
+                continue
+            expanded.add(center)
+            for internal_id in range(max(start_id, center - radius), center + radius + 1):
+                if internal_id not in hits and probe(internal_id):
+                    hits.add(internal_id)
+                    frontier.append(internal_id)
+        
+        last_hit = max(hits) if hits else start_id - 1
+        print(f"[FASE 4] Explorando la cola desde el ID {last_hit + 1}")
+        miss_run = 0
+        internal_id = last_hit + 1
+        while miss_run < max_miss_run:
+            if probe(internal_id):
+                hits.add(internal_id)
+                miss_run = 0
+            else:
+                miss_run += 1
+            internal_id += 1
+        print(f"[INFO] Fin del espacio de IDs estimado en {max(hits) if hits else '-'} (consultas hechas: {counters['probed']:,})")
+    
+    if not entries:
+        return {}
+    return finish_harvest(entries, min(entries), max(entries) + 1, counters["probed"], counters["errors"])
+
+
+def fingerprint_node(node_info: Dict) -> str:
+    """Hash estable del contenido de un nodo (estudios incluidos)."""
+    canonical = json.dumps(node_info, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def load_previous_dictionary(dictionary_file: str) -> Dict[str, Dict]:
+    """Nodos del studies_dictionary.json anterior (vacío si no existe)."""
+    if not os.path.exists(dictionary_file):
+        return {}
+    try:
+        with open(dictionary_file, 'r', encoding='utf-8') as f:
+            return json.load(f).get('nodes', {})
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNING] No se pudo leer el diccionario previo: {e}")
+        return {}
+
+
+def load_fingerprints(fingerprints_file: str, previous_nodes: Dict[str, Dict]) -> Dict[str, str]:
+    """Huellas guardadas en la ejecución anterior; si faltan, se calculan del diccionario previo."""
+    if os.path.exists(fingerprints_file):
+        try:
+            with open(fingerprints_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('nodes', {})
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {nombre: fingerprint_node(node) for nombre, node in previous_nodes.items()}
+
+
+def save_fingerprints(fingerprints: Dict[str, str], fingerprints_file: str, probe_ids: List[int],
+                      probe_nodes: Dict[int, str]):
+    """
+    Guarda las huellas por nodo junto al diccionario, con los IDs consultados
+    que dieron nodo (semillas de --discover) y el nombre_nodo de cada uno.
+    """
+    with open(fingerprints_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "nodes": fingerprints,
+            "probe_ids": probe_ids,
+            "probe_nodes": {str(probe_id): nombre_nodo for probe_id, nombre_nodo in sorted(probe_nodes.items())}
+        }, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def diff_studies(nombre_nodo: str, old_node: Optional[Dict], new_node: Optional[Dict], delta_studies: Dict[str, List]):
+    """Agrega al delta los estudios agregados, eliminados o modificados de un nodo (por file_id)."""
+    old_studies = {s['file_id']: s for s in (old_node or {}).get('studies', [])}
+    new_studies = {s['file_id']: s for s in (new_node or {}).get('studies', [])}
+    for file_id, study in new_studies.items():
+        if file_id not in old_studies:
+            delta_studies['added'].append({"node": nombre_nodo, **study})
+        elif study != old_studies[file_id]:
+            delta_studies['changed'].append({"node": nombre_nodo, **study})
+    for file_id in old_studies:
+        if file_id not in new_studies:
+            delta_studies['removed'].append({"node": nombre_nodo, "file_id": file_id})
+
+
+def build_studies_delta(previous_nodes: Dict[str, Dict], previous_fingerprints: Dict[str, str],
+                        master_index: Dict[str, Dict], unresolved_names: set) -> Tuple[Dict[str, Dict], Dict, Dict[str, str]]:
+    """
+    Compara la cosecha con la anterior usando las huellas por nodo.
+    
+    Los nodos con la misma huella se conservan tal cual del diccionario previo;
+    solo los nuevos o modificados se toman de la cosecha. Un nodo previo cuyo ID
+    consultado terminó en error en esta ejecución (unresolved_names, ver
+    unresolved_node_names) no se considera eliminado.
+    
+    Returns:
+        Tupla (índice resultante, delta, huellas nuevas)
+    """
+    merged = {}
+    fingerprints = {}
+    delta = {
+        "nodes": {},
+        "removed_nodes": [],
+        "studies": {"added": [], "removed": [], "changed": []}
+    }
+    
+    for nombre_nodo, node_info in master_index.items():
+        fingerprint = fingerprint_node(node_info)
+        fingerprints[nombre_nodo] = fingerprint
+        if previous_fingerprints.get(nombre_nodo) == fingerprint and nombre_nodo in previous_nodes:
+            merged[nombre_nodo] = previous_nodes[nombre_nodo]
+            continue
+        merged[nombre_nodo] = node_info
+        delta["nodes"][nombre_nodo] = node_info
+        diff_studies(nombre_nodo, previous_nodes.get(nombre_nodo), node_info, delta["studies"])
+    
+    for nombre_nodo, node_info in previous_nodes.items():
+        if nombre_nodo in master_index:
+            continue
+        if nombre_nodo in unresolved_names:
+            merged[nombre_nodo] = node_info
+            fingerprints[nombre_nodo] = previous_fingerprints.get(nombre_nodo) or fingerprint_node(node_info)
+            continue
+        delta["removed_nodes"].append(nombre_nodo)
+        diff_studies(nombre_nodo, node_info, None, delta["studies"])
+    
+    return merged, delta, fingerprints
+
+
+def save_studies_delta(delta: Dict, output_file: str) -> bool:
+    """Guarda el delta de la cosecha para que el ETL aplique solo los cambios."""
+    output_data = {
+        "metadata": {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "source": "DIM Movilidad Bogotá",
+            "endpoint": URL_BASE,
+            "nodes_changed": len(delta["nodes"]),
+            "nodes_removed": len(delta["removed_nodes"]),
+            "studies_added": len(delta["studies"]["added"]),
+            "studies_removed": len(delta["studies"]["removed"]),
+            "studies_changed": len(delta["studies"]["changed"])
+        },
+        **delta
+    }
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        print(f"[OK] Delta guardado: {output_file}")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error al guardar el delta: {e}")
+        return False
+
+
+def publish_file(src: str, dst: str):
+    """Publica un archivo en public/data (enlace duro; copia si no se puede)."""
+    try:
+        mode = link_or_copy(src, dst)
+        print(f"[OK] Publicado en: {dst} ({'enlace duro' if mode == 'link' else 'copia'})")
+    except OSError as e:
+        print(f"[WARNING] No se pudo publicar {src} en {dst}: {e}")
 
 
 def save_studies_dictionary(master_index: Dict[str, Dict], output_file: str) -> bool:
@@ -292,16 +933,62 @@ def main():
     print("=" * 80 + "\n")
     
     # Cosechar estudios
-    master_index = harvest_studies(START_ID, END_ID)
+    if DISCOVERY_MODE:
+        master_index = discover_studies(START_ID, END_ID)
+    elif ASYNC_HARVEST:
+        master_index = harvest_studies_async(START_ID, END_ID)
+    else:
+        master_index = harvest_studies(START_ID, END_ID)
     
     if not master_index:
         print("\n[WARNING] No se encontraron nodos válidos en el rango especificado")
         print("Puede que necesites ajustar el rango de IDs o verificar la URL del endpoint")
         return False
     
+    journal_entries = load_journal(JOURNAL_FILE)
+    unresolved_ids = {
+        internal_id for internal_id, entry in journal_entries.items()
+        if entry.get('status') == STATUS_ERROR
+    }
+    # IDs consultados que dieron nodo; los que fallaron ahora conservan su semilla y su nombre anteriores
+    previous_probe_nodes = load_probe_nodes(FINGERPRINTS_FILE)
+    probe_nodes = {
+        internal_id: nombre_nodo for internal_id, nombre_nodo in (previous_probe_nodes or {}).items()
+        if internal_id in unresolved_ids
+    }
+    probe_nodes.update(hit_probe_nodes(journal_entries))
+    probe_ids = sorted(set(probe_nodes) | (set(load_seed_ids(OUTPUT_FILE)) & unresolved_ids))
+    
+    if INCREMENTAL_MODE:
+        previous_nodes = load_previous_dictionary(OUTPUT_FILE)
+        previous_fingerprints = load_fingerprints(FINGERPRINTS_FILE, previous_nodes)
+        unresolved_names = unresolved_node_names(unresolved_ids, previous_probe_nodes, previous_nodes)
+        master_index, delta, fingerprints = build_studies_delta(
+            previous_nodes, previous_fingerprints, master_index, unresolved_names
+        )
+        print("\n[INFO] Cambios respecto a la cosecha anterior:")
+        print(f"  Nodos nuevos o modificados: {len(delta['nodes']):,}")
+        print(f"  Nodos eliminados: {len(delta['removed_nodes']):,}")
+        print(f"  Estudios agregados/modificados/eliminados: {len(delta['studies']['added']):,}"
+              f"/{len(delta['studies']['changed']):,}/{len(delta['studies']['removed']):,}")
+        if save_studies_delta(delta, DELTA_FILE):
+            publish_file(DELTA_FILE, PUBLIC_DELTA_FILE)
+        
+        if not delta['nodes'] and not delta['removed_nodes']:
+            print("[OK] Sin cambios: el diccionario existente sigue vigente")
+            save_fingerprints(fingerprints, FINGERPRINTS_FILE, probe_ids, probe_nodes)
+            if os.path.exists(JOURNAL_FILE):
+                os.remove(JOURNAL_FILE)
+            return True
+    else:
+        fingerprints = {nombre: fingerprint_node(node) for nombre, node in master_index.items()}
+    
     # Guardar diccionario maestro
     print("\n[INFO] Guardando diccionario maestro...")
     success = save_studies_dictionary(master_index, OUTPUT_FILE)
+    if success:
+        publish_file(OUTPUT_FILE, PUBLIC_OUTPUT_FILE)
+        save_fingerprints(fingerprints, FINGERPRINTS_FILE, probe_ids, probe_nodes)
     
     # El formato ya está optimizado con nombre_nodo como key principal
     # No necesitamos versión simplificada adicional
@@ -313,6 +1000,10 @@ def main():
         print(f"Archivo guardado: {OUTPUT_FILE}")
         print(f"Total de nodos indexados: {len(master_index):,}")
         print("=" * 80 + "\n")
+        
+        # La cosecha quedó consolidada; la próxima ejecución vuelve a consultar todo el rango
+        if os.path.exists(JOURNAL_FILE):
+            os.remove(JOURNAL_FILE)
         return True
     
     print("\n" + "=" * 80)
@@ -327,7 +1018,7 @@ if __name__ == "__main__":
         exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\n[INFO] Proceso interrumpido por el usuario")
-        print("[INFO] Los datos cosechados hasta ahora se pueden guardar manualmente")
+        print(f"[INFO] El progreso quedó en {JOURNAL_FILE}; vuelve a ejecutar para reanudar")
         exit(1)
     except Exception as e:
         print(f"\n[ERROR] Error fatal: {e}")
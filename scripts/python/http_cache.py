@@ -0,0 +1,165 @@
+"""
+Caché en disco de respuestas HTTP para catálogos y metadatos que cambian poco.
+
+Los escaneos de ArcGIS (MapServer, capas, catálogo de servicios) y los
+metadatos de Socrata se vuelven a pedir en cada ejecución aunque casi nunca
+cambien. Este módulo guarda cada respuesta 200 en data/http_cache/ (local, no
+versionado; ver docs/DATA_POLICY.md), indexada por URL + parámetros, con un TTL
+por clase de endpoint. Vencido el TTL, si el servidor envió ETag o
+Last-Modified se revalida con If-None-Match / If-Modified-Since y un 304 solo
+renueva la entrada.
+
+Modo (variable de entorno HTTP_CACHE_MODE):
+    normal   (por defecto) usa la caché mientras no venza el TTL
+    refresh  ignora el TTL y revalida siempre (sigue guardando)
+    offline  responde solo desde la caché, sin red; un fallo de caché es un error
+    off      desactiva la caché
+
+Uso:
+    from http_cache import cached_get, TTL_CATALOG
+
+    response = cached_get(url, params={'f': 'json'}, ttl=TTL_CATALOG, timeout=15)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import http_client
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CACHE_DIR = Path(os.environ.get('HTTP_CACHE_DIR') or PROJECT_ROOT / 'data' / 'http_cache')
+CACHE_MODE = os.environ.get('HTTP_CACHE_MODE', 'normal').lower()
+
+MODE_NORMAL = 'normal'
+MODE_REFRESH = 'refresh'
+MODE_OFFLINE = 'offline'
+MODE_OFF = 'off'
+
+# TTL por clase de endpoint (segundos)
+TTL_CATALOG = 7 * 24 * 3600  # Catálogos de servicios / carpetas: cambian muy rara vez
+TTL_SERVICE = 24 * 3600  # Descripción de MapServer / capas
+TTL_METADATA = 6 * 3600  # Metadatos de datasets Socrata (rowsUpdatedAt, accessPoints)
+
+
+class CacheMissError(requests.exceptions.RequestException):
+    """Respuesta no disponible en caché estando en modo offline."""
+
+
+def cache_key(url: str, params: Optional[Dict] = None) -> str:
+    """Clave estable de la entrada: hash de la URL y los parámetros ordenados."""
+    canonical = json.dumps([url, sorted((params or {}).items())], ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def _load_entry(key: str) -> Optional[Dict]:
+    path = _entry_path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_entry(key: str, entry: Dict) -> None:
+    path = _entry_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: varios hilos/escáneres pueden compartir la caché
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _to_response(entry: Dict) -> requests.Response:
+    """Reconstruye un requests.Response desde una entrada, para que los llamadores no cambien."""
+    response = requests.Response()
+    response.status_code = entry.get('status', 200)
+    response._content = entry['body'].encode('utf-8')
+    response.encoding = 'utf-8'
+    response.url = entry['url']
+    response.headers = CaseInsensitiveDict(entry.get('headers') or {})
+    response.from_cache = True
+    return response
+
+
+def _is_arcgis_error(response: requests.Response) -> bool:
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    return isinstance(data, dict) and 'error' in data
+
+
+def cached_get(url: str, params: Optional[Dict] = None, ttl: float = TTL_SERVICE,
+               headers: Optional[Dict] = None, **kwargs) -> requests.Response:
+    """
+    GET con caché en disco y revalidación condicional.
+
+    Args:
+        url: URL completa
+        params: Parámetros de la query (forman parte de la clave)
+        ttl: Segundos durante los que la entrada se usa sin consultar al servidor
+        headers: Headers adicionales de la petición
+        **kwargs: Resto de argumentos para http_client.get (timeout, retries, ...)
+
+    Returns:
+        requests.Response (con atributo from_cache=True si salió de la caché)
+
+    Raises:
+        CacheMissError: En modo offline, si la URL no está en caché
+    """
+    if CACHE_MODE == MODE_OFF:
+        return http_client.get(url, params=params, headers=headers, **kwargs)
+
+    key = cache_key(url, params)
+    entry = _load_entry(key)
+
+    if CACHE_MODE == MODE_OFFLINE:
+        if entry is None:
+            raise CacheMissError(f"Sin caché para {url} (HTTP_CACHE_MODE=offline)")
+        return _to_response(entry)
+
+    if entry is not None and CACHE_MODE != MODE_REFRESH and time.time() - entry['fetched_at'] < ttl:
+        return _to_response(entry)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+    response = http_client.get(url, params=params, headers=request_headers, **kwargs)
+
+    if response.status_code == 304 and entry is not None:
+        entry['fetched_at'] = time.time()
+        _save_entry(key, entry)
+        return _to_response(entry)
+
+    # Solo se guardan respuestas completas; los errores de ArcGIS llegan con 200
+    # y {"error": ...}, así que tampoco se guardan para no fijar un fallo transitorio
+    if response.status_code == 200 and not _is_arcgis_error(response):
+        _save_entry(key, {
+            'url': url,
+            'params': params or {},
+            'fetched_at': time.time(),
+            'status': 200,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'headers': {'Content-Type': response.headers.get('Content-Type', 'application/json')},
+            'body': response.text,
+        })
+    response.from_cache = False
+    return response
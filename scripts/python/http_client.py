@@ -0,0 +1,170 @@
+"""
+Cliente HTTP compartido por los scripts de scripts/python.
+
+Mantiene una sesión con keep-alive por host (sig.simur.gov.co, datos.gov.co,
+dim.movilidadbogota.gov.co, geocode.arcgis.com, ...) para reutilizar las
+conexiones TCP+TLS entre peticiones, y centraliza timeouts, reintentos con
+backoff exponencial + jitter, negociación gzip y los headers comunes
+(User-Agent, X-App-Token de Socrata).
+
+Uso:
+    from http_client import get, post, socrata_headers
+
+    response = get(url, params={...}, timeout=15)
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 15  # Segundos, si el llamador no especifica otro
+MAX_RETRIES = 3  # Reintentos ante errores de conexión, timeouts y RETRY_STATUSES
+BACKOFF_FACTOR = 0.5  # Espera base: BACKOFF_FACTOR * 2^intento
+BACKOFF_JITTER = 0.5  # Jitter aleatorio máximo (segundos) sumado a cada espera
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_MAXSIZE = 32  # Conexiones keep-alive por host
+MAX_REQUESTS_PER_HOST = 4  # Peticiones simultáneas por host para descargas en paralelo
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+# Token de aplicación de Socrata (opcional, pero puede ser necesario para algunos datasets)
+# Para obtener un token: https://dev.socrata.com/register
+SOCRATA_APP_TOKEN = os.environ.get('SOCRATA_APP_TOKEN')
+SOCRATA_APP_SECRET = os.environ.get('SOCRATA_APP_SECRET')
+
+_sessions: Dict[str, requests.Session] = {}
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """Retorna la sesión (pool keep-alive) del host de la URL, creándola si no existe."""
+    host = urlparse(url).netloc
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _sessions[host] = session
+        return session
+
+
+def get_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Retorna el semáforo que limita la concurrencia hacia el host de la URL."""
+    host = urlparse(url).netloc
+    with _lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(MAX_REQUESTS_PER_HOST)
+        return _host_semaphores[host]
+
+
+class TokenBucket:
+    """
+    Presupuesto de peticiones por segundo (token bucket), seguro entre hilos.
+
+    Se recargan `rate` fichas por segundo hasta `capacity` (ráfaga máxima);
+    acquire() toma una ficha y bloquea hasta que haya una disponible.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def socrata_headers(accept: str = 'application/json') -> Dict[str, str]:
+    """Headers para datos.gov.co / Socrata, con el token de aplicación si está configurado."""
+    headers = {'Accept': accept}
+    if SOCRATA_APP_TOKEN:
+        headers['X-App-Token'] = SOCRATA_APP_TOKEN
+    if SOCRATA_APP_SECRET:
+        headers['X-App-Secret'] = SOCRATA_APP_SECRET
+    return headers
+
+
+def _backoff_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """Espera antes del reintento: Retry-After si el servidor lo indica, si no backoff exponencial con jitter."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, BACKOFF_JITTER)
+
+
+def request(method: str, url: str, timeout: Optional[float] = None,
+            retries: Optional[int] = None, limiter: Optional[TokenBucket] = None,
+            **kwargs) -> requests.Response:
+    """
+    Ejecuta una petición por la sesión del host con reintentos.
+
+    Reintenta errores de conexión, timeouts y respuestas RETRY_STATUSES. No llama
+    a raise_for_status: la respuesta final (o la excepción del último intento)
+    se entrega al llamador igual que con requests.
+
+    Args:
+        method: Método HTTP
+        url: URL completa
+        timeout: Timeout en segundos (DEFAULT_TIMEOUT si no se indica)
+        retries: Reintentos máximos (MAX_RETRIES si no se indica)
+        limiter: TokenBucket del que se toma una ficha antes de cada intento,
+            reintentos incluidos (presupuesto por proveedor)
+        **kwargs: Argumentos de requests (params, data, headers, stream, ...)
+    """
+    session = get_session(url)
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    retries = MAX_RETRIES if retries is None else retries
+
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= retries:
+                raise
+            time.sleep(_backoff_delay(attempt))
+            continue
+
+        if response.status_code in RETRY_STATUSES and attempt < retries:
+            delay = _backoff_delay(attempt, response)
+            response.close()
+            time.sleep(delay)
+            continue
+        return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET por el cliente compartido (ver request)."""
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST por el cliente compartido (ver request)."""
+    return request('POST', url, **kwargs)
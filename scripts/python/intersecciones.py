@@ -0,0 +1,162 @@
+"""
+Geocodificador local de intersecciones por nomenclatura vial de Bogotá.
+
+La mayoría de direcciones del diccionario DIM son códigos de intersección
+como "AK_45_X_CL_245", y los nodos ya georreferenciados (Red_Semaforica_SIMUR
+con su DIRECCION, estudios Socrata, ...) traen etiquetas equivalentes como
+"AK 45 X CL 245" o "Avenida Carrera 45 con Calle 245". Ambas se reducen a la
+misma clave: el par ordenado de vías canónicas (tipo, número), con AK/AC
+como KR/CL del mismo eje.
+
+IntersectionIndex indexa los nodos conocidos por esa clave y resuelve una
+dirección con una consulta a un dict, sin red; los geocodificadores remotos
+quedan como respaldo para lo que no esté indexado.
+
+Uso:
+    from intersecciones import IntersectionIndex
+
+    index = IntersectionIndex()
+    for feature in features:
+        index.add_feature(feature)
+    result = index.lookup("AK_45_X_CL_245")  # {'lat', 'lng', 'score', 'address', 'provider'} o None
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Tipo de vía canónico por abreviatura/nombre (las avenidas siguen el eje numérico de KR/CL)
+VIA_TYPES = {
+    'KR': 'KR', 'KRA': 'KR', 'CRA': 'KR', 'CR': 'KR', 'CARRERA': 'KR', 'AK': 'KR',
+    'CL': 'CL', 'CLL': 'CL', 'CALLE': 'CL', 'AC': 'CL',
+    'DG': 'DG', 'DIAG': 'DG', 'DIAGONAL': 'DG',
+    'TV': 'TV', 'TR': 'TV', 'TRANSV': 'TV', 'TRANSVERSAL': 'TV',
+}
+AVENUE_WORDS = ('AV', 'AVENIDA')  # "Avenida Carrera 45" = AK 45
+SUFFIX_LETTERS = 'ABCDFGH'  # Letras de número de vía ("45A"); E/S se leen como cuadrante
+QUADRANTS = {'SUR': 'SUR', 'S': 'SUR', 'ESTE': 'ESTE', 'E': 'ESTE'}
+LOCAL_SCORE = 100  # Coincidencia exacta con un nodo georreferenciado
+MAX_SPREAD_DEG = 0.003  # ~330 m: si los nodos de una clave están más dispersos, la clave es ambigua
+EXCLUDED_ORIGINS = ('DIM_Estudios_Geocodificado',)  # Ubicados por geocodificación remota: no son referencia
+
+Via = Tuple[str, str]
+IntersectionKey = Tuple[Via, Via]
+
+_TOKEN_RE = re.compile(r'[A-Z]+|\d+')
+
+
+def _tokens(text: str) -> List[str]:
+    text = unicodedata.normalize('NFKD', str(text).upper())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text)
+
+
+def parse_intersection(text: str) -> Optional[IntersectionKey]:
+    """
+    Clave canónica de una intersección, o None si el texto no nombra dos vías con número.
+
+    "AK_45_X_CL_245", "CL 245 X KR 45" y "Avenida Carrera 45 con Calle 245"
+    dan (('CL', '245'), ('KR', '45')). Sufijos de letra, BIS y cuadrante
+    (SUR/ESTE) forman parte del número: ('CL', '10ABIS SUR').
+    """
+    if not text:
+        return None
+    tokens = _tokens(text)
+    vias: List[Via] = []
+    i = 0
+    while i < len(tokens) and len(vias) < 2:
+        token = tokens[i]
+        via_type = VIA_TYPES.get(token)
+        if token in AVENUE_WORDS and i + 1 < len(tokens) and tokens[i + 1] in VIA_TYPES:
+            i += 1
+            via_type = VIA_TYPES[tokens[i]]
+        if via_type is None or i + 1 >= len(tokens) or not tokens[i + 1].isdigit():
+            i += 1
+            continue
+        i += 2
+        number = str(int(tokens[i - 1]))
+        # Letra(s) y BIS: "45A", "45 A BIS", "45 BIS A"
+        while i < len(tokens) and (tokens[i] == 'BIS' or (len(tokens[i]) == 1 and tokens[i] in SUFFIX_LETTERS)):
+            number += tokens[i]
+            i += 1
+        if i < len(tokens) and tokens[i] in QUADRANTS:
+            number += ' ' + QUADRANTS[tokens[i]]
+            i += 1
+        via = (via_type, number)
+        if via not in vias:
+            vias.append(via)
+    if len(vias) < 2:
+        return None
+    return tuple(sorted(vias))
+
+
+def format_key(key: IntersectionKey) -> str:
+    """Etiqueta legible de una clave: "CL 245 X KR 45"."""
+    return ' X '.join(f"{via_type} {number}" for via_type, number in key)
+
+
+class IntersectionIndex:
+    """
+    Nodos georreferenciados por clave de intersección (coordenada promedio por clave).
+
+    Las claves cuyos nodos se dispersan más de MAX_SPREAD_DEG (p. ej. la misma
+    nomenclatura en otro municipio) no se resuelven localmente.
+    """
+
+    def __init__(self):
+        # clave -> [suma lon, suma lat, n, min lon, min lat, max lon, max lat]
+        self._points: Dict[IntersectionKey, List[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def add(self, text: str, lon: float, lat: float) -> bool:
+        """Indexa un punto por la intersección que nombra text; False si no es una intersección."""
+        key = parse_intersection(text)
+        if key is None:
+            return False
+        entry = self._points.get(key)
+        if entry is None:
+            self._points[key] = [lon, lat, 1, lon, lat, lon, lat]
+            return True
+        entry[0] += lon
+        entry[1] += lat
+        entry[2] += 1
+        entry[3] = min(entry[3], lon)
+        entry[4] = min(entry[4], lat)
+        entry[5] = max(entry[5], lon)
+        entry[6] = max(entry[6], lat)
+        return True
+
+    def add_feature(self, feature: Dict) -> bool:
+        """Indexa un feature de nodos_unificados por su nombre (o DIRECCION en raw_data)."""
+        props = feature.get('properties') or {}
+        geometry = feature.get('geometry') or {}
+        coords = geometry.get('coordinates')
+        if geometry.get('type') != 'Point' or not coords or props.get('origen') in EXCLUDED_ORIGINS:
+            return False
+        raw = props.get('raw_data') or {}
+        for text in (props.get('nombre'), raw.get('DIRECCION')):
+            if text and self.add(text, float(coords[0]), float(coords[1])):
+                return True
+        return False
+
+    def add_features(self, features: Iterable[Dict]) -> int:
+        return sum(1 for feature in features if self.add_feature(feature))
+
+    def lookup(self, address: str) -> Optional[Dict]:
+        """Resultado con el formato de los geocodificadores remotos, o None si no está indexada."""
+        key = parse_intersection(address)
+        entry = self._points.get(key) if key else None
+        if entry is None:
+            return None
+        lon_sum, lat_sum, count, min_lon, min_lat, max_lon, max_lat = entry
+        if max(max_lon - min_lon, max_lat - min_lat) > MAX_SPREAD_DEG:
+            return None
+        return {
+            'lat': lat_sum / count,
+            'lng': lon_sum / count,
+            'score': LOCAL_SCORE,
+            'address': format_key(key),
+            'provider': 'local',
+        }
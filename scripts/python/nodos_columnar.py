@@ -0,0 +1,271 @@
+"""
+Formato columnar binario para nodos_unificados (nodos_unificados.bin).
+
+El GeoJSON lleva en cada feature su raw_data completo y el mapa solo necesita
+coordenadas, id, nombre, origen, tipo y color para arrancar. Este módulo escribe
+junto al GeoJSON:
+
+- nodos_unificados.bin: columnas binarias little-endian
+    coords   float32[2N]   lon, lat intercalados (~1 m de precisión en Bogotá)
+    origen   uint16[N]     índice en header.dictionaries.origen
+    tipo     uint16[N]     índice en header.dictionaries.tipo
+    color    uint16[N]     índice en header.dictionaries.color
+    id       uint32[N+1] offsets + bytes UTF-8
+    nombre   uint32[N+1] offsets + bytes UTF-8
+    props    uint32[N+1] offsets + JSON UTF-8 del resto de propiedades ("" si no hay)
+- nodos_unificados_raw/NN.json: raw_data por id, repartido en RAW_SHARDS
+  archivos según FNV-1a 32 del id, para pedirlo bajo demanda desde el front.
+
+Estructura del .bin: b'NUC1', uint32 largo del header, header JSON (UTF-8,
+rellenado a múltiplo de 4) y luego las secciones; header.sections indica
+offset absoluto, largo en bytes y tipo de cada una.
+Lector de referencia: src/services/nodosUnificadosService.js.
+"""
+
+import json
+import os
+import shutil
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, Optional
+
+MAGIC = b'NUC1'
+FORMAT_VERSION = 1
+RAW_SHARDS = 64  # Archivos de raw_data; ~1/64 del total por consulta de detalle
+DICTIONARY_COLUMNS = ('origen', 'tipo', 'color')
+STRING_COLUMNS = ('id', 'nombre')
+CORE_PROPERTIES = set(DICTIONARY_COLUMNS) | set(STRING_COLUMNS) | {'raw_data'}
+
+
+def columnar_paths(geojson_file: str):
+    """Rutas del .bin y de la carpeta de raw_data derivadas del GeoJSON."""
+    base = geojson_file[:-len('.json')] if geojson_file.endswith('.json') else geojson_file
+    return f"{base}.bin", f"{base}_raw"
+
+
+def raw_shard(node_id: str, shards: int = RAW_SHARDS) -> int:
+    """Shard de raw_data de un id (FNV-1a 32 sobre UTF-8; el front usa la misma función)."""
+    h = 0x811c9dc5
+    for byte in str(node_id).encode('utf-8'):
+        h ^= byte
+        h = (h * 0x01000193) & 0xFFFFFFFF
+    return h % shards
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pad4(data: bytes) -> bytes:
+    return data + b'\0' * (-len(data) % 4)
+
+
+class _StringColumn:
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.data = bytearray()
+
+    def append(self, value: Optional[str]) -> None:
+        self.data += (value or '').encode('utf-8')
+        self.offsets.append(len(self.data))
+
+
+def _write_atomic(path: str, chunks) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def write_columnar(features: Iterable[Dict], geojson_file: str, shards: int = RAW_SHARDS) -> Dict:
+    """
+    Escribe nodos_unificados.bin y los shards de raw_data a partir de los features.
+
+    Solo se incluyen features con geometría Point; los demás se cuentan como omitidos.
+    raw_data se escribe a los shards a medida que llega (no se acumula en memoria),
+    en una carpeta temporal que reemplaza a la carpeta de shards al final.
+
+    Args:
+        features: Iterable de features GeoJSON normalizados
+        geojson_file: Ruta del GeoJSON de referencia (define las rutas de salida)
+        shards: Número de archivos de raw_data
+
+    Returns:
+        dict con count, skipped, bin_file, raw_dir y bin_bytes
+    """
+    bin_file, raw_dir = columnar_paths(geojson_file)
+
+    coords = array('f')
+    codes = {name: array('H') for name in DICTIONARY_COLUMNS}
+    dictionaries = {name: [] for name in DICTIONARY_COLUMNS}
+    lookup = {name: {} for name in DICTIONARY_COLUMNS}
+    strings = {name: _StringColumn() for name in STRING_COLUMNS}
+    props = _StringColumn()
+    count = skipped = 0
+
+    tmp_raw_dir = f"{raw_dir}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_raw_dir):
+        shutil.rmtree(tmp_raw_dir)
+    os.makedirs(tmp_raw_dir)
+    shard_files = [open(os.path.join(tmp_raw_dir, f"{shard:02d}.json"), 'w', encoding='utf-8')
+                   for shard in range(shards)]
+    shard_counts = [0] * shards
+
+    try:
+        for feature in features:
+            geometry = feature.get('geometry') or {}
+            point = geometry.get('coordinates')
+            if geometry.get('type') != 'Point' or not point or len(point) < 2:
+                skipped += 1
+                continue
+            properties = feature.get('properties') or {}
+            node_id = str(properties.get('id', count))
+
+            coords.append(float(point[0]))
+            coords.append(float(point[1]))
+            for name in DICTIONARY_COLUMNS:
+                value = properties.get(name)
+                value = '' if value is None else str(value)
+                if value not in lookup[name]:
+                    if len(dictionaries[name]) >= 0xFFFF:
+                        raise ValueError(f"Demasiados valores distintos de '{name}' para uint16")
+                    lookup[name][value] = len(dictionaries[name])
+                    dictionaries[name].append(value)
+                codes[name].append(lookup[name][value])
+            strings['id'].append(node_id)
+            strings['nombre'].append(properties.get('nombre'))
+
+            extra = {key: value for key, value in properties.items() if key not in CORE_PROPERTIES}
+            props.append(json.dumps(extra, ensure_ascii=False, separators=(',', ':')) if extra else '')
+
+            if properties.get('raw_data') is not None:
+                shard = raw_shard(node_id, shards)
+                shard_files[shard].write(('{' if not shard_counts[shard] else ',')
+                                         + json.dumps(node_id, ensure_ascii=False) + ':'
+                                         + json.dumps(properties['raw_data'], ensure_ascii=False, separators=(',', ':')))
+                shard_counts[shard] += 1
+            count += 1
+
+        for shard_file, shard_count in zip(shard_files, shard_counts):
+            shard_file.write('}' if shard_count else '{}')
+    except BaseException:
+        for shard_file in shard_files:
+            shard_file.close()
+        shutil.rmtree(tmp_raw_dir, ignore_errors=True)
+        raise
+    for shard_file in shard_files:
+        shard_file.close()
+
+    sections = [('coords', 'float32', _little_endian(coords))]
+    sections += [(name, 'uint16', _little_endian(codes[name])) for name in DICTIONARY_COLUMNS]
+    for name, column in list(strings.items()) + [('props', props)]:
+        sections.append((f"{name}_offsets", 'uint32', _little_endian(column.offsets)))
+        sections.append((f"{name}_data", 'utf8', bytes(column.data)))
+
+    header = {
+        'version': FORMAT_VERSION,
+        'count': count,
+        'generated_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'dictionaries': dictionaries,
+        'raw': {'dir': os.path.basename(raw_dir), 'shards': shards, 'hash': 'fnv1a32'},
+        'sections': {},
+    }
+    # Los offsets dependen del largo del header y viceversa: se itera hasta que se estabilizan
+    header_bytes = b''
+    while True:
+        offset = 8 + len(header_bytes)
+        for name, dtype, data in sections:
+            header['sections'][name] = {'offset': offset, 'length': len(data), 'type': dtype}
+            offset += len(_pad4(data))
+        encoded = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        encoded += b' ' * (-len(encoded) % 4)
+        if len(encoded) == len(header_bytes):
+            header_bytes = encoded
+            break
+        header_bytes = encoded
+
+    output_dir = os.path.dirname(bin_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    _write_atomic(bin_file, [MAGIC, struct.pack('<I', len(header_bytes)), header_bytes]
+                  + [_pad4(data) for _, _, data in sections])
+
+    # Reemplazo de la carpeta de shards completa
+    old_raw_dir = f"{raw_dir}.{os.getpid()}.old"
+    if os.path.exists(raw_dir):
+        os.replace(raw_dir, old_raw_dir)
+    os.replace(tmp_raw_dir, raw_dir)
+    if os.path.exists(old_raw_dir):
+        shutil.rmtree(old_raw_dir)
+
+    return {
+        'count': count,
+        'skipped': skipped,
+        'bin_file': bin_file,
+        'raw_dir': raw_dir,
+        'bin_bytes': os.path.getsize(bin_file),
+    }
+
+
+def save_columnar(features: Iterable[Dict], geojson_file: str) -> bool:
+    """Escribe el formato columnar junto al GeoJSON, informando tamaños; no interrumpe el proceso si falla."""
+    try:
+        stats = write_columnar(features, geojson_file)
+        print(f"[OK] Formato columnar guardado: {stats['bin_file']} ({stats['count']:,} nodos, "
+              f"{stats['bin_bytes'] / (1024 * 1024):.2f} MB)")
+        print(f"[OK] raw_data por id en: {stats['raw_dir']}/ ({RAW_SHARDS} archivos)")
+        if stats['skipped']:
+            print(f"[INFO] {stats['skipped']:,} features sin geometría Point omitidos del formato columnar")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error al guardar el formato columnar: {e}")
+        return False
+
+
+def read_columnar(bin_file: str) -> Dict:
+    """
+    Lee un nodos_unificados.bin completo (para verificación y scripts).
+
+    Returns:
+        dict con header y columnas decodificadas (listas por nombre de columna)
+    """
+    with open(bin_file, 'rb') as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{bin_file} no es un archivo {MAGIC.decode()}")
+    header_length = struct.unpack_from('<I', data, 4)[0]
+    header = json.loads(data[8:8 + header_length].decode('utf-8'))
+    sections = header['sections']
+
+    def section(name, typecode):
+        info = sections[name]
+        values = array(typecode)
+        values.frombytes(data[info['offset']:info['offset'] + info['length']])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values
+
+    def strings(name):
+        offsets = section(f"{name}_offsets", 'I')
+        info = sections[f"{name}_data"]
+        blob = data[info['offset']:info['offset'] + info['length']]
+        return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    coords = section('coords', 'f')
+    columns = {
+        'lon': list(coords[0::2]),
+        'lat': list(coords[1::2]),
+        'id': strings('id'),
+        'nombre': strings('nombre'),
+        'props': [json.loads(p) if p else {} for p in strings('props')],
+    }
+    for name in DICTIONARY_COLUMNS:
+        dictionary = header['dictionaries'][name]
+        columns[name] = [dictionary[code] for code in section(name, 'H')]
+    return {'header': header, 'columns': columns}
@@ -0,0 +1,181 @@
+"""
+Fusión espacial de nodos de distintas fuentes.
+
+Red_Semaforica_SIMUR, Sensores_Velocidad, Socrata_Estudios y
+DIM_Estudios_Geocodificado describen muchas veces la misma intersección con
+ids distintos. merge_nearby_nodes agrupa los features que están a menos de un
+radio (en metros) y los fusiona en un solo nodo con la lista `sources`.
+
+Algoritmo: los features se ordenan por prioridad de fuente (O(n log n)); cada
+uno se une al líder más cercano dentro del radio que aún no tenga un miembro
+de su misma fuente, o pasa a ser líder. Los líderes se guardan en una grilla
+de celdas del tamaño del radio, así que cada búsqueda revisa 3x3 celdas
+(O(1) promedio). La posición del líder no se mueve, por lo que no hay
+encadenamiento de nodos a lo largo de una vía.
+
+El nodo fusionado conserva geometría, id, nombre, tipo, color y raw_data del
+líder; `sources` lista cada fuente (incluido el líder) con su origen, id, tipo
+y distancia al líder (SOURCE_FIELDS). El raw_data de las fuentes absorbidas no
+se copia: inflaría cada feature y la columna props del formato columnar. Un
+nodo que ya trae `sources` (de una corrida anterior) se trata como grupo ya
+fusionado.
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+MERGE_RADIUS_M = 30.0  # Radio de fusión por defecto (metros)
+SOURCE_PRIORITY = (  # La primera fuente presente en un grupo define posición e id
+    'Red_Semaforica_SIMUR',
+    'Sensores_Velocidad',
+    'DIM_Estudios_Geocodificado',
+    'Socrata_Estudios',
+)
+SOURCE_FIELDS = ('origen', 'id', 'tipo')  # Campos de cada entrada de `sources` (más distancia_m)
+REFERENCE_LAT = 4.65  # Latitud de referencia (Bogotá) para la proyección local
+
+METERS_PER_DEG_LAT = 110574.0
+METERS_PER_DEG_LON = 111320.0 * math.cos(math.radians(REFERENCE_LAT))
+
+
+def _project(lon: float, lat: float) -> Tuple[float, float]:
+    """Proyección equirectangular local a metros (error < 1% en el rango de Colombia)."""
+    return lon * METERS_PER_DEG_LON, lat * METERS_PER_DEG_LAT
+
+
+class GridIndex:
+    """
+    Índice espacial de grilla uniforme sobre coordenadas proyectadas en metros.
+
+    Args:
+        cell_size: Lado de la celda en metros (usar el radio de búsqueda)
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._points: List[Tuple[float, float]] = []
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def insert(self, x: float, y: float) -> int:
+        """Agrega un punto y devuelve su índice."""
+        index = len(self._points)
+        self._points.append((x, y))
+        self._cells.setdefault(self._cell(x, y), []).append(index)
+        return index
+
+    def within(self, x: float, y: float, radius: float) -> List[Tuple[float, int]]:
+        """Puntos a distancia <= radius, como (distancia, índice) ordenados por distancia."""
+        cx, cy = self._cell(x, y)
+        reach = max(1, int(math.ceil(radius / self.cell_size)))
+        found = []
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for index in self._cells.get((i, j), ()):
+                    px, py = self._points[index]
+                    distance = math.hypot(px - x, py - y)
+                    if distance <= radius:
+                        found.append((distance, index))
+        found.sort()
+        return found
+
+
+def _source_entry(properties: Dict, distance: float) -> Dict:
+    """Entrada de `sources` desde las propiedades de un nodo o una entrada anterior."""
+    entry = {field: properties.get(field) for field in SOURCE_FIELDS}
+    entry['distancia_m'] = round(distance, 1)
+    return entry
+
+
+def _priority(feature: Dict, source_priority: Sequence[str]) -> int:
+    origen = (feature.get('properties') or {}).get('origen')
+    return source_priority.index(origen) if origen in source_priority else len(source_priority)
+
+
+def source_ids(feature: Dict) -> List[str]:
+    """Ids de todas las fuentes de un nodo (solo el propio si no está fusionado)."""
+    properties = feature.get('properties') or {}
+    ids = [str(source['id']) for source in properties.get('sources') or [] if source.get('id') is not None]
+    if properties.get('id') is not None and str(properties['id']) not in ids:
+        ids.insert(0, str(properties['id']))
+    return ids
+
+
+def merge_nearby_nodes(features: Iterable[Dict], radius_m: float = MERGE_RADIUS_M,
+                       source_priority: Sequence[str] = SOURCE_PRIORITY) -> Tuple[List[Dict], Dict]:
+    """
+    Fusiona features de distintas fuentes que están a menos de radius_m metros.
+
+    Los features sin geometría Point se conservan sin cambios.
+
+    Returns:
+        tuple: (features resultantes, estadísticas {input, output, fused, groups})
+    """
+    features = list(features)
+    order = sorted(range(len(features)), key=lambda i: (_priority(features[i], source_priority), i))
+
+    index = GridIndex(radius_m)
+    leaders: List[Dict] = []  # Por líder: feature, fuentes presentes, miembros
+    result_slots: List[Optional[int]] = [None] * len(features)  # Posición original -> líder
+    passthrough = set()
+    fused = 0
+
+    for position in order:
+        feature = features[position]
+        geometry = feature.get('geometry') or {}
+        point = geometry.get('coordinates')
+        if geometry.get('type') != 'Point' or not point or len(point) < 2:
+            passthrough.add(position)
+            continue
+        properties = feature.get('properties') or {}
+        existing_sources = properties.get('sources') or []
+        origins = {source.get('origen') for source in existing_sources} or {properties.get('origen')}
+        x, y = _project(float(point[0]), float(point[1]))
+
+        target = None
+        for _, leader_index in index.within(x, y, radius_m):
+            if not origins & leaders[leader_index]['origins']:
+                target = leader_index
+                break
+
+        if target is None:
+            result_slots[position] = index.insert(x, y)
+            leaders.append({'feature': feature, 'origins': set(origins), 'members': [], 'xy': (x, y)})
+            continue
+
+        leader = leaders[target]
+        distance = math.hypot(x - leader['xy'][0], y - leader['xy'][1])
+        if existing_sources:
+            leader['members'].extend(_source_entry(source, distance) for source in existing_sources)
+        else:
+            leader['members'].append(_source_entry(properties, distance))
+        leader['origins'] |= origins
+        fused += 1
+
+    # Reconstruir en el orden original (líderes y features sin geometría)
+    merged = []
+    groups = 0
+    for position, feature in enumerate(features):
+        if position in passthrough:
+            merged.append(feature)
+            continue
+        leader_index = result_slots[position]
+        if leader_index is None:
+            continue
+        leader = leaders[leader_index]
+        properties = dict(feature.get('properties') or {})
+        if not leader['members'] and not properties.get('sources'):
+            merged.append(feature)
+            continue
+        # Las entradas de corridas anteriores también se reducen a SOURCE_FIELDS
+        sources = [_source_entry(source, source.get('distancia_m') or 0.0)
+                   for source in properties.get('sources') or [properties]]
+        properties['sources'] = sources + leader['members']
+        merged.append(dict(feature, properties=properties))
+        if leader['members']:
+            groups += 1
+
+    stats = {'input': len(features), 'output': len(merged), 'fused': fused, 'groups': groups}
+    return merged, stats
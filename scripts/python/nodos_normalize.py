@@ -0,0 +1,185 @@
+"""
+Normalización por lotes de coordenadas y geometrías.
+
+Los normalizadores convertían y validaban lat/lon registro por registro (float()
+con try/except anidados) y reconstruían las listas de coordenadas Esri punto
+por punto. Este módulo procesa una página completa de una vez:
+
+- validate_coordinates: conversión a float, descarte de vacíos, no numéricos,
+  NaN/infinito, ceros y puntos fuera del bbox, con conteo por motivo.
+- esri_geometry_to_geojson: conversión Esri -> GeoJSON (paths/rings por arreglo).
+
+Con NumPy instalado (pip install numpy) todo se hace con operaciones sobre
+arreglos; sin NumPy se usa un recorrido en Python puro con el mismo resultado.
+
+Uso:
+    from nodos_normalize import COLOMBIA_BBOX, validate_coordinates
+
+    valid, lons, lats, rejected = validate_coordinates(lon_values, lat_values, COLOMBIA_BBOX)
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: se usa el recorrido en Python puro
+    np = None
+
+# (lon_min, lat_min, lon_max, lat_max)
+COLOMBIA_BBOX = (-80.0, 3.0, -73.0, 7.0)  # Rango amplio usado para Socrata (Bogotá y Medellín)
+BOGOTA_BBOX = (-74.5, 3.7, -73.9, 4.9)  # Distrito Capital incluyendo Sumapaz
+
+# Motivos de descarte, en el orden en que se evalúan
+REASON_MISSING = 'sin_coordenadas'
+REASON_NOT_NUMERIC = 'no_numerico'
+REASON_NOT_FINITE = 'no_finito'
+REASON_ZERO = 'cero'
+REASON_OUT_OF_RANGE = 'fuera_de_rango'
+REJECTION_REASONS = (REASON_MISSING, REASON_NOT_NUMERIC, REASON_NOT_FINITE, REASON_ZERO, REASON_OUT_OF_RANGE)
+
+HAS_NUMPY = np is not None
+
+
+def _to_float(value) -> Tuple[Optional[float], Optional[str]]:
+    """Convierte un valor a float; (None, motivo) si no se puede."""
+    if value is None or value == '':
+        return None, REASON_MISSING
+    try:
+        return float(value), None
+    except (ValueError, TypeError):
+        return None, REASON_NOT_NUMERIC
+
+
+def _validate_python(lons: Sequence, lats: Sequence, bbox: Optional[Tuple[float, float, float, float]]):
+    rejected = dict.fromkeys(REJECTION_REASONS, 0)
+    valid, out_lons, out_lats = [], [], []
+    for i, (raw_lon, raw_lat) in enumerate(zip(lons, lats)):
+        lon, lon_reason = _to_float(raw_lon)
+        lat, lat_reason = _to_float(raw_lat)
+        reason = None
+        if lon_reason or lat_reason:
+            reason = REASON_MISSING if REASON_MISSING in (lon_reason, lat_reason) else REASON_NOT_NUMERIC
+        elif not (math.isfinite(lon) and math.isfinite(lat)):
+            reason = REASON_NOT_FINITE
+        elif lon == 0 or lat == 0:
+            reason = REASON_ZERO
+        elif bbox and not (bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]):
+            reason = REASON_OUT_OF_RANGE
+        if reason:
+            rejected[reason] += 1
+            continue
+        valid.append(i)
+        out_lons.append(lon)
+        out_lats.append(lat)
+    return valid, out_lons, out_lats, rejected
+
+
+def _parse_column(values: Sequence):
+    """Arreglo float64 de una columna y máscaras de vacíos y no numéricos."""
+    column = np.asarray(values, dtype=object)
+    missing = (np.equal(column, None) | np.equal(column, '')).astype(bool)
+    filled = np.where(missing, 'nan', column)
+    try:
+        parsed = filled.astype(np.float64)
+        not_numeric = np.zeros(len(column), dtype=bool)
+    except (ValueError, TypeError):
+        # Algún valor no es numérico: se convierte por elemento solo esta columna
+        parsed = np.empty(len(column), dtype=np.float64)
+        not_numeric = np.zeros(len(column), dtype=bool)
+        for i, value in enumerate(filled):
+            try:
+                parsed[i] = float(value)
+            except (ValueError, TypeError):
+                parsed[i] = np.nan
+                not_numeric[i] = True
+    return parsed, missing, not_numeric
+
+
+def _validate_numpy(lons: Sequence, lats: Sequence, bbox: Optional[Tuple[float, float, float, float]]):
+    lon, lon_missing, lon_bad = _parse_column(lons)
+    lat, lat_missing, lat_bad = _parse_column(lats)
+
+    # Cada registro se cuenta en el primer motivo que lo descarta
+    remaining = np.ones(len(lon), dtype=bool)
+    rejected = {}
+    masks = [
+        (REASON_MISSING, lon_missing | lat_missing),
+        (REASON_NOT_NUMERIC, lon_bad | lat_bad),
+        (REASON_NOT_FINITE, ~(np.isfinite(lon) & np.isfinite(lat))),
+        (REASON_ZERO, (lon == 0) | (lat == 0)),
+    ]
+    if bbox:
+        with np.errstate(invalid='ignore'):
+            inside = (lon >= bbox[0]) & (lon <= bbox[2]) & (lat >= bbox[1]) & (lat <= bbox[3])
+        masks.append((REASON_OUT_OF_RANGE, ~inside))
+    else:
+        rejected[REASON_OUT_OF_RANGE] = 0
+    for reason, mask in masks:
+        hit = remaining & mask
+        rejected[reason] = int(hit.sum())
+        remaining &= ~mask
+
+    valid = np.flatnonzero(remaining)
+    return valid.tolist(), lon[valid].tolist(), lat[valid].tolist(), {r: rejected[r] for r in REJECTION_REASONS}
+
+
+def validate_coordinates(lons: Sequence, lats: Sequence,
+                         bbox: Optional[Tuple[float, float, float, float]] = None,
+                         use_numpy: Optional[bool] = None) -> Tuple[List[int], List[float], List[float], Dict[str, int]]:
+    """
+    Valida y convierte a float columnas de longitud y latitud de un lote.
+
+    Args:
+        lons: Longitudes (str, números o None) por registro
+        lats: Latitudes (str, números o None) por registro
+        bbox: (lon_min, lat_min, lon_max, lat_max) opcional
+        use_numpy: Forzar (True) o evitar (False) NumPy; por defecto si está instalado
+
+    Returns:
+        tuple: (índices válidos, longitudes válidas, latitudes válidas, descartes por motivo)
+    """
+    if len(lons) != len(lats):
+        raise ValueError("Las columnas de longitud y latitud tienen distinto largo")
+    if use_numpy is None:
+        use_numpy = HAS_NUMPY
+    if use_numpy and not HAS_NUMPY:
+        raise ImportError("NumPy no está instalado (pip install numpy)")
+    if not len(lons):
+        return [], [], [], dict.fromkeys(REJECTION_REASONS, 0)
+    if use_numpy:
+        return _validate_numpy(lons, lats, bbox)
+    return _validate_python(lons, lats, bbox)
+
+
+def _xy_list(coords: List) -> List[List[float]]:
+    """[[x, y], ...] descartando z/m."""
+    if HAS_NUMPY and coords:
+        return np.asarray(coords, dtype=np.float64)[:, :2].tolist()
+    return [[c[0], c[1]] for c in coords]
+
+
+def esri_geometry_to_geojson(geometry: Optional[Dict]) -> Optional[Dict]:
+    """
+    Convierte una geometría Esri JSON (x/y, paths, rings) a GeoJSON.
+
+    Returns:
+        dict GeoJSON o None si no hay geometría reconocible
+    """
+    if not geometry:
+        return None
+    if "x" in geometry and "y" in geometry:
+        return {"type": "Point", "coordinates": [geometry.get("x"), geometry.get("y")]}
+    if "paths" in geometry:
+        paths = geometry.get("paths", [])
+        if len(paths) == 1:
+            return {"type": "LineString", "coordinates": _xy_list(paths[0])}
+        return {"type": "MultiLineString", "coordinates": [_xy_list(path) for path in paths]}
+    if "rings" in geometry:
+        return {"type": "Polygon", "coordinates": [_xy_list(ring) for ring in geometry.get("rings", [])]}
+    return None
+
+
+def format_rejections(rejected: Dict[str, int]) -> str:
+    """Texto 'motivo: n, ...' con los motivos que tienen descartes."""
+    return ", ".join(f"{reason}: {count:,}" for reason, count in rejected.items() if count)
@@ -0,0 +1,86 @@
+"""
+Publicación de nodos_unificados.json y sus derivados en public/data.
+
+El front lee de public/data el GeoJSON y, si están, sus derivados (formato
+columnar .bin + carpeta _raw y pirámide de teselas _tiles). Los scripts que
+reescriben el GeoJSON llaman a refresh_derivatives, que los regenera leyendo
+el archivo ya escrito en streaming, y los que lo publican llaman a
+publish_nodes, que enlaza el GeoJSON y los derivados juntos.
+
+Un derivado más viejo que el GeoJSON (su generación falló o no se corrió) no
+se publica y se borra su copia de public/data: el front vuelve al GeoJSON en
+lugar de mostrar nodos desactualizados.
+
+Uso:
+    from nodos_publish import publish_nodes, refresh_derivatives
+
+    refresh_derivatives(output_file)
+    publish_nodes(output_file)
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import List
+
+from geojson_io import iter_features, link_or_copy, link_or_copy_tree
+from nodos_columnar import columnar_paths, save_columnar
+from nodos_tiles import TILE_PROPERTIES, save_tiles, tiles_dir_for
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+PUBLIC_DIR = str(PROJECT_ROOT / "public" / "data")
+
+
+def derivative_paths(geojson_file: str) -> List[str]:
+    """Archivos y carpetas derivados del GeoJSON que se publican con él."""
+    bin_file, raw_dir = columnar_paths(geojson_file)
+    return [bin_file, raw_dir, tiles_dir_for(geojson_file)]
+
+
+def refresh_derivatives(geojson_file: str, columnar: bool = True, tiles: bool = True) -> bool:
+    """
+    Regenera los derivados junto al GeoJSON releyéndolo en streaming.
+
+    Returns:
+        bool: True si todos los derivados pedidos se generaron
+    """
+    ok = True
+    if columnar:
+        ok = save_columnar(iter_features(geojson_file), geojson_file) and ok
+    if tiles:
+        ok = save_tiles(iter_features(geojson_file, properties=TILE_PROPERTIES), geojson_file) and ok
+    return ok
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def publish_nodes(geojson_file: str, public_dir: str = PUBLIC_DIR) -> str:
+    """
+    Publica el GeoJSON y sus derivados al día en public_dir (enlace duro; copia si no se puede).
+
+    Returns:
+        str: Ruta del GeoJSON publicado
+    """
+    public_file = os.path.join(public_dir, os.path.basename(geojson_file))
+    mode = link_or_copy(geojson_file, public_file)
+    print(f"[OK] Archivo publicado en: {public_file} ({'enlace duro' if mode == 'link' else 'copia'})")
+
+    geojson_mtime = os.path.getmtime(geojson_file)
+    for derivative in derivative_paths(geojson_file):
+        target = os.path.join(public_dir, os.path.basename(derivative))
+        if not os.path.exists(derivative) or os.path.getmtime(derivative) < geojson_mtime:
+            if os.path.exists(target):
+                _remove(target)
+                print(f"[WARNING] {derivative} no está al día con el GeoJSON; eliminado de public/data: {target}")
+            continue
+        if os.path.isdir(derivative):
+            mode = link_or_copy_tree(derivative, target)
+        else:
+            mode = link_or_copy(derivative, target)
+        print(f"[OK] Derivado publicado en: {target} ({'enlace duro' if mode == 'link' else 'copia'})")
+    return public_file
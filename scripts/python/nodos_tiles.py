@@ -0,0 +1,193 @@
+"""
+Pirámide de teselas z/x/y para la capa de nodos unificados.
+
+Reparte los nodos en teselas slippy-map (Web Mercator, como OSM/ArcGIS) para
+que el mapa cargue solo las teselas visibles en lugar de todo
+nodos_unificados.json:
+
+- Zooms MIN_ZOOM..CLUSTER_MAX_ZOOM: clusters precalculados. Cada tesela se
+  divide en CLUSTER_GRID x CLUSTER_GRID celdas; cada celda con nodos es un
+  cluster con su centroide, el total y el conteo por tipo.
+- DETAIL_ZOOM: nodos individuales (id, nombre, tipo, origen, color, lon, lat).
+  Para zooms mayores el cliente usa las teselas de DETAIL_ZOOM que cubren la vista.
+
+Salida (junto al GeoJSON): nodos_unificados_tiles/{z}/{x}/{y}.json e index.json
+con los zooms, los límites y el número de nodos de cada tesela existente.
+
+Uso:
+    python scripts/python/nodos_tiles.py [ruta/nodos_unificados.json]
+"""
+
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from geojson_io import iter_features
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_GEOJSON = str(PROJECT_ROOT / "public" / "data" / "nodos_unificados.json")
+
+MIN_ZOOM = 10  # Bogotá completa en pocas teselas
+CLUSTER_MAX_ZOOM = 13  # Último zoom con clusters
+DETAIL_ZOOM = 14  # Zoom de las teselas con nodos individuales
+CLUSTER_GRID = 8  # Celdas por lado dentro de cada tesela de clusters (potencia de 2)
+COORD_DECIMALS = 6
+TILE_PROPERTIES = ('id', 'nombre', 'tipo', 'origen', 'color')  # Propiedades que usan las teselas
+
+_GRID_SHIFT = int(math.log2(CLUSTER_GRID))
+
+
+def tiles_dir_for(geojson_file: str) -> str:
+    """Carpeta de teselas derivada del GeoJSON."""
+    base = geojson_file[:-len('.json')] if geojson_file.endswith('.json') else geojson_file
+    return f"{base}_tiles"
+
+
+def lonlat_to_tile(lon: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """Tesela slippy-map (x, y) que contiene el punto en el zoom dado."""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    n = 1 << zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    lat_rad = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def _write_json(path: str, data: Dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def build_tile_pyramid(features: Iterable[Dict], tiles_dir: str) -> Dict:
+    """
+    Construye la pirámide de teselas y su índice.
+
+    La pirámide se escribe en una carpeta temporal que reemplaza a tiles_dir al
+    final, de modo que el mapa nunca ve una mezcla de teselas viejas y nuevas.
+
+    Returns:
+        dict con el índice escrito (index.json)
+    """
+    # (z, celda_x, celda_y) -> [suma_lon, suma_lat, total, {tipo: n}]
+    clusters = {}
+    detail = {}
+    tipos = {}
+    bounds = [180.0, 90.0, -180.0, -90.0]
+    total = 0
+
+    for feature in features:
+        geometry = feature.get('geometry') or {}
+        point = geometry.get('coordinates')
+        if geometry.get('type') != 'Point' or not point or len(point) < 2:
+            continue
+        lon, lat = float(point[0]), float(point[1])
+        properties = feature.get('properties') or {}
+        tipo = properties.get('tipo') or 'UNKNOWN'
+
+        total += 1
+        tipos[tipo] = tipos.get(tipo, 0) + 1
+        bounds = [min(bounds[0], lon), min(bounds[1], lat), max(bounds[2], lon), max(bounds[3], lat)]
+
+        for zoom in range(MIN_ZOOM, CLUSTER_MAX_ZOOM + 1):
+            cell = (zoom,) + lonlat_to_tile(lon, lat, zoom + _GRID_SHIFT)
+            entry = clusters.get(cell)
+            if entry is None:
+                entry = clusters[cell] = [0.0, 0.0, 0, {}]
+            entry[0] += lon
+            entry[1] += lat
+            entry[2] += 1
+            entry[3][tipo] = entry[3].get(tipo, 0) + 1
+
+        tile = lonlat_to_tile(lon, lat, DETAIL_ZOOM)
+        detail.setdefault(tile, []).append({
+            'id': properties.get('id'),
+            'nombre': properties.get('nombre'),
+            'tipo': properties.get('tipo'),
+            'origen': properties.get('origen'),
+            'color': properties.get('color'),
+            'lon': round(lon, COORD_DECIMALS),
+            'lat': round(lat, COORD_DECIMALS),
+        })
+
+    # Agrupar celdas por tesela
+    cluster_tiles = {}
+    for (zoom, cell_x, cell_y), (sum_lon, sum_lat, count, by_tipo) in clusters.items():
+        tile = (zoom, cell_x >> _GRID_SHIFT, cell_y >> _GRID_SHIFT)
+        cluster_tiles.setdefault(tile, []).append({
+            'lon': round(sum_lon / count, COORD_DECIMALS),
+            'lat': round(sum_lat / count, COORD_DECIMALS),
+            'count': count,
+            'tipos': by_tipo,
+        })
+
+    tmp_dir = f"{tiles_dir}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+    index_tiles = {str(zoom): {} for zoom in range(MIN_ZOOM, CLUSTER_MAX_ZOOM + 1)}
+    index_tiles[str(DETAIL_ZOOM)] = {}
+    for (zoom, x, y), tile_clusters in cluster_tiles.items():
+        _write_json(os.path.join(tmp_dir, str(zoom), str(x), f"{y}.json"),
+                    {'z': zoom, 'x': x, 'y': y, 'clusters': tile_clusters})
+        index_tiles[str(zoom)][f"{x}/{y}"] = sum(c['count'] for c in tile_clusters)
+    for (x, y), tile_features in detail.items():
+        _write_json(os.path.join(tmp_dir, str(DETAIL_ZOOM), str(x), f"{y}.json"),
+                    {'z': DETAIL_ZOOM, 'x': x, 'y': y, 'features': tile_features})
+        index_tiles[str(DETAIL_ZOOM)][f"{x}/{y}"] = len(tile_features)
+
+    index = {
+        'version': 1,
+        'generated_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'scheme': 'xyz',
+        'min_zoom': MIN_ZOOM,
+        'cluster_max_zoom': CLUSTER_MAX_ZOOM,
+        'detail_zoom': DETAIL_ZOOM,
+        'total': total,
+        'bounds': bounds if total else None,
+        'tipos': tipos,
+        'tiles': index_tiles,
+    }
+    _write_json(os.path.join(tmp_dir, 'index.json'), index)
+
+    # Reemplazo de la carpeta completa
+    old_dir = f"{tiles_dir}.{os.getpid()}.old"
+    if os.path.exists(tiles_dir):
+        os.replace(tiles_dir, old_dir)
+    os.replace(tmp_dir, tiles_dir)
+    if os.path.exists(old_dir):
+        shutil.rmtree(old_dir)
+    return index
+
+
+def save_tiles(features: Iterable[Dict], geojson_file: str) -> bool:
+    """Genera la pirámide junto al GeoJSON, informando el resultado; no interrumpe el proceso si falla."""
+    tiles_dir = tiles_dir_for(geojson_file)
+    try:
+        index = build_tile_pyramid(features, tiles_dir)
+        tile_count = sum(len(tiles) for tiles in index['tiles'].values())
+        print(f"[OK] Teselas generadas: {tiles_dir} ({tile_count:,} teselas, zooms "
+              f"{index['min_zoom']}-{index['cluster_max_zoom']} clusters, {index['detail_zoom']} detalle)")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Error al generar teselas: {e}")
+        return False
+
+
+def main():
+    geojson_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_GEOJSON
+    if not os.path.exists(geojson_file):
+        print(f"[ERROR] Archivo no encontrado: {geojson_file}")
+        return False
+    print(f"[INFO] Generando teselas desde: {geojson_file}")
+    return save_tiles(iter_features(geojson_file, properties=TILE_PROPERTIES), geojson_file)
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
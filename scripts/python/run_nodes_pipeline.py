@@ -0,0 +1,302 @@
+"""
+Pipeline de nodos unificados en una sola pasada.
+
+Encadena en memoria las etapas que antes eran scripts separados, cada uno
+leyendo y reescribiendo nodos_unificados.json completo:
+
+    arcgis   descarga ArcGIS (download_unified_nodes.py); si no se elige, se parte
+             del nodos_unificados.json existente leído en streaming
+    socrata  agrega registros de Socrata con id nuevo (download_nodes_from_socrata.py)
+    merge    fusiona nodos cercanos de distintas fuentes (nodos_merge.py)
+    filter   deja solo Bogotá y etiqueta localidad/UPZ (filter_bogota_only.py)
+    geocode  incorpora la capa nodos_geocodificados.json y agrega nodos del diccionario
+             de estudios geocodificados (geocode_missing_nodes.py)
+    publish  escribe el GeoJSON una sola vez, el formato columnar, las teselas
+             y lo publica en public/data (enlace duro); sin esta etapa es una
+             corrida en seco
+
+Si una fuente elegida falla o no entrega nodos (una capa ArcGIS, Socrata o,
+sin arcgis, el nodos_unificados.json existente), publish no escribe nada y
+quedan los archivos anteriores (incluida la capa nodos_geocodificados.json):
+publicar sin esa fuente borraría sus nodos. --allow-partial publica igual.
+
+Las etapas son generadores encadenados: los features pasan de a uno salvo en
+merge, que necesita el conjunto completo. Cada etapa se cronometra aparte
+(tiempo propio, sin contar el de las etapas anteriores).
+
+Uso:
+    python scripts/python/run_nodes_pipeline.py
+    python scripts/python/run_nodes_pipeline.py --stages=filter,publish
+    python scripts/python/run_nodes_pipeline.py --skip=geocode
+    python scripts/python/run_nodes_pipeline.py --skip=socrata --allow-partial
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from download_nodes_from_socrata import iter_socrata_feature_pages, new_nodes
+from download_unified_nodes import OUTPUT_FILE, PROJECT_ROOT, SOURCES, iter_source_pages
+from filter_bogota_only import filter_bogota_features, load_bogota_boundary, new_filter_stats
+from geocode_missing_nodes import (OVERLAY_FILE, PROGRESS_FILE, PUBLIC_OVERLAY_FILE, build_geocoded_feature,
+                                   find_missing_nodes, geocode_nodes)
+from geojson_io import GeoJSONWriter, iter_features
+from intersecciones import IntersectionIndex
+from nodos_merge import MERGE_RADIUS_M, merge_nearby_nodes, source_ids
+from nodos_publish import publish_nodes, refresh_derivatives
+
+STAGES = ('arcgis', 'socrata', 'merge', 'filter', 'geocode', 'publish')
+STUDIES_FILE = str(PROJECT_ROOT / "src" / "data" / "studies_dictionary.json")
+GEOCODE_PROGRESS_FILE = PROGRESS_FILE
+WRITE_COLUMNAR = True  # Escribir nodos_unificados.bin + raw_data por id en publish
+WRITE_TILES = True  # Escribir la pirámide de teselas en publish
+ALLOW_PARTIAL = '--allow-partial' in sys.argv  # Publicar aunque falle una fuente o no queden nodos
+
+
+class TimedStage:
+    """
+    Envuelve el iterador de una etapa y acumula el tiempo pasado dentro de él.
+
+    El tiempo medido incluye el de las etapas anteriores (que se ejecutan al
+    pedirles features); own_seconds lo descuenta.
+    """
+
+    def __init__(self, name: str, iterator: Iterator[Dict], upstream: Optional["TimedStage"] = None):
+        self.name = name
+        self.iterator = iterator
+        self.upstream = upstream
+        self.seconds = 0.0
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Dict:
+        start = time.perf_counter()
+        try:
+            feature = next(self.iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.count += 1
+        return feature
+
+    @property
+    def own_seconds(self) -> float:
+        return self.seconds - (self.upstream.seconds if self.upstream else 0.0)
+
+
+def stage_arcgis(failed_sources: List[str]) -> Iterator[Dict]:
+    for source_config in SOURCES:
+        count = 0
+        for page in iter_source_pages(source_config):
+            count += len(page)
+            yield from page
+        if not count:
+            failed_sources.append(source_config["name"])
+
+
+def stage_load(input_file: str, failed_sources: List[str]) -> Iterator[Dict]:
+    if not os.path.exists(input_file):
+        print(f"[WARNING] {input_file} no existe; el pipeline parte sin nodos")
+        failed_sources.append(os.path.basename(input_file))
+        return
+    count = 0
+    for feature in iter_features(input_file):
+        count += 1
+        yield feature
+    if not count:
+        failed_sources.append(os.path.basename(input_file))
+
+
+def stage_socrata(features: Iterable[Dict], failed_sources: List[str]) -> Iterator[Dict]:
+    known_ids = set()
+    for feature in features:
+        known_ids.update(source_ids(feature))
+        yield feature
+    counts = {'new': 0, 'duplicates': 0}
+    for page in iter_socrata_feature_pages():
+        yield from new_nodes(page, known_ids, counts)
+    if not counts['new'] and not counts['duplicates']:
+        failed_sources.append('Socrata')
+    print(f"[OK] Socrata: {counts['new']:,} nodos nuevos, {counts['duplicates']:,} duplicados omitidos")
+
+
+def stage_merge(features: Iterable[Dict]) -> Iterator[Dict]:
+    merged, stats = merge_nearby_nodes(features, radius_m=MERGE_RADIUS_M)
+    print(f"[OK] Fusión: {stats['fused']:,} nodos fusionados en {stats['groups']:,} grupos "
+          f"({stats['input']:,} -> {stats['output']:,} nodos)")
+    yield from merged
+
+
+def stage_filter(features: Iterable[Dict]) -> Iterator[Dict]:
+    zonas = load_bogota_boundary()
+    stats = new_filter_stats()
+    yield from filter_bogota_features(features, zonas, stats)
+    print(f"[OK] Filtro Bogotá: {sum(stats['after'].values()):,} conservados, {stats['removed']:,} eliminados")
+
+
+def stage_geocode(features: Iterable[Dict]) -> Iterator[Dict]:
+    map_node_ids = set()
+    local_index = IntersectionIndex()
+    for feature in features:
+        map_node_ids.update(source_ids(feature))
+        local_index.add_feature(feature)
+        yield feature
+    # Nodos de la capa nodos_geocodificados.json que aún no están en el stream: pasan
+    # al archivo principal aunque no haya diccionario o falle la geocodificación
+    if os.path.exists(OVERLAY_FILE):
+        folded = 0
+        for feature in iter_features(OVERLAY_FILE):
+            ids = source_ids(feature)
+            if map_node_ids.intersection(ids):
+                continue
+            map_node_ids.update(ids)
+            local_index.add_feature(feature)
+            folded += 1
+            yield feature
+        print(f"[OK] Capa {os.path.basename(OVERLAY_FILE)}: {folded:,} nodos incorporados")
+    if not os.path.exists(STUDIES_FILE):
+        print(f"[WARNING] {STUDIES_FILE} no existe; se omite la geocodificación")
+        return
+    with open(STUDIES_FILE, 'r', encoding='utf-8') as f:
+        studies_nodes = json.load(f)['nodes']
+    missing_nodes = find_missing_nodes(studies_nodes, map_node_ids)
+    print(f"[INFO] Geocodificación: {len(missing_nodes):,} nodos del diccionario sin ubicar en el mapa")
+    if not missing_nodes:
+        return
+    geocoded_nodes, failed_nodes, pending = geocode_nodes(missing_nodes, GEOCODE_PROGRESS_FILE, local_index)
+    print(f"\n[OK] Geocodificación: {len(geocoded_nodes):,} nodos agregados, {len(failed_nodes):,} fallidos")
+    if len(pending) == len(geocoded_nodes) + len(failed_nodes) and os.path.exists(GEOCODE_PROGRESS_FILE):
+        os.remove(GEOCODE_PROGRESS_FILE)
+    for node_info in geocoded_nodes:
+        yield build_geocoded_feature(node_info)
+
+
+def publish(features: Iterable[Dict], stages: List[str], failed_sources: List[str]) -> int:
+    """
+    Escribe el GeoJSON final una sola vez y los derivados; devuelve el número de features.
+
+    Los derivados se generan releyendo el archivo escrito en streaming
+    (nodos_publish.refresh_derivatives): publish no retiene los features.
+    Si alguna fuente falló (failed_sources, se completa al consumir el stream)
+    o no quedan features, descarta lo escrito y devuelve 0 salvo con ALLOW_PARTIAL.
+    """
+    origin_counts = {}
+    with GeoJSONWriter(OUTPUT_FILE, metadata={}) as writer:
+        for feature in features:
+            writer.write(feature)
+            origen = feature.get('properties', {}).get('origen', 'UNKNOWN')
+            origin_counts[origen] = origin_counts.get(origen, 0) + 1
+        if (failed_sources or not writer.count) and not ALLOW_PARTIAL:
+            writer.abort()
+            if failed_sources:
+                print(f"\n[ERROR] Fuentes sin nodos: {', '.join(failed_sources)}")
+            else:
+                print("\n[ERROR] El pipeline no produjo nodos")
+            print(f"[ERROR] No se publicó nada; {OUTPUT_FILE} y sus derivados quedan como estaban "
+                  f"(--allow-partial publica igual)")
+            return 0
+        if failed_sources:
+            print(f"\n[WARNING] Fuentes sin nodos: {', '.join(failed_sources)}; se publica igual (--allow-partial)")
+        writer.metadata = {
+            "sources": list(origin_counts.keys()),
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "pipeline_stages": stages,
+        }
+    print(f"\n[OK] Archivo guardado: {OUTPUT_FILE} ({writer.count:,} features, "
+          f"{os.path.getsize(OUTPUT_FILE) / (1024 * 1024):.2f} MB)")
+    refresh_derivatives(OUTPUT_FILE, columnar=WRITE_COLUMNAR, tiles=WRITE_TILES)
+    publish_nodes(OUTPUT_FILE)
+    
+    if 'geocode' in stages:
+        # La etapa geocode incorporó al stream los nodos de la capa
+        # nodos_geocodificados.json y el archivo principal que los contiene ya
+        # se escribió y publicó: la capa sobra
+        for overlay in (OVERLAY_FILE, PUBLIC_OVERLAY_FILE):
+            if os.path.exists(overlay):
+                os.remove(overlay)
+                print(f"[OK] Capa incorporada al archivo principal, eliminada: {overlay}")
+    return writer.count
+
+
+def parse_stages(argv: List[str]) -> List[str]:
+    """Etapas pedidas con --stages=a,b y/o --skip=c, en el orden de STAGES."""
+    selected = list(STAGES)
+    for arg in argv:
+        if arg.startswith('--stages='):
+            selected = [s.strip() for s in arg.split('=', 1)[1].split(',') if s.strip()]
+        elif arg.startswith('--skip='):
+            skipped = {s.strip() for s in arg.split('=', 1)[1].split(',')}
+            selected = [s for s in selected if s not in skipped]
+    unknown = [s for s in selected if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Etapas desconocidas: {', '.join(unknown)} (disponibles: {', '.join(STAGES)})")
+    return [s for s in STAGES if s in selected]
+
+
+def main():
+    stages = parse_stages(sys.argv[1:])
+    print("\n" + "=" * 80)
+    print("PIPELINE DE NODOS UNIFICADOS")
+    print(f"Etapas: {', '.join(stages)}")
+    print("=" * 80 + "\n")
+
+    transforms = {
+        'merge': stage_merge,
+        'filter': stage_filter,
+        'geocode': stage_geocode,
+    }
+    failed_sources = []
+    if 'arcgis' in stages:
+        stream = TimedStage('arcgis', stage_arcgis(failed_sources))
+    else:
+        stream = TimedStage('load', stage_load(OUTPUT_FILE, failed_sources))
+    timed = [stream]
+    for name in stages:
+        if name == 'socrata':
+            stream = TimedStage(name, stage_socrata(stream, failed_sources), upstream=stream)
+            timed.append(stream)
+        elif name in transforms:
+            stream = TimedStage(name, transforms[name](stream), upstream=stream)
+            timed.append(stream)
+
+    total_start = time.perf_counter()
+    if 'publish' in stages:
+        publish_start = time.perf_counter()
+        count = publish(stream, stages, failed_sources)
+        publish_seconds = time.perf_counter() - publish_start - stream.seconds
+    else:
+        count = sum(1 for _ in stream)
+        publish_seconds = None
+        print(f"\n[INFO] Sin etapa publish: {count:,} features procesados, no se escribió ningún archivo")
+        if failed_sources:
+            print(f"[WARNING] Fuentes sin nodos: {', '.join(failed_sources)}")
+    total_seconds = time.perf_counter() - total_start
+
+    print("\n" + "=" * 80)
+    print("TIEMPOS POR ETAPA")
+    print("=" * 80)
+    for stage in timed:
+        print(f"  {stage.name:<8} {stage.own_seconds:8.2f} s   {stage.count:>10,} features")
+    if publish_seconds is not None:
+        print(f"  {'publish':<8} {publish_seconds:8.2f} s   {count:>10,} features")
+    print("-" * 80)
+    print(f"  {'total':<8} {total_seconds:8.2f} s")
+    print("=" * 80 + "\n")
+    return 'publish' not in stages or count > 0
+
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n\n[INFO] Proceso interrumpido por el usuario")
+        exit(1)
+    except Exception as e:
+        print(f"\n[ERROR] Error fatal: {e}")
+        import traceback
+        traceback.print_exc()
+        exit(1)
@@ -1,11 +1,24 @@
 """
 Script de Escaneo de Servicios SIMUR
 Busca la capa "Nodo contrato de monitoreo" en el catálogo de servicios de SIMUR
+
+Recorre el catálogo completo (carpetas → servicios → capas) en paralelo y
+guarda un catálogo estructurado en data/simur_catalog.json.
 """
 
-import requests
 import json
+import os
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+from http_cache import TTL_CATALOG, TTL_METADATA, TTL_SERVICE, cached_get
+from http_client import get_host_semaphore
+
+# Raíz del repo (scripts/python -> scripts -> raíz)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+CATALOG_FILE = str(PROJECT_ROOT / "data" / "simur_catalog.json")
 
 # URLs base del catálogo de servicios SIMUR
 BASE_URLS = [
@@ -14,6 +27,9 @@ BASE_URLS = [
     "https://sig.simur.gov.co/arcgis/rest/services"
 ]
 
+CRAWL_MAX_WORKERS = 8  # Hilos del crawler; por host los limita http_client.MAX_REQUESTS_PER_HOST
+LAYER_SERVICE_TYPES = ('MapServer', 'FeatureServer')  # Tipos de servicio que exponen capas
+
 # Palabras clave para identificar capas relevantes
 KEYWORDS = [
     'contrato', 'monitoreo', 'nodo', 'nodos',
@@ -57,202 +73,238 @@ def matches_keywords(text, keywords):
     return False
 
 
-def get_services_catalog(base_url):
-    """Obtiene el catálogo de servicios desde la URL base."""
-    try:
-        url = f"{base_url}?f=json"
-        print(f"\n{Colors.CYAN}{'='*80}{Colors.RESET}")
-        print(f"{Colors.BOLD}ESCANEANDO CATÁLOGO DE SERVICIOS{Colors.RESET}")
-        print(f"{Colors.CYAN}{'='*80}{Colors.RESET}")
-        print(f"URL: {url}\n")
-        
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'error' in data:
-            print(f"{Colors.RED}[ERROR] Error en la respuesta: {data['error']}{Colors.RESET}")
-            return []
-        
-        services = data.get('services', [])
-        print(f"{Colors.GREEN}[OK] Se encontraron {len(services)} servicios{Colors.RESET}\n")
-        return services
-        
-    except requests.exceptions.RequestException as e:
-        print(f"{Colors.RED}[ERROR] Error al obtener catálogo: {e}{Colors.RESET}")
-        return []
-    except Exception as e:
-        print(f"{Colors.RED}[ERROR] Error inesperado: {e}{Colors.RESET}")
-        return []
+def services_root(url):
+    """Retorna la raíz .../rest/services de una URL del catálogo."""
+    marker = '/rest/services'
+    idx = url.find(marker)
+    return url[:idx + len(marker)] if idx >= 0 else url.rstrip('/')
 
 
-def get_service_layers(service_url):
-    """Obtiene las capas de un servicio específico."""
-    try:
-        layers_url = f"{service_url}/layers?f=json"
-        response = requests.get(layers_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'error' in data:
-            return []
-        
-        return data.get('layers', [])
-        
-    except Exception:
-        return []
+def is_candidate_name(name):
+    """Indica si un nombre de capa o servicio coincide con las palabras clave o la búsqueda específica."""
+    return matches_keywords(name, KEYWORDS) or any(
+        normalize_text(keyword) in normalize_text(name)
+        for keyword in SPECIFIC_SEARCH
+    )
 
 
-def get_service_info(service_url):
-    """Obtiene información del servicio directamente."""
+def fetch_catalog_json(url, ttl):
+    """
+    Pide {url}?f=json por la caché HTTP, limitando la concurrencia por host.
+
+    Returns:
+        dict con la respuesta, o None si falla o ArcGIS responde con error
+    """
     try:
-        info_url = f"{service_url}?f=json"
-        response = requests.get(info_url, timeout=10)
+        with get_host_semaphore(url):
+            response = cached_get(url, params={'f': 'json'}, ttl=ttl, timeout=15)
         response.raise_for_status()
         data = response.json()
-        
-        if 'error' in data:
-            return None
-        
-        return data
     except Exception:
         return None
+    if 'error' in data:
+        return None
+    return data
 
 
-def scan_service(service, base_url=None):
-    """Escanea un servicio individual buscando capas relevantes."""
-    service_name = service.get('name', 'Sin nombre')
-    service_type = service.get('type', 'Unknown')
-    
-    # Construir URL correcta
-    if base_url:
-        if service_name.startswith(base_url.split('/')[-1] + '/'):
-            # Ya incluye el prefijo
-            service_url = f"https://sig.simur.gov.co/arcgis/rest/services/{service_name}"
-        else:
-            service_url = f"{base_url}/{service_name}"
-    else:
-        # Intentar construir desde el nombre completo
-        if '/' in service_name:
-            service_url = f"https://sig.simur.gov.co/arcgis/rest/services/{service_name}"
-        else:
-            service_url = f"https://sig.simur.gov.co/arcgis/rest/services/{service_name}"
-    
-    print(f"{Colors.BLUE}{'-'*80}{Colors.RESET}")
-    print(f"{Colors.BOLD}Servicio: {service_name}{Colors.RESET}")
-    print(f"  Tipo: {service_type}")
-    print(f"  URL: {service_url}")
-    
-    # Intentar obtener información del servicio
-    service_info = get_service_info(service_url)
-    
-    # Obtener capas del servicio (método 1: /layers)
-    layers = get_service_layers(service_url)
-    
-    # Si no hay capas en /layers, intentar obtener desde service_info
-    if not layers and service_info:
-        if 'layers' in service_info:
-            layers = service_info['layers']
-        elif 'subLayers' in service_info:
-            layers = service_info['subLayers']
-    
-    # Si aún no hay capas, intentar escanear capas directamente (0-10)
-    if not layers:
-        print(f"  {Colors.YELLOW}[INFO] Intentando escanear capas directamente (0-10)...{Colors.RESET}")
-        for layer_id in range(11):
-            try:
-                layer_url = f"{service_url}/{layer_id}?f=json"
-                response = requests.get(layer_url, timeout=8)
-                if response.ok:
-                    layer_data = response.json()
-                    if 'error' not in layer_data and 'name' in layer_data:
-                        layer_name = layer_data.get('name', f'Capa {layer_id}')
-                        # Verificar si coincide con keywords
-                        if matches_keywords(layer_name, KEYWORDS) or any(
-                            normalize_text(keyword) in normalize_text(layer_name) 
-                            for keyword in SPECIFIC_SEARCH
-                        ):
-                            layers.append({
-                                'id': layer_id,
-                                'name': layer_name,
-                                'type': layer_data.get('type', 'Unknown')
-                            })
-                            print(f"    {Colors.GREEN}✓ Capa {layer_id}: {layer_name}{Colors.RESET}")
-                        else:
-                            print(f"    Capa {layer_id}: {layer_name}")
-            except Exception:
-                pass
-            time.sleep(0.2)
-    
-    if not layers:
-        print(f"  {Colors.YELLOW}[INFO] No se encontraron capas o el servicio no expone capas{Colors.RESET}")
-        # Verificar si el nombre del servicio coincide con keywords o búsqueda específica
-        service_matches = matches_keywords(service_name, KEYWORDS) or any(
-            normalize_text(keyword) in normalize_text(service_name) 
-            for keyword in SPECIFIC_SEARCH
-        )
-        if service_matches:
-            print(f"\n  {Colors.RED}{Colors.BOLD}{'!'*40}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}¡CANDIDATO ENCONTRADO! (Servicio completo){Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}  Servicio: {service_name}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}  URL: {service_url}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}{'!'*40}{Colors.RESET}\n")
-            return [{
-                'service_name': service_name,
-                'service_url': service_url,
-                'layer_id': 0,
-                'layer_name': service_name,
-                'layer_type': service_type,
-                'layer_url': service_url
-            }]
-        return []
-    
-    print(f"  {Colors.GREEN}Capas encontradas: {len(layers)}{Colors.RESET}")
-    
+def crawl_folder(folder_url):
+    """
+    Lee una carpeta del catálogo.
+
+    Returns:
+        Tupla (datos, subcarpetas, servicios) donde subcarpetas es una lista de
+        URLs y servicios una lista de (url, nombre, tipo). Los nombres de
+        ArcGIS son relativos a la raíz rest/services, así que la URL de cada
+        servicio es la misma sin importar desde qué carpeta se llegó a él.
+    """
+    data = fetch_catalog_json(folder_url, TTL_CATALOG)
+    if data is None:
+        return None, [], []
+    root = services_root(folder_url)
+    folders = [f"{root}/{name}" for name in data.get('folders', [])]
+    services = [
+        (f"{root}/{service['name']}/{service['type']}", service['name'], service['type'])
+        for service in data.get('services', [])
+        if service.get('name') and service.get('type')
+    ]
+    return data, folders, services
+
+
+def describe_layer(service_url, layer):
+    """Entrada del catálogo para una capa o tabla de un servicio."""
+    return {
+        'id': layer.get('id'),
+        'name': layer.get('name', 'Sin nombre'),
+        'type': layer.get('type', 'Unknown'),
+        'geometryType': layer.get('geometryType'),
+        'url': f"{service_url}/{layer.get('id')}",
+    }
+
+
+def crawl_service(service_url, service_name, service_type):
+    """
+    Describe un servicio y sus capas.
+
+    Usa /layers (una sola petición con nombre, tipo y geometría de todas las
+    capas y tablas) y, si el servidor no lo expone, la raíz del servicio.
+    """
+    record = {'name': service_name, 'type': service_type, 'url': service_url, 'layers': [], 'tables': []}
+    if service_type not in LAYER_SERVICE_TYPES:
+        return record
+
+    data = fetch_catalog_json(f"{service_url}/layers", TTL_SERVICE)
+    if data is None:
+        data = fetch_catalog_json(service_url, TTL_SERVICE)
+    if data is None:
+        record['error'] = 'Sin respuesta de /layers ni de la raíz del servicio'
+        return record
+
+    record['layers'] = [describe_layer(service_url, layer) for layer in data.get('layers', [])]
+    record['tables'] = [describe_layer(service_url, table) for table in data.get('tables', [])]
+    return record
+
+
+def crawl_catalog(root_urls, max_workers=CRAWL_MAX_WORKERS):
+    """
+    Recorre carpetas → servicios → capas como una cola de trabajo concurrente.
+
+    Cada carpeta o servicio se visita una sola vez aunque sea alcanzable desde
+    varias URLs raíz (p. ej. DatosAbiertos directamente y bajo la raíz).
+
+    Returns:
+        dict con el catálogo: carpetas visitadas, servicios con sus capas y estadísticas
+    """
+    seen = set()
+    folders = []
+    services = []
+    failed_folders = []
+    started = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def enqueue(kind, url, *args):
+            if url in seen:
+                return
+            seen.add(url)
+            task = crawl_folder if kind == 'folder' else crawl_service
+            pending[executor.submit(task, url, *args)] = (kind, url)
+
+        for root_url in root_urls:
+            enqueue('folder', root_url.rstrip('/'))
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, url = pending.pop(future)
+                if kind == 'folder':
+                    data, subfolders, folder_services = future.result()
+                    if data is None:
+                        failed_folders.append(url)
+                        print(f"{Colors.YELLOW}[WARNING] No se pudo leer la carpeta {url}{Colors.RESET}")
+                        continue
+                    folders.append(url)
+                    print(f"{Colors.CYAN}[CARPETA] {url}: {len(folder_services)} servicios, {len(subfolders)} subcarpetas{Colors.RESET}")
+                    for subfolder_url in subfolders:
+                        enqueue('folder', subfolder_url)
+                    for service_url, service_name, service_type in folder_services:
+                        enqueue('service', service_url, service_name, service_type)
+                else:
+                    record = future.result()
+                    services.append(record)
+                    if 'error' in record:
+                        print(f"  {Colors.YELLOW}[WARNING] {record['name']} ({record['type']}): {record['error']}{Colors.RESET}")
+                    else:
+                        print(f"  [OK] {record['name']} ({record['type']}): {len(record['layers'])} capas, {len(record['tables'])} tablas")
+
+    services.sort(key=lambda s: (s['name'], s['type']))
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'roots': list(root_urls),
+        'folders': sorted(folders),
+        'failed_folders': sorted(failed_folders),
+        'services': services,
+        'stats': {
+            'folders': len(folders),
+            'services': len(services),
+            'layers': sum(len(s['layers']) for s in services),
+            'tables': sum(len(s['tables']) for s in services),
+            'elapsed_seconds': round(time.time() - started, 2),
+        },
+    }
+
+
+def save_catalog(catalog, output_file=CATALOG_FILE):
+    """Guarda el catálogo estructurado como JSON."""
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, indent=2, ensure_ascii=False)
+    print(f"\n{Colors.GREEN}[OK] Catálogo guardado en: {output_file}{Colors.RESET}")
+
+
+def print_candidate(title, name, layer_type, url):
+    print(f"\n  {Colors.RED}{Colors.BOLD}{'!'*40}{Colors.RESET}")
+    print(f"  {Colors.RED}{Colors.BOLD}{title}{Colors.RESET}")
+    print(f"  {Colors.RED}{Colors.BOLD}  Capa: {name}{Colors.RESET}")
+    print(f"  {Colors.RED}{Colors.BOLD}  Tipo: {layer_type}{Colors.RESET}")
+    print(f"  {Colors.RED}{Colors.BOLD}  URL: {url}{Colors.RESET}")
+    print(f"  {Colors.RED}{Colors.BOLD}{'!'*40}{Colors.RESET}\n")
+
+
+def find_candidates(catalog):
+    """Busca en el catálogo las capas (o servicios sin capas) que coinciden con las palabras clave."""
     candidates = []
-    
-    for layer in layers:
-        layer_id = layer.get('id', 0)
-        layer_name = layer.get('name', 'Sin nombre')
-        layer_type = layer.get('type', 'Unknown')
-        
-        # Verificar si coincide con keywords o búsqueda específica
-        matches = matches_keywords(layer_name, KEYWORDS) or any(
-            normalize_text(keyword) in normalize_text(layer_name) 
-            for keyword in SPECIFIC_SEARCH
-        )
-        
-        if matches:
-            layer_url = f"{service_url}/{layer_id}"
-            candidates.append({
-                'service_name': service_name,
-                'service_url': service_url,
-                'layer_id': layer_id,
-                'layer_name': layer_name,
-                'layer_type': layer_type,
-                'layer_url': layer_url
-            })
-            
-            # Imprimir en mayúsculas y rojo
-            print(f"\n  {Colors.RED}{Colors.BOLD}{'!'*40}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}¡CANDIDATO ENCONTRADO!{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}  Capa: {layer_name}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}  ID: {layer_id}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}  Tipo: {layer_type}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}  URL: {layer_url}{Colors.RESET}")
-            print(f"  {Colors.RED}{Colors.BOLD}{'!'*40}{Colors.RESET}\n")
-        else:
-            print(f"    Capa {layer_id}: {layer_name} ({layer_type})")
-    
+    for service in catalog['services']:
+        layers = service['layers'] + service['tables']
+        if not layers:
+            if is_candidate_name(service['name']):
+                print_candidate('¡CANDIDATO ENCONTRADO! (Servicio completo)', service['name'], service['type'], service['url'])
+                candidates.append({
+                    'service_name': service['name'],
+                    'service_url': service['url'],
+                    'layer_id': 0,
+                    'layer_name': service['name'],
+                    'layer_type': service['type'],
+                    'layer_url': service['url']
+                })
+            continue
+
+        for layer in layers:
+            if is_candidate_name(layer['name']):
+                print_candidate('¡CANDIDATO ENCONTRADO!', layer['name'], layer['type'], layer['url'])
+                candidates.append({
+                    'service_name': service['name'],
+                    'service_url': service['url'],
+                    'layer_id': layer['id'],
+                    'layer_name': layer['name'],
+                    'layer_type': layer['type'],
+                    'layer_url': layer['url']
+                })
     return candidates
 
 
+def probe_direct_url(test_url):
+    """Prueba una URL de capa adivinada; retorna el candidato o None."""
+    data = fetch_catalog_json(test_url, TTL_SERVICE)
+    if data is None or 'name' not in data:
+        return None
+    return {
+        'service_name': test_url.split('/')[-2],
+        'service_url': '/'.join(test_url.split('/')[:-1]),
+        'layer_id': 0,
+        'layer_name': data.get('name', 'N/A'),
+        'layer_type': data.get('type', 'Unknown'),
+        'layer_url': test_url
+    }
+
+
 def get_layer_count(layer_url):
-    """Obtiene el conteo de registros de una capa."""
+    """Obtiene el conteo de registros de una capa (en caché por TTL_METADATA)."""
     try:
         query_url = f"{layer_url}/query"
         params = {"where": "1=1", "returnCountOnly": "true", "f": "json"}
-        response = requests.get(query_url, params=params, timeout=10)
+        with get_host_semaphore(query_url):
+            response = cached_get(query_url, params=params, ttl=TTL_METADATA, timeout=10)
         response.raise_for_status()
         data = response.json()
         if "error" in data:
@@ -268,31 +320,17 @@ def main():
     print(f"{Colors.BOLD}{Colors.MAGENTA}ESCANER DE SERVICIOS SIMUR - BUSCANDO 'NODO CONTRATO DE MONITOREO'{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.MAGENTA}{'='*80}{Colors.RESET}\n")
     
-    all_candidates = []
-    total_services_scanned = 0
+    # Recorrer el catálogo completo
+    print(f"{Colors.BOLD}{Colors.CYAN}{'#'*80}{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.CYAN}RECORRIENDO CATÁLOGO: {', '.join(BASE_URLS)}{Colors.RESET}")
+    print(f"{Colors.BOLD}{Colors.CYAN}{'#'*80}{Colors.RESET}\n")
     
-    # Escanear cada URL base
-    for base_url in BASE_URLS:
-        print(f"\n{Colors.BOLD}{Colors.CYAN}{'#'*80}{Colors.RESET}")
-        print(f"{Colors.BOLD}{Colors.CYAN}ESCANEANDO: {base_url}{Colors.RESET}")
-        print(f"{Colors.BOLD}{Colors.CYAN}{'#'*80}{Colors.RESET}\n")
-        
-        # Obtener catálogo de servicios
-        services = get_services_catalog(base_url)
-        
-        if not services:
-            print(f"{Colors.YELLOW}[INFO] No se encontraron servicios en esta URL base{Colors.RESET}\n")
-            continue
-        
-        # Escanear cada servicio
-        for idx, service in enumerate(services, start=1):
-            print(f"\n{Colors.CYAN}[{idx}/{len(services)}] Procesando servicio...{Colors.RESET}")
-            candidates = scan_service(service, base_url)
-            all_candidates.extend(candidates)
-            total_services_scanned += 1
-            
-            # Pequeña pausa para no sobrecargar el servidor
-            time.sleep(0.5)
+    catalog = crawl_catalog(BASE_URLS)
+    save_catalog(catalog)
+    
+    all_candidates = find_candidates(catalog)
+    known_urls = {c['layer_url'] for c in all_candidates}
+    known_urls.update(layer['url'] for s in catalog['services'] for layer in s['layers'])
     
     # Intentar buscar directamente con variaciones del nombre
     print(f"\n{Colors.BOLD}{Colors.CYAN}{'#'*80}{Colors.RESET}")
@@ -307,59 +345,35 @@ def main():
         "https://sig.simur.gov.co/arcgis/rest/services/Movilidad/ContratoMonitoreo/MapServer/0",
         "https://sig.simur.gov.co/arcgis/rest/services/Movilidad/Contrato_Monitoreo/MapServer/0",
     ]
+    # Las que ya aparecieron en el catálogo no se vuelven a probar
+    direct_urls = [url for url in direct_urls if url not in known_urls]
     
-    for test_url in direct_urls:
-        try:
-            info_url = f"{test_url}?f=json"
-            response = requests.get(info_url, timeout=8)
-            if response.ok:
-                data = response.json()
-                if 'error' not in data and 'name' in data:
-                    layer_name = data.get('name', 'N/A')
-                    # Obtener conteo
-                    query_url = f"{test_url}/query?where=1=1&returnCountOnly=true&f=json"
-                    count_response = requests.get(query_url, timeout=8)
-                    count = 0
-                    if count_response.ok:
-                        count_data = count_response.json()
-                        count = count_data.get('count', 0)
-                    
-                    print(f"\n{Colors.RED}{Colors.BOLD}{'!'*80}{Colors.RESET}")
-                    print(f"{Colors.RED}{Colors.BOLD}¡CANDIDATO ENCONTRADO POR BÚSQUEDA DIRECTA!{Colors.RESET}")
-                    print(f"{Colors.RED}{Colors.BOLD}  Nombre: {layer_name}{Colors.RESET}")
-                    print(f"{Colors.RED}{Colors.BOLD}  URL: {test_url}{Colors.RESET}")
-                    print(f"{Colors.RED}{Colors.BOLD}  Registros: {count:,}{Colors.RESET}")
-                    print(f"{Colors.RED}{Colors.BOLD}{'!'*80}{Colors.RESET}\n")
-                    
-                    all_candidates.append({
-                        'service_name': test_url.split('/')[-2],
-                        'service_url': '/'.join(test_url.split('/')[:-1]),
-                        'layer_id': 0,
-                        'layer_name': layer_name,
-                        'layer_type': data.get('type', 'Unknown'),
-                        'layer_url': test_url
-                    })
-        except Exception:
-            pass
-        time.sleep(0.3)
+    with ThreadPoolExecutor(max_workers=CRAWL_MAX_WORKERS) as executor:
+        for candidate in executor.map(probe_direct_url, direct_urls):
+            if candidate:
+                print_candidate('¡CANDIDATO ENCONTRADO POR BÚSQUEDA DIRECTA!', candidate['layer_name'],
+                                candidate['layer_type'], candidate['layer_url'])
+                all_candidates.append(candidate)
+        
+        # Conteos de las candidatas en paralelo (solo se usan para el resumen)
+        counts = list(executor.map(get_layer_count, [c['layer_url'] for c in all_candidates]))
     
     # Resumen final
+    stats = catalog['stats']
     print(f"\n{Colors.BOLD}{Colors.MAGENTA}{'='*80}{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.MAGENTA}RESUMEN FINAL{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.MAGENTA}{'='*80}{Colors.RESET}\n")
-    print(f"{Colors.CYAN}Total de servicios escaneados: {total_services_scanned}{Colors.RESET}\n")
+    print(f"{Colors.CYAN}Carpetas: {stats['folders']} | Servicios: {stats['services']} | "
+          f"Capas: {stats['layers']} | Tablas: {stats['tables']} | Tiempo: {stats['elapsed_seconds']}s{Colors.RESET}\n")
     
     if all_candidates:
         print(f"{Colors.GREEN}{Colors.BOLD}Se encontraron {len(all_candidates)} capa(s) candidata(s):{Colors.RESET}\n")
         
-        for idx, candidate in enumerate(all_candidates, start=1):
+        for idx, (candidate, count) in enumerate(zip(all_candidates, counts), start=1):
             print(f"{Colors.YELLOW}{idx}. {candidate['layer_name']}{Colors.RESET}")
             print(f"   Servicio: {candidate['service_name']}")
             print(f"   Tipo: {candidate['layer_type']}")
             print(f"   URL: {candidate['layer_url']}")
-            
-            # Obtener conteo de registros
-            count = get_layer_count(candidate['layer_url'])
             if count > 0:
                 print(f"   {Colors.GREEN}Registros: {count:,}{Colors.RESET}")
             else:
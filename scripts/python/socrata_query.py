@@ -0,0 +1,214 @@
+"""
+Utilidades compartidas de consulta SoQL a datasets Socrata (/resource/{id}.json).
+
+Paginación: en lugar de un único $limit (que trunca en silencio los datasets
+grandes y deja la respuesta completa en memoria), se pide primero count(*) y
+luego páginas $limit/$offset con $order=:id (orden estable entre páginas). Con
+el conteo conocido las páginas se piden en paralelo y se entregan en orden, de
+a una, para normalizarlas a medida que llegan; si la última página planificada
+llega completa (filas agregadas después del conteo), se sigue en serie. Sin
+conteo se pagina en serie hasta recibir una página incompleta.
+
+$select permite bajar solo las columnas necesarias (p. ej. las de ubicación
+que identifica find_location_fields).
+
+CSVExport lee en streaming una exportación CSV completa (rows.csv de un
+dataset tabular o el archivo de un dataset federado): decodifica la respuesta
+a medida que llega y entrega páginas de filas con solo las columnas pedidas,
+sin cargar el archivo entero en memoria.
+"""
+
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+from urllib.parse import urlparse
+
+import http_client
+from http_client import get_host_semaphore
+
+SOQL_PAGE_SIZE = 5000  # Registros por página ($limit)
+SOQL_MAX_WORKERS = 4  # Páginas pedidas en paralelo
+SOQL_ORDER = ':id'  # Orden estable: id interno de fila de Socrata
+CSV_PAGE_ROWS = 5000  # Filas por página al leer una exportación CSV
+
+
+class SoQLError(RuntimeError):
+    """Respuesta de error de la API SoQL (p. ej. columna inexistente en $select)."""
+
+
+def _get_json(endpoint: str, params: Dict, timeout: float = 60):
+    with get_host_semaphore(endpoint):
+        response = http_client.get(endpoint, params=params, headers=http_client.socrata_headers(), timeout=timeout)
+    if response.status_code == 400:
+        try:
+            message = response.json().get('message')
+        except ValueError:
+            message = response.text[:200]
+        raise SoQLError(f"Consulta SoQL inválida: {message}")
+    response.raise_for_status()
+    return response.json()
+
+
+def count_rows(endpoint: str, where: Optional[str] = None) -> Optional[int]:
+    """Número de filas del dataset (o del where) con count(*); None si no se puede obtener."""
+    params = {'$select': 'count(*)'}
+    if where:
+        params['$where'] = where
+    try:
+        data = _get_json(endpoint, params, timeout=30)
+        # La columna se llama count, count_1 o COUNT según la versión de la API
+        return int(next(iter(data[0].values())))
+    except Exception as e:
+        print(f"[WARNING] No se pudo obtener count(*): {e}")
+        return None
+
+
+def fetch_page(endpoint: str, offset: int, page_size: int = SOQL_PAGE_SIZE,
+               select: Optional[Sequence[str]] = None, where: Optional[str] = None) -> List[Dict]:
+    """Descarga una página $limit/$offset ordenada por :id."""
+    params = {'$order': SOQL_ORDER, '$limit': page_size, '$offset': offset}
+    if select:
+        params['$select'] = ','.join(select)
+    if where:
+        params['$where'] = where
+    return _get_json(endpoint, params)
+
+
+def _iter_serial_pages(endpoint: str, offset: int, select: Optional[Sequence[str]], where: Optional[str],
+                       page_size: int, max_rows: Optional[int]) -> Iterator[List[Dict]]:
+    """Páginas en serie desde offset hasta una página incompleta (o max_rows)."""
+    while max_rows is None or offset < max_rows:
+        size = page_size if max_rows is None else min(page_size, max_rows - offset)
+        page = fetch_page(endpoint, offset, size, select, where)
+        if page:
+            yield page
+        if len(page) < size:
+            return
+        offset += size
+
+
+def iter_pages(endpoint: str, select: Optional[Sequence[str]] = None, where: Optional[str] = None,
+               page_size: int = SOQL_PAGE_SIZE, max_workers: int = SOQL_MAX_WORKERS,
+               max_rows: Optional[int] = None) -> Iterator[List[Dict]]:
+    """
+    Itera las páginas de un dataset en orden.
+
+    Args:
+        endpoint: URL /resource/{id}.json
+        select: Columnas a pedir ($select); None = todas
+        where: Filtro SoQL opcional
+        page_size: Registros por página
+        max_workers: Páginas en paralelo cuando se conoce el conteo
+        max_rows: Tope opcional de registros
+
+    Yields:
+        list: Registros de cada página
+    """
+    total = count_rows(endpoint, where)
+    if total is not None and max_rows is not None:
+        total = min(total, max_rows)
+
+    if total is None:
+        # Sin conteo: en serie hasta una página incompleta
+        yield from _iter_serial_pages(endpoint, 0, select, where, page_size, max_rows)
+        return
+
+    offsets = list(range(0, total, page_size))
+    print(f"[INFO] {total:,} registros en {len(offsets):,} páginas de {page_size:,} ({max_workers} en paralelo)")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Ventana acotada de páginas en vuelo: la memoria no crece con el dataset
+        window = max_workers * 2
+        pending = [executor.submit(fetch_page, endpoint, offset, min(page_size, total - offset), select, where)
+                   for offset in offsets[:window]]
+        next_index = len(pending)
+        last_page_full = False
+        while pending:
+            page = pending.pop(0).result()
+            if next_index < len(offsets):
+                offset = offsets[next_index]
+                pending.append(executor.submit(fetch_page, endpoint, offset, min(page_size, total - offset),
+                                               select, where))
+                next_index += 1
+            last_page_full = len(page) == min(page_size, total - offsets[-1])
+            yield page
+
+    # Filas agregadas después del count(*): en serie desde el final planificado
+    if offsets and last_page_full and (max_rows is None or total < max_rows):
+        extra = 0
+        for page in _iter_serial_pages(endpoint, total, select, where, page_size, max_rows):
+            extra += len(page)
+            yield page
+        if extra:
+            print(f"[INFO] {extra:,} registros agregados después del conteo")
+
+
+def csv_export_url(endpoint: str, dataset_id: str) -> str:
+    """URL de exportación masiva rows.csv del dataset, en el mismo dominio que el endpoint."""
+    parsed = urlparse(endpoint)
+    return f"{parsed.scheme}://{parsed.netloc}/api/views/{dataset_id}/rows.csv?accessType=DOWNLOAD"
+
+
+class CSVExport:
+    """
+    Lectura en streaming de un CSV remoto.
+
+    Uso:
+        with CSVExport(url) as export:
+            columns = elegir(export.fieldnames)
+            for page in export.iter_pages(columns):
+                ...
+    """
+
+    def __init__(self, url: str, timeout: float = 60):
+        self.url = url
+        self.response = http_client.get(url, headers=http_client.socrata_headers(accept='text/csv, */*'),
+                                        timeout=timeout, stream=True)
+        try:
+            self.response.raise_for_status()
+            # Descomprime gzip/deflate al leer; utf-8-sig descarta el BOM de los CSV de Socrata
+            self.response.raw.decode_content = True
+            self._reader = csv.reader(io.TextIOWrapper(self.response.raw, encoding='utf-8-sig', newline=''))
+            self.fieldnames = [name.strip() for name in next(self._reader, [])]
+        except Exception:
+            self.response.close()
+            raise
+        self.rows = 0
+
+    def iter_pages(self, columns: Optional[Sequence[str]] = None, page_size: int = CSV_PAGE_ROWS,
+                   max_rows: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Itera las filas en páginas de dicts.
+
+        Args:
+            columns: Columnas a conservar (None = todas); las que no estén en el CSV se ignoran
+            page_size: Filas por página
+            max_rows: Tope opcional de filas
+
+        Yields:
+            list: Filas de cada página, solo con las columnas pedidas
+        """
+        wanted = self.fieldnames if columns is None else [c for c in columns if c in self.fieldnames]
+        positions = [(name, self.fieldnames.index(name)) for name in wanted]
+        page = []
+        for row in self._reader:
+            if not row:
+                continue
+            page.append({name: row[i] if i < len(row) else '' for name, i in positions})
+            self.rows += 1
+            if len(page) >= page_size:
+                yield page
+                page = []
+            if max_rows is not None and self.rows >= max_rows:
+                break
+        if page:
+            yield page
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self) -> "CSVExport":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
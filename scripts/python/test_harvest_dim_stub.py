@@ -0,0 +1,124 @@
+"""
+Prueba de la cosecha asíncrona de harvest_dim_studies.py contra un servidor local.
+
+El servidor imita estudiosnodo con fallos de congestión: a cada ID le
+responde primero con 429, 504 o cerrando la conexión sin respuesta (hasta
+STUB_MAX_FAILURES veces, menos que ASYNC_MAX_ATTEMPTS) y después con la
+respuesta real (nodo cada HIT_EVERY IDs, 404 el resto). Verifica que el
+limitador AIMD y el reencolado no pierdan IDs ni los escriban dos veces en el
+journal, y que no queden errores.
+
+Uso:
+    python scripts/python/test_harvest_dim_stub.py
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import harvest_dim_studies as harvester
+
+START_ID = 1
+END_ID = 121
+HIT_EVERY = 3
+STUB_MAX_FAILURES = 2  # Fallos por ID antes de responder bien (< ASYNC_MAX_ATTEMPTS)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    attempts = Counter()
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _empty(self, status: int):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        internal_id = int(self.path.rstrip('/').split('/')[-1])
+        with self.lock:
+            self.attempts[internal_id] += 1
+            attempt = self.attempts[internal_id]
+
+        failures = internal_id % (STUB_MAX_FAILURES + 1)
+        if attempt <= failures:
+            kind = (internal_id + attempt) % 3
+            if kind == 0:
+                self._empty(429)
+            elif kind == 1:
+                self._empty(504)
+            else:
+                # Conexión cortada sin respuesta (como un timeout del lado del servidor)
+                self.close_connection = True
+                self.connection.shutdown(2)
+            return
+
+        if internal_id % HIT_EVERY:
+            self._empty(404)
+            return
+        body = json.dumps([{
+            'nombre_nodo': f'NODO_{internal_id}',
+            'id_nodo': internal_id + 1000,
+            'id': internal_id * 10,
+            'direccion': f'KR {internal_id}',
+        }]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/estudiosnodo"
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_file = os.path.join(tmp_dir, 'journal.jsonl')
+        master_index = harvester.harvest_studies_async(START_ID, END_ID, journal_file=journal_file,
+                                                       initial_in_flight=8, max_in_flight=16,
+                                                       base_url=base_url)
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            journal = [json.loads(line) for line in f if line.strip()]
+    server.shutdown()
+
+    journaled = Counter(entry['id'] for entry in journal)
+    expected_ids = set(range(START_ID, END_ID))
+    expected_hits = {f'NODO_{i}' for i in expected_ids if i % HIT_EVERY == 0}
+
+    missing = sorted(expected_ids - set(journaled))
+    duplicated = sorted(i for i, count in journaled.items() if count > 1)
+    errors = sorted(entry['id'] for entry in journal if entry['status'] == harvester.STATUS_ERROR)
+    retried = sum(count - 1 for count in StubHandler.attempts.values())
+
+    if missing:
+        failed.append(f"IDs sin entrada en el journal: {missing}")
+    if duplicated:
+        failed.append(f"IDs escritos más de una vez en el journal: {duplicated}")
+    if errors:
+        failed.append(f"IDs que quedaron en error: {errors}")
+    if set(master_index) != expected_hits:
+        failed.append(f"Nodos distintos a los esperados: {sorted(set(master_index) ^ expected_hits)}")
+    if not retried:
+        failed.append("El servidor no recibió reintentos")
+
+    print("=" * 80)
+    if failed:
+        for message in failed:
+            print(f"[ERROR] {message}")
+        return False
+    print(f"[OK] {len(expected_ids)} IDs en el journal una sola vez, {len(master_index)} nodos, "
+          f"{retried} reintentos por congestión")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
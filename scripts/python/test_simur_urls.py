@@ -1,7 +1,8 @@
 """Script rápido para verificar URLs de SIMUR"""
-import requests
 import json
 
+import http_client
+
 urls = [
     ('NodosContratoMonitoreo', 'https://sig.simur.gov.co/arcgis/rest/services/Movilidad/NodosContratoMonitoreo/MapServer/0'),
     ('NodoContratoMonitoreo', 'https://sig.simur.gov.co/arcgis/rest/services/Movilidad/NodoContratoMonitoreo/MapServer/0'),
@@ -20,7 +21,7 @@ for name, base_url in urls:
     try:
         # Obtener info de la capa
         info_url = f"{base_url}?f=json"
-        response = requests.get(info_url, timeout=10)
+        response = http_client.get(info_url, timeout=10)
         if response.ok:
             data = response.json()
             if 'error' not in data:
@@ -29,7 +30,7 @@ for name, base_url in urls:
                 
                 # Obtener conteo
                 query_url = f"{base_url}/query?where=1=1&returnCountOnly=true&f=json"
-                count_response = requests.get(query_url, timeout=10)
+                count_response = http_client.get(query_url, timeout=10)
                 if count_response.ok:
                     count_data = count_response.json()
                     count = count_data.get('count', 'N/A')
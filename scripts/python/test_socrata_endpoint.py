@@ -1,7 +1,8 @@
 """Script de prueba para verificar acceso al dataset de Socrata"""
-import requests
 import json
 
+import http_client
+
 dataset_id = "b9s9-jw7c"
 base_url = "https://www.datos.gov.co"
 
@@ -12,10 +13,7 @@ endpoints = [
     f"{base_url}/api/views/{dataset_id}/rows.json?$limit=10",
 ]
 
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-    'Accept': 'application/json'
-}
+headers = http_client.socrata_headers()
 
 print("="*80)
 print("PROBANDO ENDPOINTS DE SOCRATA PARA DATASET b9s9-jw7c")
@@ -27,7 +25,7 @@ for endpoint in endpoints:
     print("-"*80)
     
     try:
-        response = requests.get(endpoint, headers=headers, timeout=15)
+        response = http_client.get(endpoint, headers=headers, timeout=15)
         print(f"Status Code: {response.status_code}")
         print(f"Content-Type: {response.headers.get('Content-Type', 'N/A')}")
         
@@ -0,0 +1,309 @@
+"""
+Índice de polígonos de localidades y UPZ de Bogotá para ubicar puntos.
+
+Usa los mismos archivos locales que server/scripts/etl_zonas_ideca.js
+(data/zonas/localidades_bogota.geojson y data/zonas/upz_bogota.geojson; no
+versionados, ver docs/DATA_POLICY.md). Sin el de localidades usa la copia
+simplificada versionada server/data/zonas/localidades_bogota_simplificado.geojson,
+que se genera desde data/zonas con --bundle. Acepta GeoJSON (Polygon/MultiPolygon)
+o Esri JSON (rings), en EPSG:4326 o Web Mercator.
+
+Cada polígono se prepara una sola vez: bbox propio, una grilla global que
+asigna a cada celda los polígonos cuyo bbox la toca, y las aristas de cada
+polígono repartidas en bandas horizontales. Ubicar un punto revisa solo los
+polígonos de su celda y, dentro de cada uno, solo las aristas de su banda
+(ray casting par-impar, por lo que los huecos quedan fuera).
+
+Uso:
+    from zonas_bogota import load_zonas
+
+    zonas = load_zonas()
+    if zonas:
+        zona = zonas.locate(-74.08, 4.60)  # None fuera de Bogotá
+
+    python scripts/python/zonas_bogota.py --bundle  # Regenera la copia versionada
+"""
+
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+ZONAS_DIR = PROJECT_ROOT / "data" / "zonas"
+LOCALIDADES_FILE = str(ZONAS_DIR / "localidades_bogota.geojson")
+UPZ_FILE = str(ZONAS_DIR / "upz_bogota.geojson")
+BUNDLED_LOCALIDADES_FILE = str(PROJECT_ROOT / "server" / "data" / "zonas" / "localidades_bogota_simplificado.geojson")
+SIMPLIFY_TOLERANCE_DEG = 0.0001  # ~11 m; tolerancia Douglas-Peucker de la copia versionada
+BUNDLE_COORD_DECIMALS = 6
+
+# Mismos candidatos de campos que etl_zonas_ideca.js (JOIN por código con localidades/upz)
+LOCALIDAD_CODIGO_KEYS = ('LocCodigo', 'CODIGO', 'codigo')
+LOCALIDAD_NOMBRE_KEYS = ('LocNombre', 'NOMBRE', 'nombre')
+UPZ_CODIGO_KEYS = ('UPlCodigo', 'CODIGO', 'codigo', 'UPZ_CODIGO', 'COD_UPZ', 'CODUPZ', 'upz_codigo', 'cod_upz')
+UPZ_NOMBRE_KEYS = ('UPlNombre', 'NOMBRE', 'nombre', 'UPZ_NOMBRE', 'NOM_UPZ', 'NOMUPZ', 'upz_nombre', 'nom_upz')
+
+GRID_CELL_DEG = 0.01  # ~1.1 km; celdas de la grilla global
+EDGE_BANDS = 64  # Bandas horizontales de aristas por polígono
+
+Ring = List[Tuple[float, float]]
+
+
+def _get_field(props: Dict, candidates: Sequence[str]) -> Optional[str]:
+    for key in candidates:
+        value = props.get(key)
+        if value is not None and value != '':
+            return str(value).strip()
+    return None
+
+
+def _mercator_to_lonlat(x: float, y: float) -> Tuple[float, float]:
+    lon = x / 6378137.0 * 180.0 / math.pi
+    lat = math.degrees(2.0 * math.atan(math.exp(y / 6378137.0)) - math.pi / 2.0)
+    return lon, lat
+
+
+def _normalize_ring(coords: List) -> Ring:
+    """Anillo en (lon, lat): convierte Web Mercator y corrige el orden lat/lon invertido."""
+    ring = [(float(c[0]), float(c[1])) for c in coords]
+    if not ring:
+        return ring
+    x, y = ring[0]
+    if abs(x) > 180 or abs(y) > 90:
+        return [_mercator_to_lonlat(x, y) for x, y in ring]
+    # En Bogotá |lon| (~74) > |lat| (~4.6): si no, las coordenadas vienen invertidas
+    if abs(x) < abs(y):
+        return [(y, x) for x, y in ring]
+    return ring
+
+
+def _polygons_from_geometry(geometry: Optional[Dict]) -> List[List[Ring]]:
+    """Lista de polígonos (cada uno, lista de anillos) de una geometría GeoJSON o Esri."""
+    if not geometry:
+        return []
+    if 'rings' in geometry:
+        # Esri: todos los anillos juntos; con par-impar los huecos se restan igual
+        return [[_normalize_ring(ring) for ring in geometry['rings']]]
+    if geometry.get('type') == 'Polygon':
+        return [[_normalize_ring(ring) for ring in geometry.get('coordinates') or []]]
+    if geometry.get('type') == 'MultiPolygon':
+        return [[_normalize_ring(ring) for ring in polygon] for polygon in geometry.get('coordinates') or []]
+    return []
+
+
+class _PreparedPolygon:
+    """Polígono con bbox y aristas repartidas en bandas horizontales."""
+
+    def __init__(self, rings: List[Ring], attributes: Dict):
+        self.attributes = attributes
+        points = [point for ring in rings for point in ring]
+        self.min_x = min(p[0] for p in points)
+        self.max_x = max(p[0] for p in points)
+        self.min_y = min(p[1] for p in points)
+        self.max_y = max(p[1] for p in points)
+        self._band_height = (self.max_y - self.min_y) / EDGE_BANDS or 1.0
+        self._bands: List[List[Tuple[float, float, float, float]]] = [[] for _ in range(EDGE_BANDS)]
+        for ring in rings:
+            for i in range(len(ring)):
+                x1, y1 = ring[i]
+                x2, y2 = ring[(i + 1) % len(ring)]
+                if y1 == y2:
+                    continue  # Las aristas horizontales no cruzan el rayo
+                first = self._band(min(y1, y2))
+                last = self._band(max(y1, y2))
+                for band in range(first, last + 1):
+                    self._bands[band].append((x1, y1, x2, y2))
+
+    def _band(self, y: float) -> int:
+        return min(max(int((y - self.min_y) / self._band_height), 0), EDGE_BANDS - 1)
+
+    def contains(self, x: float, y: float) -> bool:
+        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
+            return False
+        inside = False
+        for x1, y1, x2, y2 in self._bands[self._band(y)]:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+
+class PolygonIndex:
+    """Índice de polígonos con prefiltro por grilla de bbox."""
+
+    def __init__(self, cell_deg: float = GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.polygons: List[_PreparedPolygon] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self.cell_deg)), int(math.floor(y / self.cell_deg))
+
+    def add(self, rings: List[Ring], attributes: Dict) -> None:
+        rings = [ring for ring in rings if len(ring) >= 3]
+        if not rings:
+            return
+        polygon = _PreparedPolygon(rings, attributes)
+        index = len(self.polygons)
+        self.polygons.append(polygon)
+        cx1, cy1 = self._cell(polygon.min_x, polygon.min_y)
+        cx2, cy2 = self._cell(polygon.max_x, polygon.max_y)
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                self._grid.setdefault((cx, cy), []).append(index)
+
+    def find(self, x: float, y: float) -> Optional[Dict]:
+        """Atributos del primer polígono que contiene el punto, o None."""
+        for index in self._grid.get(self._cell(x, y), ()):
+            polygon = self.polygons[index]
+            if polygon.contains(x, y):
+                return polygon.attributes
+        return None
+
+
+def load_polygon_index(path: str, code_keys: Sequence[str], name_keys: Sequence[str]) -> Optional[PolygonIndex]:
+    """Construye un PolygonIndex desde un GeoJSON/Esri JSON; None si el archivo no existe."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    index = PolygonIndex()
+    for feature in data.get('features') or []:
+        props = feature.get('properties') or feature.get('attributes') or {}
+        attributes = {'codigo': _get_field(props, code_keys), 'nombre': _get_field(props, name_keys)}
+        for rings in _polygons_from_geometry(feature.get('geometry')):
+            index.add(rings, attributes)
+    return index if index.polygons else None
+
+
+class ZonasBogota:
+    """Localidades (límite de Bogotá) y, si están disponibles, UPZ."""
+
+    def __init__(self, localidades: PolygonIndex, upz: Optional[PolygonIndex] = None):
+        self.localidades = localidades
+        self.upz = upz
+
+    def locate(self, lon: float, lat: float) -> Optional[Dict]:
+        """
+        Ubica un punto.
+
+        Returns:
+            dict con localidad_codigo, localidad, upz_codigo y upz (None si no
+            cae en una UPZ), o None si el punto está fuera de Bogotá
+        """
+        localidad = self.localidades.find(lon, lat)
+        if localidad is None:
+            return None
+        upz = self.upz.find(lon, lat) if self.upz else None
+        return {
+            'localidad_codigo': localidad['codigo'],
+            'localidad': localidad['nombre'],
+            'upz_codigo': upz['codigo'] if upz else None,
+            'upz': upz['nombre'] if upz else None,
+        }
+
+
+def find_localidades_file() -> Optional[str]:
+    """Archivo de localidades a usar: el de data/zonas (completo) o la copia versionada; None si no hay ninguno."""
+    for path in (LOCALIDADES_FILE, BUNDLED_LOCALIDADES_FILE):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_zonas(localidades_file: Optional[str] = None, upz_file: str = UPZ_FILE) -> Optional[ZonasBogota]:
+    """
+    Carga los índices de localidades y UPZ; None si no está el archivo de localidades.
+
+    Sin localidades_file usa el de data/zonas o, si falta, la copia versionada
+    (ver find_localidades_file()).
+    """
+    path = localidades_file or find_localidades_file()
+    localidades = load_polygon_index(path, LOCALIDAD_CODIGO_KEYS, LOCALIDAD_NOMBRE_KEYS) if path else None
+    if localidades is None:
+        return None
+    return ZonasBogota(localidades, load_polygon_index(upz_file, UPZ_CODIGO_KEYS, UPZ_NOMBRE_KEYS))
+
+
+def _simplify(ring: Ring, tolerance: float) -> Ring:
+    """Douglas-Peucker (iterativo) sobre un anillo cerrado; conserva el primer y el último punto."""
+    if len(ring) <= 4:
+        return ring
+    keep = [False] * len(ring)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = ring[first], ring[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        farthest, max_distance = None, tolerance
+        for i in range(first + 1, last):
+            px, py = ring[i]
+            if length:
+                distance = abs(dy * px - dx * py + x2 * y1 - y2 * x1) / length
+            else:
+                distance = math.hypot(px - x1, py - y1)
+            if distance > max_distance:
+                farthest, max_distance = i, distance
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    simplified = [point for point, kept in zip(ring, keep) if kept]
+    return simplified if len(simplified) >= 4 else ring
+
+
+def bundle_localidades(source_file: str = LOCALIDADES_FILE, output_file: str = BUNDLED_LOCALIDADES_FILE,
+                       tolerance: float = SIMPLIFY_TOLERANCE_DEG) -> int:
+    """
+    Escribe la copia simplificada de localidades (GeoJSON EPSG:4326) que se versiona.
+
+    Returns:
+        int: Número de localidades escritas
+    """
+    with open(source_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    features = []
+    for feature in data.get('features') or []:
+        props = feature.get('properties') or feature.get('attributes') or {}
+        polygons = [
+            [[[round(x, BUNDLE_COORD_DECIMALS), round(y, BUNDLE_COORD_DECIMALS)] for x, y in _simplify(ring, tolerance)]
+             for ring in rings if len(ring) >= 3]
+            for rings in _polygons_from_geometry(feature.get('geometry'))
+        ]
+        polygons = [rings for rings in polygons if rings]
+        if not polygons:
+            continue
+        features.append({
+            'type': 'Feature',
+            'properties': {
+                'LocCodigo': _get_field(props, LOCALIDAD_CODIGO_KEYS),
+                'LocNombre': _get_field(props, LOCALIDAD_NOMBRE_KEYS),
+            },
+            'geometry': ({'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                         else {'type': 'MultiPolygon', 'coordinates': polygons}),
+        })
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f, ensure_ascii=False, separators=(',', ':'))
+    return len(features)
+
+
+def main():
+    if '--bundle' not in sys.argv[1:]:
+        print("Uso: python scripts/python/zonas_bogota.py --bundle")
+        return False
+    if not os.path.exists(LOCALIDADES_FILE):
+        print(f"[ERROR] Archivo no encontrado: {LOCALIDADES_FILE} (ver server/scripts/etl_zonas_ideca.js)")
+        return False
+    count = bundle_localidades()
+    print(f"[OK] Copia simplificada guardada: {BUNDLED_LOCALIDADES_FILE} ({count} localidades, "
+          f"{os.path.getsize(BUNDLED_LOCALIDADES_FILE) / 1024:.0f} KB, tolerancia {SIMPLIFY_TOLERANCE_DEG}°)")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -5,6 +5,7 @@
  * Uso: npm run db:full-load
  * Requiere: PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD (o DATABASE_URL)
  * Requiere: public/data/studies_dictionary.json, nodos_unificados.json, ia_historial.json
+ *   (nodos_geocodificados.json es opcional: el ETL de nodos la suma a nodos_unificados.json)
  */
 
 import fs from 'fs';
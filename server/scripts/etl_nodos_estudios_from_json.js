@@ -1,8 +1,14 @@
 /**
- * ETL Fase 1: nodos + estudios desde studies_dictionary.json y nodos_unificados.json.
+ * ETL Fase 1: nodos + estudios desde studies_dictionary.json y nodos_unificados.json
+ * (más la capa nodos_geocodificados.json, ver server/utils/nodosUnificados.js).
  * Idempotente: UPSERT por node_id_externo y por (nodo_id, file_id_dim).
  *
  * Uso: node server/scripts/etl_nodos_estudios_from_json.js
+ *      node server/scripts/etl_nodos_estudios_from_json.js --delta[=ruta]
+ *
+ * --delta: aplica solo los nodos nuevos/modificados de studies_dictionary_delta.json
+ * (harvest_dim_studies.py --incremental lo publica en public/data). Los estudios eliminados se
+ * reportan pero no se borran, igual que en la carga completa.
  * Requiere: DATABASE_URL (o PGHOST, PGDATABASE, PGUSER, PGPASSWORD)
  */
 
@@ -10,12 +16,26 @@ import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
 import { getPool, query, closePool } from '../db/client.js';
+import {
+  NODOS_GEOCODIFICADOS_PATH,
+  NODOS_UNIFICADOS_PATH,
+  readFeatures,
+  sourceIds,
+  withGeocodedOverlay,
+} from '../utils/nodosUnificados.js';
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 const PROJECT_ROOT = path.join(__dirname, '../..');
 
 const STUDIES_PATH = path.join(PROJECT_ROOT, 'public', 'data', 'studies_dictionary.json');
-const NODOS_UNIFICADOS_PATH = path.join(PROJECT_ROOT, 'public', 'data', 'nodos_unificados.json');
+const DEFAULT_DELTA_PATH = path.join(PROJECT_ROOT, 'public', 'data', 'studies_dictionary_delta.json');
+
+function getDeltaPath() {
+  const arg = process.argv.find((a) => a === '--delta' || a.startsWith('--delta='));
+  if (!arg) return null;
+  const value = arg.includes('=') ? arg.slice('--delta='.length) : '';
+  return value ? path.resolve(value) : DEFAULT_DELTA_PATH;
+}
 
 function loadJson(filePath, label) {
   if (!fs.existsSync(filePath)) {
@@ -33,6 +53,8 @@ function loadJson(filePath, label) {
 
 /**
  * Construye mapa: node_id_externo (de nodos_unificados) -> { nombre, coords }.
+ * Un nodo fusionado (scripts/python/nodos_merge.py) conserva solo el id del líder;
+ * los ids de las demás fuentes (properties.sources[].id) apuntan al mismo nodo.
  * También índice por dirección/nombre normalizado para cruce con studies_dictionary.
  */
 function buildNodosUnificadosMap(data) {
@@ -55,6 +77,9 @@ function buildNodosUnificadosMap(data) {
     if (id) {
       byId.set(id, { nombre, point, id });
     }
+    for (const sourceId of sourceIds(f)) {
+      if (!byId.has(sourceId)) byId.set(sourceId, { nombre, point, id: id || sourceId });
+    }
     if (nombre) {
       const key = normalize(nombre);
       if (!byAddress.has(key)) byAddress.set(key, { nombre, point });
@@ -68,23 +93,120 @@ function buildNodosUnificadosMap(data) {
   return { byId, byAddress, normalize };
 }
 
+/**
+ * UPSERT de un nodo del diccionario y de sus estudios.
+ */
+async function upsertNodoConEstudios(nodeIdExterno, node, nodosUnif, now, stats) {
+  const internalIdDim = node.internal_id != null ? parseInt(node.internal_id, 10) : null;
+  const direccion = node.address || node.direccion || '';
+  const nombre = node.nombre_nodo || node.via_principal || direccion || nodeIdExterno;
+
+  let geom = null;
+  const byIdMatch = nodosUnif.byId.get(nodeIdExterno);
+  if (byIdMatch?.point) {
+    geom = `SRID=4326;POINT(${byIdMatch.point.lon} ${byIdMatch.point.lat})`;
+  } else {
+    const key = nodosUnif.normalize(direccion || nombre);
+    const byAddr = nodosUnif.byAddress.get(key);
+    if (byAddr?.point) {
+      geom = `SRID=4326;POINT(${byAddr.point.lon} ${byAddr.point.lat})`;
+    }
+  }
+
+  const existedNodo = await query('SELECT id FROM nodos WHERE node_id_externo = $1', [nodeIdExterno]);
+  const res = await query(
+    `INSERT INTO nodos (node_id_externo, internal_id_dim, nombre, direccion, geom, fuente, updated_at)
+     VALUES ($1, $2, $3, $4, $5::geometry, 'DIM', $6)
+     ON CONFLICT (node_id_externo) DO UPDATE SET
+       internal_id_dim = EXCLUDED.internal_id_dim,
+       nombre = COALESCE(NULLIF(EXCLUDED.nombre,''), nodos.nombre),
+       direccion = COALESCE(NULLIF(EXCLUDED.direccion,''), nodos.direccion),
+       geom = COALESCE(EXCLUDED.geom, nodos.geom),
+       updated_at = EXCLUDED.updated_at
+     RETURNING id`,
+    [nodeIdExterno, internalIdDim, nombre || null, direccion || null, geom, now]
+  );
+  const row = res.rows[0];
+  if (existedNodo.rows.length > 0) stats.nodosUpdate++;
+  else stats.nodosInsert++;
+
+  const nodoPk = row?.id;
+  if (!nodoPk) return;
+
+  const studies = node.studies || [];
+  for (const s of studies) {
+    const fileIdDim = s.file_id != null ? String(s.file_id) : null;
+    const tipoEstudio = s.type || 'Volúmen vehicular';
+    const fechaInicio = s.date ? new Date(s.date + 'T00:00:00Z') : new Date();
+    const fechaFin = s.date_end ? new Date(s.date_end + 'T00:00:00Z') : null;
+    const downloadUrl = s.download_url || null;
+    const contratista = Array.isArray(s.contractors) && s.contractors.length ? s.contractors[0] : null;
+    const totalRecords = s.total_records != null ? parseInt(s.total_records, 10) : null;
+    const vehicleTypes = Array.isArray(s.vehicle_types) ? s.vehicle_types : null;
+
+    const existedEst = await query(
+      'SELECT 1 FROM estudios WHERE nodo_id = $1 AND file_id_dim = $2',
+      [nodoPk, fileIdDim]
+    );
+    await query(
+      `INSERT INTO estudios (nodo_id, file_id_dim, tipo_estudio, fecha_inicio, fecha_fin, download_url, contratista, total_records, vehicle_types, fuente, updated_at)
+       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 'DIM', $10)
+       ON CONFLICT (nodo_id, file_id_dim) DO UPDATE SET
+         tipo_estudio = EXCLUDED.tipo_estudio,
+         fecha_inicio = EXCLUDED.fecha_inicio,
+         fecha_fin = EXCLUDED.fecha_fin,
+         download_url = EXCLUDED.download_url,
+         contratista = EXCLUDED.contratista,
+         total_records = EXCLUDED.total_records,
+         vehicle_types = EXCLUDED.vehicle_types,
+         updated_at = EXCLUDED.updated_at`,
+      [nodoPk, fileIdDim, tipoEstudio, fechaInicio, fechaFin, downloadUrl, contratista, totalRecords, vehicleTypes, now]
+    );
+    if (existedEst.rows.length > 0) stats.estudiosUpdate++;
+    else stats.estudiosInsert++;
+  }
+}
+
 function main() {
   if (!process.env.DATABASE_URL && !process.env.PGHOST && !process.env.PGDATABASE) {
     console.error('[ETL] Configura DATABASE_URL o PGHOST/PGDATABASE/PGUSER/PGPASSWORD');
     process.exit(1);
   }
 
-  const studiesData = loadJson(STUDIES_PATH, 'studies_dictionary');
-  const nodesDict = studiesData?.nodes;
-  if (!nodesDict || typeof nodesDict !== 'object') {
-    console.error('[ETL] studies_dictionary.json no tiene "nodes"');
-    process.exit(1);
+  const deltaPath = getDeltaPath();
+  let nodesDict;
+  if (deltaPath) {
+    const deltaData = loadJson(deltaPath, 'studies_dictionary_delta');
+    nodesDict = deltaData?.nodes;
+    if (!nodesDict || typeof nodesDict !== 'object') {
+      console.error('[ETL] El delta no tiene "nodes"');
+      process.exit(1);
+    }
+    const removedStudies = deltaData.studies?.removed || [];
+    console.log(`[ETL] Modo delta: ${Object.keys(nodesDict).length} nodos nuevos/modificados`);
+    if (removedStudies.length || deltaData.removed_nodes?.length) {
+      console.log(`[ETL] Delta reporta ${deltaData.removed_nodes?.length || 0} nodos y ${removedStudies.length} estudios eliminados en DIM (no se borran de la BD)`);
+    }
+  } else {
+    const studiesData = loadJson(STUDIES_PATH, 'studies_dictionary');
+    nodesDict = studiesData?.nodes;
+    if (!nodesDict || typeof nodesDict !== 'object') {
+      console.error('[ETL] studies_dictionary.json no tiene "nodes"');
+      process.exit(1);
+    }
   }
 
   let nodosUnif = { byId: new Map(), byAddress: new Map(), normalize: (s) => s };
-  if (fs.existsSync(NODOS_UNIFICADOS_PATH)) {
-    const unifData = loadJson(NODOS_UNIFICADOS_PATH, 'nodos_unificados');
-    nodosUnif = buildNodosUnificadosMap(unifData);
+  // Nodos del mapa + capa nodos_geocodificados.json (nodos del diccionario geocodificados aparte)
+  const unifFeatures = fs.existsSync(NODOS_UNIFICADOS_PATH)
+    ? loadJson(NODOS_UNIFICADOS_PATH, 'nodos_unificados')?.features || []
+    : [];
+  const overlayFeatures = readFeatures(NODOS_GEOCODIFICADOS_PATH);
+  if (unifFeatures.length || overlayFeatures.length) {
+    nodosUnif = buildNodosUnificadosMap({ features: withGeocodedOverlay(unifFeatures, overlayFeatures) });
+    if (overlayFeatures.length) {
+      console.log(`[ETL] Capa nodos_geocodificados.json: ${overlayFeatures.length} nodos`);
+    }
   }
 
   const pool = getPool();
@@ -96,74 +218,7 @@ function main() {
     try {
       // 1) UPSERT nodos
       for (const [nodeIdExterno, node] of Object.entries(nodesDict)) {
-        const internalIdDim = node.internal_id != null ? parseInt(node.internal_id, 10) : null;
-        const direccion = node.address || node.direccion || '';
-        const nombre = node.nombre_nodo || node.via_principal || direccion || nodeIdExterno;
-
-        let geom = null;
-        const byIdMatch = nodosUnif.byId.get(nodeIdExterno);
-        if (byIdMatch?.point) {
-          geom = `SRID=4326;POINT(${byIdMatch.point.lon} ${byIdMatch.point.lat})`;
-        } else {
-          const key = nodosUnif.normalize(direccion || nombre);
-          const byAddr = nodosUnif.byAddress.get(key);
-          if (byAddr?.point) {
-            geom = `SRID=4326;POINT(${byAddr.point.lon} ${byAddr.point.lat})`;
-          }
-        }
-
-        const existedNodo = await query('SELECT id FROM nodos WHERE node_id_externo = $1', [nodeIdExterno]);
-        const res = await query(
-          `INSERT INTO nodos (node_id_externo, internal_id_dim, nombre, direccion, geom, fuente, updated_at)
-           VALUES ($1, $2, $3, $4, $5::geometry, 'DIM', $6)
-           ON CONFLICT (node_id_externo) DO UPDATE SET
-             internal_id_dim = EXCLUDED.internal_id_dim,
-             nombre = COALESCE(NULLIF(EXCLUDED.nombre,''), nodos.nombre),
-             direccion = COALESCE(NULLIF(EXCLUDED.direccion,''), nodos.direccion),
-             geom = COALESCE(EXCLUDED.geom, nodos.geom),
-             updated_at = EXCLUDED.updated_at
-           RETURNING id`,
-          [nodeIdExterno, internalIdDim, nombre || null, direccion || null, geom, now]
-        );
-        const row = res.rows[0];
-        if (existedNodo.rows.length > 0) stats.nodosUpdate++;
-        else stats.nodosInsert++;
-
-        const nodoPk = row?.id;
-        if (!nodoPk) continue;
-
-        const studies = node.studies || [];
-        for (const s of studies) {
-          const fileIdDim = s.file_id != null ? String(s.file_id) : null;
-          const tipoEstudio = s.type || 'Volúmen vehicular';
-          const fechaInicio = s.date ? new Date(s.date + 'T00:00:00Z') : new Date();
-          const fechaFin = s.date_end ? new Date(s.date_end + 'T00:00:00Z') : null;
-          const downloadUrl = s.download_url || null;
-          const contratista = Array.isArray(s.contractors) && s.contractors.length ? s.contractors[0] : null;
-          const totalRecords = s.total_records != null ? parseInt(s.total_records, 10) : null;
-          const vehicleTypes = Array.isArray(s.vehicle_types) ? s.vehicle_types : null;
-
-          const existedEst = await query(
-            'SELECT 1 FROM estudios WHERE nodo_id = $1 AND file_id_dim = $2',
-            [nodoPk, fileIdDim]
-          );
-          await query(
-            `INSERT INTO estudios (nodo_id, file_id_dim, tipo_estudio, fecha_inicio, fecha_fin, download_url, contratista, total_records, vehicle_types, fuente, updated_at)
-             VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, 'DIM', $10)
-             ON CONFLICT (nodo_id, file_id_dim) DO UPDATE SET
-               tipo_estudio = EXCLUDED.tipo_estudio,
-               fecha_inicio = EXCLUDED.fecha_inicio,
-               fecha_fin = EXCLUDED.fecha_fin,
-               download_url = EXCLUDED.download_url,
-               contratista = EXCLUDED.contratista,
-               total_records = EXCLUDED.total_records,
-               vehicle_types = EXCLUDED.vehicle_types,
-               updated_at = EXCLUDED.updated_at`,
-            [nodoPk, fileIdDim, tipoEstudio, fechaInicio, fechaFin, downloadUrl, contratista, totalRecords, vehicleTypes, now]
-          );
-          if (existedEst.rows.length > 0) stats.estudiosUpdate++;
-          else stats.estudiosInsert++;
-        }
+        await upsertNodoConEstudios(nodeIdExterno, node, nodosUnif, now, stats);
       }
 
       console.log('[ETL Fase 1] Resumen:');
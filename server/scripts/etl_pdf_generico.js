@@ -8,10 +8,12 @@
  *
  * --dry-run: extrae tablas y genera CSV estándar sin ejecutar ETL ni marcar procesado.
  * --origen=SECOP|PRIVADO|UNIVERSIDAD: procesar solo ese origen (opcional).
+ * --workers=N: procesos para extraer páginas en paralelo (o PDF_EXTRACT_WORKERS en .env; 1 = en serie).
  *
  * Uso: node server/scripts/etl_pdf_generico.js
  *      node server/scripts/etl_pdf_generico.js --dry-run
  *      node server/scripts/etl_pdf_generico.js --origen=PRIVADO
+ *      node server/scripts/etl_pdf_generico.js --workers=8
  *      npm run etl:pdf
  */
 
@@ -39,6 +41,11 @@ const PYTHON_SCRIPT = path.join(__dirname, 'pdf_extract_tablas.py');
 dotenv.config({ path: path.join(PROJECT_ROOT, '.env') });
 
 const DRY_RUN = process.argv.includes('--dry-run');
+/** Workers de pdf_extract_tablas.py (páginas en paralelo); sin valor, el script usa los núcleos disponibles. */
+const PDF_WORKERS = (() => {
+  const arg = process.argv.find((a) => a.startsWith('--workers='));
+  return arg ? arg.split('=')[1].trim() : process.env.PDF_EXTRACT_WORKERS || null;
+})();
 const ORIGEN_FILTER = (() => {
   const arg = process.argv.find((a) => a.startsWith('--origen='));
   return arg ? arg.split('=')[1].trim().toUpperCase() : null;
@@ -66,7 +73,9 @@ function rutaPdfParaArchivo(row) {
 function runPythonExtract(pdfPath, outDir) {
   return new Promise((resolve, reject) => {
     const py = process.platform === 'win32' ? 'python' : 'python3';
-    const child = spawn(py, [PYTHON_SCRIPT, pdfPath, outDir], {
+    const args = [PYTHON_SCRIPT, pdfPath, outDir];
+    if (PDF_WORKERS) args.push(`--workers=${PDF_WORKERS}`);
+    const child = spawn(py, args, {
       cwd: PROJECT_ROOT,
       stdio: 'inherit',
       shell: false,
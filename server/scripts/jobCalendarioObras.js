@@ -11,6 +11,7 @@ import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
 import axios from 'axios';
+import { loadNodosUnificados } from '../utils/nodosUnificados.js';
 import * as turf from '@turf/turf';
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
@@ -23,7 +24,6 @@ const OUTPUT_ARG = process.argv.find(a => a.startsWith('--output='));
 const CALENDAR_PATH = OUTPUT_ARG
   ? path.resolve(process.cwd(), OUTPUT_ARG.split('=')[1])
   : path.join(__dirname, '../../public/data/calendario_obras_eventos.json');
-const NODOS_PATH = path.join(__dirname, '../../public/data/nodos_unificados.json');
 const BATCH_SIZE = 2000;
 const IDU_BATCH_SIZE = 100;
 const BUFFER_METERS = Number(process.env.OBRAS_BUFFER_METERS) || 300;
@@ -80,16 +80,6 @@ function haversineApproxKm(lng1, lat1, lng2, lat2) {
   return R * c;
 }
 
-function loadNodosUnificados() {
-  try {
-    const raw = fs.readFileSync(NODOS_PATH, 'utf8');
-    const data = JSON.parse(raw);
-    return data.features || [];
-  } catch {
-    return [];
-  }
-}
-
 function normalizeObra(obra) {
   return {
     id: obra.id || null,
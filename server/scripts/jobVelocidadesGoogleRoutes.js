@@ -12,6 +12,7 @@ import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
 import axios from 'axios';
+import { loadNodosUnificados } from '../utils/nodosUnificados.js';
 
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
 
@@ -21,7 +22,6 @@ const VELOCIDADES_PATH_ARG = process.argv.find(a => a.startsWith('--output='));
 const VELOCIDADES_PATH = VELOCIDADES_PATH_ARG
   ? path.resolve(process.cwd(), VELOCIDADES_PATH_ARG.split('=')[1])
   : path.join(__dirname, '../../public/data/velocidades_por_nodo.json');
-const NODOS_PATH = path.join(__dirname, '../../public/data/nodos_unificados.json');
 const PAIRS_ARG = process.argv.find(a => a.startsWith('--pairs='));
 const MAX_PAIRS = PAIRS_ARG ? parseInt(PAIRS_ARG.split('=')[1], 10) : 10;
 const LIMIT_NODES_ARG = process.argv.find(a => a.startsWith('--limit-nodes='));
@@ -29,16 +29,6 @@ const LIMIT_NODES = LIMIT_NODES_ARG ? parseInt(LIMIT_NODES_ARG.split('=')[1], 10
 const MAX_DISTANCE_KM = 0.5;
 const DELAY_MS = 500;
 
-function loadNodosUnificados() {
-  try {
-    const raw = fs.readFileSync(NODOS_PATH, 'utf8');
-    const data = JSON.parse(raw);
-    return data.features || [];
-  } catch {
-    return [];
-  }
-}
-
 function getCoords(feature) {
   const coords = feature.geometry?.coordinates;
   if (Array.isArray(coords) && coords.length >= 2 && typeof coords[0] === 'number' && typeof coords[1] === 'number') {
@@ -1,43 +1,167 @@
 #!/usr/bin/env python3
 """
 Extrae tablas de un PDF y las guarda como CSV en out_dir.
-Uso: python server/scripts/pdf_extract_tablas.py <pdf_path> <out_dir>
+Uso: python server/scripts/pdf_extract_tablas.py <pdf_path> <out_dir> [--workers=N]
 
 Dependencia: camelot-py (pip install "camelot-py[cv]") para PDFs con tablas.
   - En Windows/Linux: pip install "camelot-py[cv]"
   - Requiere: opencv-python, ghostscript (en PATH)
 Alternativa sin Camelot: pip install pdfplumber (más ligero; ver comentarios abajo).
+
+Paralelismo: con más de un worker (--workers=N o PDF_EXTRACT_WORKERS; por
+defecto los núcleos disponibles, hasta MAX_DEFAULT_WORKERS) el documento se
+divide en rangos de PAGES_PER_CHUNK páginas que se procesan en un pool de
+procesos. Cada rango escribe sus tablas en archivos temporales y al final se
+renombran en orden de página, así la numeración tabla_N.csv es la misma que
+en una pasada en serie.
 """
 import sys
 import os
+import csv
+from concurrent.futures import ProcessPoolExecutor
+
+PAGES_PER_CHUNK = 10  # Páginas por tarea del pool
+MAX_DEFAULT_WORKERS = 4  # Tope de workers si no se indica --workers ni PDF_EXTRACT_WORKERS
+TMP_PREFIX = ".parte_"  # Archivos temporales de cada rango en out_dir
+
+
+def parse_workers(argv):
+    """Workers pedidos con --workers=N, PDF_EXTRACT_WORKERS o según los núcleos."""
+    value = next((a.split("=", 1)[1] for a in argv if a.startswith("--workers=")), None)
+    value = value or os.environ.get("PDF_EXTRACT_WORKERS")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"Valor de workers inválido: {value}; se usa 1", file=sys.stderr)
+            return 1
+    return max(1, min(os.cpu_count() or 1, MAX_DEFAULT_WORKERS))
+
+
+def count_pages(pdf_path):
+    """Número de páginas del PDF, o None si no hay con qué leerlo."""
+    try:
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"No se pudo contar páginas: {e}", file=sys.stderr)
+        return None
+    try:
+        from pypdf import PdfReader  # Dependencia de camelot
+        return len(PdfReader(pdf_path).pages)
+    except Exception:
+        return None
+
+
+def page_ranges(total_pages, chunk_size=PAGES_PER_CHUNK):
+    """Rangos (primera, última) de páginas, base 1 e inclusivos."""
+    return [(first, min(first + chunk_size - 1, total_pages)) for first in range(1, total_pages + 1, chunk_size)]
+
+
+def _tmp_name(out_dir, chunk_index, table_index):
+    return os.path.join(out_dir, f"{TMP_PREFIX}{chunk_index:05d}_{table_index:04d}.csv")
+
+
+def extract_camelot_range(pdf_path, pages, flavor, out_dir, chunk_index):
+    """Tablas de Camelot de un rango de páginas ("1-10" o "all") en archivos temporales, en orden."""
+    import camelot
+    tables = camelot.read_pdf(pdf_path, pages=pages, flavor=flavor)
+    files = []
+    for i, t in enumerate(tables):
+        out_file = _tmp_name(out_dir, chunk_index, i)
+        t.to_csv(out_file)
+        files.append(out_file)
+    return files
+
+
+def extract_pdfplumber_range(pdf_path, first, last, out_dir, chunk_index):
+    """Tablas de pdfplumber de las páginas first..last (None = hasta el final) en archivos temporales, en orden."""
+    import pdfplumber
+    files = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[first - 1:last]:
+            for table in page.extract_tables() or []:
+                out_file = _tmp_name(out_dir, chunk_index, len(files))
+                with open(out_file, "w", encoding="utf-8") as f:
+                    writer = csv.writer(f)
+                    for row in table or []:
+                        writer.writerow([(c or "").strip() if c else "" for c in row])
+                files.append(out_file)
+    return files
+
+
+def run_ranges(func, args_per_chunk, workers, out_dir):
+    """
+    Ejecuta func sobre cada rango (en un pool si workers > 1) y devuelve los
+    archivos temporales de todos los rangos en orden de página. Si un rango
+    falla, borra los temporales ya escritos y propaga el error.
+    """
+    results = []
+    try:
+        if workers > 1 and len(args_per_chunk) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(func, *args) for args in args_per_chunk]
+                results = [future.result() for future in futures]
+        else:
+            results = [func(*args) for args in args_per_chunk]
+    except Exception:
+        discard_tmp_files(out_dir)
+        raise
+    return [path for files in results for path in files]
+
+
+def discard_tmp_files(out_dir):
+    for name in os.listdir(out_dir):
+        if name.startswith(TMP_PREFIX):
+            os.remove(os.path.join(out_dir, name))
+
+
+def publish_tables(files, out_dir):
+    """Renombra los temporales a tabla_1.csv, tabla_2.csv, ... en el orden dado."""
+    for i, path in enumerate(files, start=1):
+        os.replace(path, os.path.join(out_dir, f"tabla_{i}.csv"))
+    return len(files)
+
 
 def main():
-    if len(sys.argv) < 3:
-        print("Uso: pdf_extract_tablas.py <pdf_path> <out_dir>", file=sys.stderr)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) < 2:
+        print("Uso: pdf_extract_tablas.py <pdf_path> <out_dir> [--workers=N]", file=sys.stderr)
         sys.exit(2)
 
-    pdf_path = os.path.abspath(sys.argv[1])
-    out_dir = os.path.abspath(sys.argv[2])
+    pdf_path = os.path.abspath(args[0])
+    out_dir = os.path.abspath(args[1])
 
     if not os.path.isfile(pdf_path):
         print(f"No existe el archivo: {pdf_path}", file=sys.stderr)
         sys.exit(1)
 
     os.makedirs(out_dir, exist_ok=True)
+    discard_tmp_files(out_dir)  # Restos de una corrida interrumpida
+
+    workers = parse_workers(sys.argv[1:])
+    total_pages = count_pages(pdf_path) if workers > 1 else None
+    ranges = page_ranges(total_pages) if total_pages else None
+    if ranges and len(ranges) > 1:
+        print(f"{total_pages} páginas en {len(ranges)} rangos, {workers} workers", file=sys.stderr)
 
     exported = 0
 
     # Intento 1: Camelot (mejor para tablas con bordes)
     try:
-        import camelot
-        tables = camelot.read_pdf(pdf_path, pages="all", flavor="lattice")
-        if not tables:
-            tables = camelot.read_pdf(pdf_path, pages="all", flavor="stream")
-        if tables:
-            for i, t in enumerate(tables, start=1):
-                out_file = os.path.join(out_dir, f"tabla_{i}.csv")
-                t.to_csv(out_file)
-                exported += 1
+        import camelot  # noqa: F401  (solo para detectar si está instalado)
+        for flavor in ("lattice", "stream"):
+            if ranges:
+                chunks = [(pdf_path, f"{first}-{last}", flavor, out_dir, i) for i, (first, last) in enumerate(ranges)]
+            else:
+                chunks = [(pdf_path, "all", flavor, out_dir, 0)]
+            files = run_ranges(extract_camelot_range, chunks, workers, out_dir)
+            if files:
+                exported = publish_tables(files, out_dir)
+                break
     except ImportError:
         pass
     except Exception as e:
@@ -46,19 +170,9 @@ def main():
     # Intento 2: pdfplumber (más ligero: pip install pdfplumber)
     if exported == 0:
         try:
-            import pdfplumber
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, start=1):
-                    tables = page.extract_tables()
-                    if tables:
-                        for ti, table in enumerate(tables):
-                            exported += 1
-                            out_file = os.path.join(out_dir, f"tabla_{exported}.csv")
-                            with open(out_file, "w", encoding="utf-8") as f:
-                                import csv
-                                writer = csv.writer(f)
-                                for row in table or []:
-                                    writer.writerow([(c or "").strip() if c else "" for c in row])
+            import pdfplumber  # noqa: F401  (solo para detectar si está instalado)
+            chunks = [(pdf_path, first, last, out_dir, i) for i, (first, last) in enumerate(ranges or [(1, None)])]
+            exported = publish_tables(run_ranges(extract_pdfplumber_range, chunks, workers, out_dir), out_dir)
         except ImportError:
             print("Instala una dependencia: pip install 'camelot-py[cv]' o pip install pdfplumber", file=sys.stderr)
             sys.exit(1)
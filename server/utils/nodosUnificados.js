@@ -0,0 +1,71 @@
+/**
+ * Lectura de nodos_unificados.json para jobs y ETL del servidor.
+ * Suma la capa nodos_geocodificados.json (scripts/python/geocode_missing_nodes.py), que trae los
+ * nodos del diccionario de estudios geocodificados sin reescribir el archivo principal, hasta que
+ * run_nodes_pipeline.py la incorpora. Misma regla que el front (nodosUnificadosService.js).
+ */
+
+import fs from 'fs';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+const PUBLIC_DATA_DIR = path.join(__dirname, '../../public/data');
+
+const NODOS_UNIFICADOS_PATH = path.join(PUBLIC_DATA_DIR, 'nodos_unificados.json');
+const NODOS_GEOCODIFICADOS_PATH = path.join(PUBLIC_DATA_DIR, 'nodos_geocodificados.json');
+
+/**
+ * Ids de todas las fuentes de un nodo: el propio y, si está fusionado
+ * (scripts/python/nodos_merge.py), los de properties.sources. Igual que source_ids en Python.
+ */
+function sourceIds(feature) {
+  const props = feature?.properties || {};
+  const ids = (props.sources || [])
+    .filter((source) => source?.id != null)
+    .map((source) => String(source.id));
+  if (props.id != null && !ids.includes(String(props.id))) ids.unshift(String(props.id));
+  return ids;
+}
+
+/** Features de un FeatureCollection; [] si el archivo no existe o no es válido. */
+function readFeatures(filePath) {
+  try {
+    const data = JSON.parse(fs.readFileSync(filePath, 'utf8'));
+    return data?.features || [];
+  } catch {
+    return [];
+  }
+}
+
+/** Agrega los nodos de la capa geocodificada cuyos ids no estén ya entre los features. */
+function withGeocodedOverlay(features, overlay) {
+  if (!overlay.length) return features;
+  const ids = new Set(features.flatMap(sourceIds));
+  const added = overlay.filter((feature) => {
+    const featureIds = sourceIds(feature);
+    if (featureIds.some((id) => ids.has(id))) return false;
+    featureIds.forEach((id) => ids.add(id));
+    return true;
+  });
+  return features.concat(added);
+}
+
+/**
+ * Nodos unificados con la capa geocodificada.
+ *
+ * @param {{ nodosPath?: string, overlayPath?: string }} [options]
+ * @returns {Array} features GeoJSON ([] si no hay archivos)
+ */
+function loadNodosUnificados({ nodosPath = NODOS_UNIFICADOS_PATH, overlayPath = NODOS_GEOCODIFICADOS_PATH } = {}) {
+  return withGeocodedOverlay(readFeatures(nodosPath), readFeatures(overlayPath));
+}
+
+export {
+  NODOS_UNIFICADOS_PATH,
+  NODOS_GEOCODIFICADOS_PATH,
+  sourceIds,
+  readFeatures,
+  withGeocodedOverlay,
+  loadNodosUnificados,
+};
@@ -9,6 +9,290 @@
 const cache = new Map();
 const CACHE_TTL = 5 * 60 * 1000; // 5 minutos
 
+/**
+ * Formato columnar generado por scripts/python/nodos_columnar.py.
+ * Si no está disponible se usa el GeoJSON completo.
+ */
+const COLUMNAR_URL = '/data/nodos_unificados.bin';
+const GEOJSON_URL = '/data/nodos_unificados.json';
+const GEOCODED_OVERLAY_URL = '/data/nodos_geocodificados.json';
+const COLUMNAR_MAGIC = 'NUC1';
+const rawShardCache = new Map();
+let columnarRawInfo = null;
+
+/**
+ * FNV-1a 32 bits sobre UTF-8 (misma función que raw_shard en Python)
+ */
+const fnv1a32 = (text) => {
+  let hash = 0x811c9dc5;
+  for (const byte of new TextEncoder().encode(text)) {
+    hash ^= byte;
+    hash = Math.imul(hash, 0x01000193) >>> 0;
+  }
+  return hash;
+};
+
+/**
+ * Lee el header JSON de nodos_unificados.bin (valida la firma)
+ */
+const readColumnarHeader = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== COLUMNAR_MAGIC) {
+    throw new Error('Formato columnar inválido');
+  }
+  const headerLength = view.getUint32(4, true);
+  return JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+};
+
+/**
+ * Decodifica nodos_unificados.bin al formato del mapa ({ geometry: {x, y}, attributes, _original }).
+ * raw_data no viaja en el binario ni se descarga al cargar: los features quedan sin
+ * esos atributos y las vistas de detalle los piden por id (fetchNodeRawData / withNodeRawData).
+ *
+ * @param {ArrayBuffer} buffer - Contenido del archivo .bin
+ * @returns {{ header: Object, features: Array }}
+ */
+export const parseUnifiedNodesColumnar = (buffer) => {
+  const header = readColumnarHeader(buffer);
+  const { count, sections, dictionaries } = header;
+
+  const section = (name, ArrayType) => {
+    const { offset, length } = sections[name];
+    return new ArrayType(buffer, offset, length / ArrayType.BYTES_PER_ELEMENT);
+  };
+  const decoder = new TextDecoder();
+  const strings = (name) => {
+    const offsets = section(`${name}_offsets`, Uint32Array);
+    const data = section(`${name}_data`, Uint8Array);
+    const values = new Array(count);
+    for (let i = 0; i < count; i++) {
+      values[i] = decoder.decode(data.subarray(offsets[i], offsets[i + 1]));
+    }
+    return values;
+  };
+  const dictionaryValue = (dictionary, code) => dictionary[code] || null;
+
+  const coords = section('coords', Float32Array);
+  const origen = section('origen', Uint16Array);
+  const tipo = section('tipo', Uint16Array);
+  const color = section('color', Uint16Array);
+  const ids = strings('id');
+  const nombres = strings('nombre');
+  const props = strings('props');
+
+  const features = new Array(count);
+  for (let i = 0; i < count; i++) {
+    const x = coords[2 * i];
+    const y = coords[2 * i + 1];
+    const properties = {
+      id: ids[i],
+      nombre: nombres[i] || null,
+      origen: dictionaryValue(dictionaries.origen, origen[i]),
+      tipo: dictionaryValue(dictionaries.tipo, tipo[i]),
+      color: dictionaryValue(dictionaries.color, color[i]),
+      ...(props[i] ? JSON.parse(props[i]) : {})
+    };
+    // Misma conversión que el GeoJSON (salvo raw_data)
+    features[i] = convertGeoJSONFeature({
+      type: 'Feature',
+      geometry: { type: 'Point', coordinates: [x, y] },
+      properties
+    }, i);
+  }
+  return { header, features };
+};
+
+/**
+ * Intenta cargar el formato columnar; null si no existe o no es válido
+ * (p. ej. el servidor de desarrollo responde index.html para archivos ausentes).
+ */
+const fetchColumnarNodes = async () => {
+  try {
+    const response = await fetch(COLUMNAR_URL);
+    if (!response.ok) return null;
+    const { header, features } = parseUnifiedNodesColumnar(await response.arrayBuffer());
+    columnarRawInfo = header.raw;
+    return features;
+  } catch (error) {
+    console.warn('⚠️ Formato columnar no disponible, usando GeoJSON:', error.message);
+    return null;
+  }
+};
+
+/**
+ * Obtiene el raw_data (atributos originales de la fuente) de un nodo por id.
+ * Solo descarga el shard que contiene ese id; los shards quedan en memoria.
+ *
+ * @param {string} nodeId - properties.id del nodo
+ * @returns {Promise<Object|null>} raw_data o null si no existe
+ */
+export const fetchNodeRawData = async (nodeId) => {
+  const raw = columnarRawInfo || { dir: 'nodos_unificados_raw', shards: 64 };
+  const entries = await fetchRawShard(raw, fnv1a32(String(nodeId)) % raw.shards);
+  return entries[String(nodeId)] ?? null;
+};
+
+/**
+ * Completa los attributes de un nodo con su raw_data, como los del GeoJSON.
+ * Si el nodo vino del GeoJSON ya lo trae; si vino del columnar, se pide su shard.
+ *
+ * @param {Object} feature - Nodo de fetchUnifiedNodes
+ * @returns {Promise<Object>} Nodo con raw_data en attributes y _original.properties
+ */
+export const withNodeRawData = async (feature) => {
+  const properties = feature._original?.properties || {};
+  if (properties.raw_data !== undefined) return feature;
+  const rawData = await fetchNodeRawData(properties.id ?? feature.attributes.OBJECTID);
+  if (rawData === null) return feature;
+  return {
+    ...feature,
+    attributes: { ...feature.attributes, ...rawData },
+    _original: { ...feature._original, properties: { ...properties, raw_data: rawData } }
+  };
+};
+
+/**
+ * Descarga un shard de raw_data (una vez; queda en rawShardCache)
+ */
+const fetchRawShard = (raw, shard) => {
+  if (!rawShardCache.has(shard)) {
+    const url = `/data/${raw.dir}/${String(shard).padStart(2, '0')}.json`;
+    rawShardCache.set(shard, fetch(url).then((response) => {
+      if (!response.ok) throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      return response.json();
+    }).catch((error) => {
+      rawShardCache.delete(shard);
+      throw error;
+    }));
+  }
+  return rawShardCache.get(shard);
+};
+
+/**
+ * Pirámide de teselas generada por scripts/python/nodos_tiles.py
+ */
+const TILES_URL = '/data/nodos_unificados_tiles';
+const tileCache = new Map();
+let tileIndexPromise = null;
+
+const fetchTileJson = (path) => {
+  if (!tileCache.has(path)) {
+    tileCache.set(path, fetch(`${TILES_URL}/${path}`).then((response) => {
+      if (!response.ok) throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      return response.json();
+    }).catch((error) => {
+      tileCache.delete(path);
+      throw error;
+    }));
+  }
+  return tileCache.get(path);
+};
+
+const lonLatToTile = (lon, lat, zoom) => {
+  const n = 2 ** zoom;
+  const latRad = (Math.max(Math.min(lat, 85.05112878), -85.05112878) * Math.PI) / 180;
+  const x = Math.floor(((lon + 180) / 360) * n);
+  const y = Math.floor(((1 - Math.asinh(Math.tan(latRad)) / Math.PI) / 2) * n);
+  return [Math.min(Math.max(x, 0), n - 1), Math.min(Math.max(y, 0), n - 1)];
+};
+
+/**
+ * Obtiene los nodos (o clusters) de las teselas visibles.
+ * En zooms <= cluster_max_zoom devuelve clusters ({ lon, lat, count, tipos });
+ * en zooms mayores devuelve los nodos de las teselas de detail_zoom que cubren la vista.
+ *
+ * @param {{ xmin: number, ymin: number, xmax: number, ymax: number }} bounds - Extensión visible (lon/lat)
+ * @param {number} zoom - Zoom actual del mapa
+ * @returns {Promise<{ zoom: number, clusters: Array, features: Array }>}
+ */
+export const fetchUnifiedNodesInView = async (bounds, zoom) => {
+  if (!tileIndexPromise) {
+    tileIndexPromise = fetchTileJson('index.json').catch((error) => {
+      tileIndexPromise = null;
+      throw error;
+    });
+  }
+  const index = await tileIndexPromise;
+  const tileZoom = Math.min(Math.max(Math.floor(zoom), index.min_zoom),
+    zoom > index.cluster_max_zoom ? index.detail_zoom : index.cluster_max_zoom);
+  const existing = index.tiles[String(tileZoom)] || {};
+  const [xmin, ymin] = lonLatToTile(bounds.xmin, bounds.ymax, tileZoom);
+  const [xmax, ymax] = lonLatToTile(bounds.xmax, bounds.ymin, tileZoom);
+
+  const paths = [];
+  for (let x = xmin; x <= xmax; x++) {
+    for (let y = ymin; y <= ymax; y++) {
+      if (existing[`${x}/${y}`]) paths.push(`${tileZoom}/${x}/${y}.json`);
+    }
+  }
+  const tiles = await Promise.all(paths.map(fetchTileJson));
+  return {
+    zoom: tileZoom,
+    clusters: tiles.flatMap((tile) => tile.clusters || []),
+    features: tiles.flatMap((tile) => tile.features || [])
+  };
+};
+
+/**
+ * Convierte un feature GeoJSON al formato del componente del mapa ({ geometry: {x, y}, attributes, _original })
+ */
+const convertGeoJSONFeature = (feature, index) => {
+  const { geometry, properties } = feature;
+
+  // Convertir coordenadas GeoJSON [lng, lat] a formato Esri {x, y}
+  let x, y;
+  if (geometry.type === 'Point' && geometry.coordinates) {
+    [x, y] = geometry.coordinates; // GeoJSON usa [lng, lat]
+  } else {
+    console.warn(`Feature ${index} tiene geometría no soportada: ${geometry.type}`);
+    return null;
+  }
+
+  // Crear estructura compatible con el componente del mapa
+  return {
+    geometry: {
+      x: x, // Longitud
+      y: y  // Latitud
+    },
+    attributes: {
+      OBJECTID: properties.id || index,
+      NOMBRE: properties.nombre || 'Sin nombre',
+      TIPO_NODO: properties.tipo,
+      ORIGEN: properties.origen,
+      COLOR: properties.color,
+      // Incluir todos los datos raw para acceso completo
+      ...properties.raw_data
+    },
+    // Guardar también la estructura original para referencia
+    _original: feature
+  };
+};
+
+/**
+ * Capa de nodos geocodificados (scripts/python/geocode_missing_nodes.py).
+ * Se publica aparte para no reescribir nodos_unificados.json; puede no existir.
+ */
+const fetchGeocodedOverlay = async () => {
+  try {
+    const response = await fetch(GEOCODED_OVERLAY_URL, { headers: { 'Accept': 'application/json' } });
+    if (!response.ok) return [];
+    const data = await response.json();
+    return (data.features || []).map(convertGeoJSONFeature).filter(feature => feature !== null);
+  } catch {
+    return [];
+  }
+};
+
+/**
+ * Agrega los nodos de la capa geocodificada que no estén ya en el mapa
+ */
+const withGeocodedOverlay = (features, overlay) => {
+  if (!overlay.length) return features;
+  const ids = new Set(features.map((feature) => String(feature.attributes.OBJECTID)));
+  return features.concat(overlay.filter((feature) => !ids.has(String(feature.attributes.OBJECTID))));
+};
+
 /**
  * Obtiene todos los nodos unificados desde el archivo JSON
  * Convierte el formato GeoJSON a formato compatible con el componente del mapa
@@ -28,8 +312,20 @@ export const fetchUnifiedNodes = async () => {
   console.log('🔄 Cargando nodos unificados desde archivo local...');
   
   try {
+    // Preferir el formato columnar (.bin; raw_data por id bajo demanda)
+    let columnarFeatures = await fetchColumnarNodes();
+    if (columnarFeatures) {
+      columnarFeatures = withGeocodedOverlay(columnarFeatures, await fetchGeocodedOverlay());
+      cache.set(cacheKey, {
+        data: columnarFeatures,
+        timestamp: Date.now()
+      });
+      console.log(`🎉 Carga completada (columnar): ${columnarFeatures.length} nodos unificados`);
+      return columnarFeatures;
+    }
+
     // Cargar el archivo JSON desde la carpeta public/data
-    const response = await fetch('/data/nodos_unificados.json', {
+    const response = await fetch(GEOJSON_URL, {
       method: 'GET',
       headers: {
         'Accept': 'application/json'
@@ -48,37 +344,10 @@ export const fetchUnifiedNodes = async () => {
     }
 
     // Convertir formato GeoJSON a formato compatible con el componente del mapa
-    const convertedFeatures = geojsonData.features.map((feature, index) => {
-      const { geometry, properties } = feature;
-      
-      // Convertir coordenadas GeoJSON [lng, lat] a formato Esri {x, y}
-      let x, y;
-      if (geometry.type === 'Point' && geometry.coordinates) {
-        [x, y] = geometry.coordinates; // GeoJSON usa [lng, lat]
-      } else {
-        console.warn(`Feature ${index} tiene geometría no soportada: ${geometry.type}`);
-        return null;
-      }
-
-      // Crear estructura compatible con el componente del mapa
-      return {
-        geometry: {
-          x: x, // Longitud
-          y: y  // Latitud
-        },
-        attributes: {
-          OBJECTID: properties.id || index,
-          NOMBRE: properties.nombre || 'Sin nombre',
-          TIPO_NODO: properties.tipo,
-          ORIGEN: properties.origen,
-          COLOR: properties.color,
-          // Incluir todos los datos raw para acceso completo
-          ...properties.raw_data
-        },
-        // Guardar también la estructura original para referencia
-        _original: feature
-      };
-    }).filter(feature => feature !== null); // Filtrar features inválidos
+    const convertedFeatures = withGeocodedOverlay(
+      geojsonData.features.map(convertGeoJSONFeature).filter(feature => feature !== null), // Filtrar features inválidos
+      await fetchGeocodedOverlay()
+    );
 
     // Guardar en cache
     cache.set(cacheKey, {
@@ -125,6 +394,9 @@ export const getUnifiedNodesStats = async () => {
  */
 export const limpiarCache = () => {
   cache.clear();
+  rawShardCache.clear();
+  tileCache.clear();
+  tileIndexPromise = null;
   console.log('🗑️  Cache de nodos unificados limpiado');
 };
 